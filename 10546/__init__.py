@@ -1,14 +1,52 @@
 # -*- coding: utf-8 -*-
 """
 衡阳师范学院插件模块
-"""
 
-from getCourseGrades import fetch_grades, parse_grades
-from getCourseSchedule import fetch_course_schedule, parse_schedule
+导入本包只定义插件信息，不加载任何子模块；fetch_* / parse_* 等接口在首次访问时
+才导入对应模块（随之初始化日志、读取配置并加载 requests / bs4 等依赖）。
+"""
+import importlib
 
 SCHOOL_NAME = "衡阳师范学院"
 SCHOOL_CODE = "10546"
 PLUGIN_VERSION = "1.0.0"
 
-__all__ = ['fetch_grades', 'parse_grades', 'fetch_course_schedule', 'parse_schedule', 
-           'SCHOOL_NAME', 'SCHOOL_CODE', 'PLUGIN_VERSION']
\ No newline at end of file
+# 接口名 -> 所在模块（首次访问时导入）
+_LAZY_EXPORTS = {
+    'fetch_grades': 'getCourseGrades',
+    'parse_grades': 'getCourseGrades',
+    'fetch_grades_delta': 'getCourseGrades',
+    'fetch_grades_stream': 'getCourseGrades',
+    'fetch_grades_by_term': 'getCourseGrades',
+    'get_grade_history': 'getCourseGrades',
+    'fetch_course_schedule': 'getCourseSchedule',
+    'parse_schedule': 'getCourseSchedule',
+    'fetch_course_schedule_delta': 'getCourseSchedule',
+    'fetch_course_schedule_stream': 'getCourseSchedule',
+    'fetch_batch': 'batchFetch',
+    'fetch_all': 'fetchAll',
+    'fetch_grades_async': 'asyncFetch',
+    'fetch_course_schedule_async': 'asyncFetch',
+    'ScheduleIndex': 'scheduleIndex',
+    'Poller': 'pollerDaemon',
+}
+
+__all__ = ['fetch_grades', 'parse_grades', 'fetch_course_schedule', 'parse_schedule',
+           'fetch_grades_delta', 'fetch_course_schedule_delta', 'fetch_batch', 'fetch_all',
+           'fetch_grades_stream', 'fetch_course_schedule_stream', 'fetch_grades_by_term',
+           'fetch_grades_async', 'fetch_course_schedule_async', 'ScheduleIndex', 'get_grade_history',
+           'Poller',
+           'SCHOOL_NAME', 'SCHOOL_CODE', 'PLUGIN_VERSION']
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # 之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio 接口模块
+
+提供 login / get_grade_html / get_schedule_html / fetch_grades / fetch_course_schedule 的异步版本，
+缓存策略、会话复用（与同步版本共用 AppData 中保存的 Cookie）、仅 IPv4 连接和返回结构与同步版本一致，
+可在同一个事件循环中并发大量获取。缓存库读写与页面解析会阻塞，放到线程池中执行，不占用事件循环。
+同一事件循环中的会话共用一个连接池（TCPConnector），到教务服务器的连接可在会话之间复用；
+事件循环结束前可调用 close_connector() 关闭连接池。
+依赖 aiohttp（可选依赖，首次使用时才导入，未安装时调用会抛出 RuntimeError）。
+"""
+import asyncio
+import base64
+import socket
+import time
+import weakref
+from http.cookies import SimpleCookie
+
+aiohttp = None  # 首次调用 _require_aiohttp() 时导入
+
+import getCourseGrades
+import getCourseSchedule
+import metrics
+import sessionManager
+
+# ===== 1. 常量定义 =====
+BASE_URL = getCourseGrades.BASE_URL
+REQUEST_TIMEOUT = 10
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Referer": BASE_URL
+}
+
+
+def _require_aiohttp():
+    global aiohttp
+    if aiohttp is None:
+        try:
+            import aiohttp
+        except ImportError:
+            raise RuntimeError("异步接口需要 aiohttp，请先安装: pip install aiohttp") from None
+
+
+# 事件循环 -> 该循环中各会话共用的 TCPConnector（事件循环被回收后自动移除）
+_connectors = weakref.WeakKeyDictionary()
+
+
+# ===== 2. 会话创建与登录 =====
+def get_connector():
+    """当前事件循环共用的 TCPConnector（仅使用 IPv4 连接，与 IPv4Adapter 行为一致），需在事件循环中调用"""
+    _require_aiohttp()
+    loop = asyncio.get_running_loop()
+    connector = _connectors.get(loop)
+    if connector is None or connector.closed:
+        connector = _connectors[loop] = aiohttp.TCPConnector(family=socket.AF_INET)
+    return connector
+
+
+async def close_connector():
+    """关闭当前事件循环共用的 TCPConnector（之后创建的会话使用新的连接池）"""
+    connector = _connectors.pop(asyncio.get_running_loop(), None)
+    if connector is not None:
+        await connector.close()
+
+
+def create_session_async(connector=None):
+    """创建未登录的 aiohttp 会话
+
+    Args:
+        connector: 使用的 TCPConnector，默认为当前事件循环共用的连接池（get_connector）；
+                   关闭会话不会关闭连接池
+    """
+    _require_aiohttp()
+    # 允许 IP 地址形式的主机写入 Cookie（本地测试服务器）
+    cookie_jar = aiohttp.CookieJar(unsafe=True)
+    return aiohttp.ClientSession(
+        connector=connector or get_connector(),
+        connector_owner=False,
+        cookie_jar=cookie_jar,
+        headers=HEADERS,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    )
+
+
+async def login_async(username, password, module=getCourseGrades):
+    """异步登录，成功返回 aiohttp.ClientSession（调用方负责关闭），失败返回 None
+
+    Args:
+        module: 用于判定登录结果并记录失败响应的模块（getCourseGrades 或 getCourseSchedule）
+    """
+    b64_user = base64.b64encode(username.encode("utf-8")).decode("utf-8")
+    b64_pwd = base64.b64encode(password.encode("utf-8")).decode("utf-8")
+    encoded = f"{b64_user}%%%{b64_pwd}"
+
+    session = create_session_async()
+    start = time.perf_counter()
+    try:
+        with metrics.timed("login_post", source=module.METRIC_SOURCE):
+            async with session.post(module.LOGIN_URL, data={"encoded": encoded}) as response:
+                module.logger.debug(f"登录响应状态码: {response.status}")
+                text = await response.text()
+    except Exception as e:
+        module.logger.error(f"登录请求异常: {e}")
+        metrics.inc("login_failures", source=module.METRIC_SOURCE)
+        await session.close()
+        return None
+
+    if module.check_login_response(text, username, response.status, time.perf_counter() - start):
+        return session
+    await session.close()
+    return None
+
+
+def _set_cookies(session, cookies, base_url):
+    """把 SessionManager 保存的 Cookie 加入 aiohttp 会话（视为 base_url 所在主机下发的 Cookie）"""
+    from yarl import URL  # aiohttp 的依赖
+
+    jar = SimpleCookie()
+    for c in cookies:
+        jar[c["name"]] = c["value"]
+        jar[c["name"]]["path"] = c.get("path") or "/"
+    session.cookie_jar.update_cookies(jar, response_url=URL(base_url))
+
+
+def _get_cookies(session):
+    """aiohttp 会话的 Cookie，格式同 SessionManager.save_cookies"""
+    return [
+        {
+            "name": morsel.key,
+            "value": morsel.value,
+            "domain": morsel["domain"],
+            "path": morsel["path"] or "/",
+            "expires": None,
+            "secure": bool(morsel["secure"]),
+        }
+        for morsel in session.cookie_jar
+    ]
+
+
+async def probe_async(session, module=getCourseGrades):
+    """异步探测会话是否仍然有效（同 SessionManager.probe）"""
+    url = module.SESSION_MANAGER.base_url + sessionManager.PROBE_PATH
+    try:
+        async with session.get(url, allow_redirects=False) as response:
+            module.logger.debug(f"会话探测响应状态码: {response.status}")
+            text = await response.text()
+    except Exception as e:
+        module.logger.warning(f"会话探测请求异常: {e}")
+        return False
+    return sessionManager.is_valid_probe(response.status, text)
+
+
+async def get_session_async(username, password, module=getCourseGrades):
+    """获取可用的异步会话：AppData 中保存的 Cookie（探测有效时）→ 重新登录
+
+    与同步版本的 SessionManager 共用 Cookie 文件，登录成功后同样保存，同步、异步接口之间可互相复用。
+    成功返回 aiohttp.ClientSession（调用方负责关闭），失败返回 None。
+    """
+    manager = module.SESSION_MANAGER
+    cookies = await asyncio.to_thread(manager.load_cookies, username)
+    if cookies:
+        session = create_session_async()
+        _set_cookies(session, cookies, manager.base_url)
+        if await probe_async(session, module):
+            module.logger.info("已保存的会话探测有效，跳过登录")
+            return session
+        await session.close()
+        module.logger.info("已保存的会话已过期，需要重新登录")
+        await asyncio.to_thread(manager.invalidate, username)
+
+    session = await login_async(username, password, module)
+    if session is not None:
+        await asyncio.to_thread(manager.save_cookies, username, _get_cookies(session))
+    return session
+
+
+# ===== 3. 获取页面 HTML =====
+async def _download(session, module, url, handle_response, save_cache, username):
+    headers = {"Referer": BASE_URL + "framework/xsMain.jsp"}
+    start = time.perf_counter()
+    try:
+        with metrics.timed("page_get", source=module.METRIC_SOURCE):
+            async with session.get(url, headers=headers) as response:
+                module.logger.debug(f"页面请求状态码: {response.status}")
+                body = await response.read()
+                text = await response.text()
+        metrics.inc("bytes_downloaded", len(body), source=module.METRIC_SOURCE)
+    except Exception as e:
+        module.logger.error(f"页面请求异常: {e}")
+        return None
+    # 写入缓存库（及记录失败响应）会阻塞
+    return await asyncio.to_thread(handle_response, text, save_cache, username, response.status,
+                                   time.perf_counter() - start)
+
+
+async def _get_html(session, force_update, username, module, read_cache, should_update, download):
+    if not force_update:
+        if module.run_mode() == 'DEV':
+            return await asyncio.to_thread(read_cache, username)
+        if not await asyncio.to_thread(should_update, username):
+            html = await asyncio.to_thread(read_cache, username)
+            if html is not None:
+                return html
+    elif module.run_mode() == 'DEV' and session is None:
+        return None
+    return await download(session, username=username)
+
+
+async def download_grade_html_async(session, save_cache=True, username=None):
+    """异步从网络获取成绩HTML（同 download_grade_html）"""
+    return await _download(session, getCourseGrades, getCourseGrades.GRADE_URL,
+                           getCourseGrades.handle_grade_response, save_cache, username)
+
+
+async def download_schedule_html_async(session, save_cache=True, username=None):
+    """异步从网络获取课表HTML（同 download_schedule_html）"""
+    return await _download(session, getCourseSchedule, getCourseSchedule.SCHEDULE_URL,
+                           getCourseSchedule.handle_schedule_response, save_cache, username)
+
+
+async def get_grade_html_async(session, force_update=False, username=None):
+    """异步获取成绩HTML，缓存策略同 get_grade_html"""
+    return await _get_html(session, force_update, username, getCourseGrades,
+                           getCourseGrades.read_grade_cache, getCourseGrades.should_update_grades,
+                           download_grade_html_async)
+
+
+async def get_schedule_html_async(session, force_update=False, username=None):
+    """异步获取课表HTML，缓存策略同 get_schedule_html"""
+    return await _get_html(session, force_update, username, getCourseSchedule,
+                           getCourseSchedule.read_schedule_cache, getCourseSchedule.should_update_schedule,
+                           download_schedule_html_async)
+
+
+# ===== 4. 主流程 =====
+def _parse_and_save(html, username, parse, save_parsed):
+    rows = parse(html)
+    save_parsed(rows, username, html)
+    return rows
+
+
+async def _fetch(username, password, force_update, module, should_update, load_parsed,
+                 save_parsed, parse, get_html, download):
+    # 与同步版本相同：DEV 模式只使用缓存，不进行网络请求
+    if module.run_mode() == 'DEV':
+        if not force_update:
+            return await asyncio.to_thread(load_parsed, username)
+        html = await get_html(None, force_update, username)
+        return await asyncio.to_thread(parse, html) if html else None
+
+    # 缓存未过期时直接返回解析结果，不进行任何网络请求
+    if not force_update and not await asyncio.to_thread(should_update, username):
+        rows = await asyncio.to_thread(load_parsed, username)
+        if rows is not None:
+            return rows
+
+    _require_aiohttp()
+    session = await get_session_async(username, password, module)
+    if not session:
+        return None
+    async with session:
+        html = await download(session, username=username)
+    if not html:
+        # 可能是会话在探测后失效，丢弃以便下次重新登录
+        await asyncio.to_thread(module.SESSION_MANAGER.invalidate, username)
+        return None
+
+    # 解析是 CPU 密集型操作，与写入缓存库一起放到线程池中执行
+    return await asyncio.to_thread(_parse_and_save, html, username, parse, save_parsed)
+
+
+async def fetch_grades_async(username, password, force_update=False):
+    """异步获取成绩数据，参数与返回值同 fetch_grades"""
+    return await _fetch(username, password, force_update, getCourseGrades,
+                        getCourseGrades.should_update_grades, getCourseGrades.load_parsed_grades,
+                        getCourseGrades.save_parsed_grades, getCourseGrades.parse_grades,
+                        get_grade_html_async, download_grade_html_async)
+
+
+async def fetch_course_schedule_async(username, password, force_update=False):
+    """异步获取课表数据，参数与返回值同 fetch_course_schedule"""
+    return await _fetch(username, password, force_update, getCourseSchedule,
+                        getCourseSchedule.should_update_schedule, getCourseSchedule.load_parsed_schedule,
+                        getCourseSchedule.save_parsed_schedule, getCourseSchedule.parse_schedule,
+                        get_schedule_html_async, download_schedule_html_async)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+多账号批量获取模块
+
+通过线程池并发获取多个账号的成绩和/或课表，并发数可配置，
+对教务服务器的请求经过令牌桶限速，每个账号单独返回结果与错误信息。
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加项目根目录到 sys.path（确保能找到 core 模块）
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.log import init_logger
+
+import getCourseGrades
+import getCourseSchedule
+
+logger = init_logger('batchFetch')
+
+# ===== 1. 常量定义 =====
+DEFAULT_MAX_WORKERS = 4
+# 对 hysfjw.hynu.edu.cn 的平均请求速率（次/秒）与突发上限
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+
+# 获取类型 -> (模块, 下载函数, 解析函数, 保存解析结果函数)
+FETCHERS = {
+    "grades": (getCourseGrades, getCourseGrades.download_grade_html, getCourseGrades.parse_grades,
+               getCourseGrades.save_parsed_grades),
+    "schedule": (getCourseSchedule, getCourseSchedule.download_schedule_html, getCourseSchedule.parse_schedule,
+                 getCourseSchedule.save_parsed_schedule),
+}
+
+
+# ===== 2. 令牌桶限速 =====
+class TokenBucket:
+    """线程安全的令牌桶，acquire() 在令牌不足时阻塞等待"""
+
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# ===== 3. 单账号获取 =====
+def fetch_kind(username, password, kind, bucket):
+    """从网络获取一个账号的一种数据，每次向服务器发送请求（探测、登录、下载）前从 bucket 取一个令牌
+
+    Returns:
+        tuple: (解析结果, 错误信息)；成功时错误信息为 None
+    """
+    module, download, parse, save_parsed = FETCHERS[kind]
+    # 探测会话与登录都是对服务器的请求，每次发送前各取一个令牌
+    session = module.SESSION_MANAGER.get_session(username, password, throttle=bucket.acquire)
+    if not session:
+        return None, "登录失败"
+
+    bucket.acquire()
+    # 缓存按账号保存，批量获取的结果同样写入各账号自己的缓存
+    html = download(session, username=username)
+    if not html:
+        module.SESSION_MANAGER.invalidate(username)
+        return None, "未获取到有效页面"
+
+    rows = parse(html)
+    save_parsed(rows, username, html)
+    return rows, None
+
+
+def _fetch_account(username, password, kinds, bucket):
+    result = {"username": username, "errors": {}}
+    for kind in kinds:
+        result[kind] = None
+        try:
+            result[kind], error = fetch_kind(username, password, kind, bucket)
+            if error:
+                result["errors"][kind] = error
+        except Exception as e:
+            logger.error(f"账号 {username} 获取 {kind} 异常: {e}")
+            result["errors"][kind] = str(e)
+    return result
+
+
+# ===== 4. 批量获取入口 =====
+def fetch_batch(accounts, kinds=("grades", "schedule"), max_workers=DEFAULT_MAX_WORKERS,
+                rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """并发获取多个账号的数据
+
+    Args:
+        accounts: 账号列表，元素为 (username, password) 或 {"username": ..., "password": ...}
+        kinds: 要获取的数据类型，可选 "grades"、"schedule"
+        max_workers: 最大并发账号数
+        rate: 对教务服务器的平均请求速率（次/秒）
+        burst: 令牌桶容量（允许的突发请求数）
+
+    Returns:
+        list: 与 accounts 顺序一致，每项为
+            {"username": 学号, "grades": [...] 或 None, "schedule": [...] 或 None, "errors": {类型: 错误信息}}
+    """
+    for kind in kinds:
+        if kind not in FETCHERS:
+            raise ValueError(f"未知的获取类型: {kind}")
+
+    credentials = []
+    for account in accounts:
+        if isinstance(account, dict):
+            credentials.append((account["username"], account["password"]))
+        else:
+            credentials.append(tuple(account))
+
+    bucket = TokenBucket(rate, burst)
+    logger.info(f"开始批量获取 {len(credentials)} 个账号, kinds={list(kinds)}, 并发数={max_workers}, 限速={rate}次/秒")
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_fetch_account, username, password, kinds, bucket)
+            for username, password in credentials
+        ]
+        results = [future.result() for future in futures]
+
+    failed = sum(1 for r in results if r["errors"])
+    logger.info(f"批量获取完成，用时 {time.time() - start:.1f} 秒，失败账号数 {failed}")
+    return results
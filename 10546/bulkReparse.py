@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+批量重新解析模块
+
+修改解析规则或补录数据时，需要重新解析大量保存下来的成绩 / 课表页面。本模块遍历目录下的页面文件，
+按块分给进程池中的多个进程解析（解析是纯 Python 的 CPU 密集型操作，单进程只能用满一个核），
+结果逐行写入 JSONL 文件。工作进程直接使用 parserBackend 与 records，结果与 parse_grades / parse_schedule
+相同，但不初始化日志、不打开 AppData 中的缓存库：
+
+    {"path": "a/grade.html", "kind": "grades", "count": 60, "rows": [...]}
+    {"path": "b/grade.html", "kind": "grades", "error": "UnicodeDecodeError: ..."}
+
+输出文件本身即检查点：中断后以 --resume 再次运行，会跳过输出中已有的文件继续处理
+（末尾写了一半的行会被截掉）。
+
+用法：
+    python bulkReparse.py <页面目录> <输出.jsonl> [--kind grades|schedule] [--workers N] [--resume]
+
+文件名包含 grade / schedule 时自动判断页面类型，否则使用 --kind。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+# 添加项目根目录（core 模块）与插件目录（同级模块）到 sys.path，从其他目录运行或作为包导入时同样可用；
+# 工作进程导入本模块时也会执行
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+PLUGIN_DIR = Path(__file__).resolve().parent
+for _path in (BASE_DIR, PLUGIN_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+import parserBackend
+import records
+
+# 日志只在主进程中初始化（见 get_logger）；工作进程不写日志，解析错误记录在输出中
+logger = None
+
+# ===== 1. 常量定义 =====
+# 页面类型 -> (取出表格单元格的函数, 由单元格构造条目的函数)，结果与 parse_grades / parse_schedule 相同。
+# 不导入 getCourseGrades / getCourseSchedule：它们在导入时初始化日志并打开 AppData 中的缓存库
+PARSERS = {
+    "grades": (parserBackend.extract_grade_rows, records.grades_from_rows),
+    "schedule": (parserBackend.extract_schedule_rows, records.courses_from_rows),
+}
+# 文件名中的关键字 -> 页面类型
+KIND_KEYWORDS = (("grade", "grades"), ("schedule", "schedule"))
+DEFAULT_PATTERN = "*.html"
+# 每个任务块包含的文件数（块越大进程间通信开销越小，但进度与检查点的粒度越粗）
+DEFAULT_CHUNK_SIZE = 32
+# 每个工作进程最多同时排队的任务块数
+PENDING_PER_WORKER = 2
+# 每处理多少个文件输出一次进度
+PROGRESS_EVERY = 1000
+
+
+def get_logger():
+    global logger
+    if logger is None:
+        from core.log import init_logger
+        logger = init_logger('bulkReparse')
+    return logger
+
+
+# ===== 2. 工作进程 =====
+_backend = None
+
+
+def _init_worker(backend):
+    """工作进程初始化：记录解析后端（主进程中已确定）"""
+    global _backend
+    _backend = backend
+
+
+def parse_page(html, kind, backend=None):
+    """解析一个页面，未找到目标表格时返回空列表（同 parse_grades / parse_schedule）"""
+    extract, build = PARSERS[kind]
+    rows = extract(html, backend)
+    return build(rows) if rows is not None else []
+
+
+def _parse_chunk(root, chunk):
+    """解析一块文件（在工作进程中序列化为 JSONL 行，主进程只负责写入）
+
+    Args:
+        root: 页面目录（输出中的 path 为相对该目录的路径）
+        chunk: [(相对路径, 页面类型), ...]
+
+    Returns:
+        tuple: (JSONL 行列表, 失败文件数, 条目总数)
+    """
+    lines = []
+    failed = 0
+    total_rows = 0
+    for rel_path, kind in chunk:
+        record = {"path": rel_path, "kind": kind}
+        try:
+            with open(os.path.join(root, rel_path), "r", encoding="utf-8") as f:
+                html = f.read()
+            rows = parse_page(html, kind, _backend)
+            line = json.dumps({**record, "count": len(rows), "rows": rows}, ensure_ascii=False)
+            total_rows += len(rows)
+        except Exception as e:
+            line = json.dumps({**record, "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+            failed += 1
+        lines.append(line + "\n")
+    return lines, failed, total_rows
+
+
+# ===== 3. 任务划分与检查点 =====
+def detect_kind(path, default=None):
+    """按文件名判断页面类型，无法判断时返回 default"""
+    name = path.name.lower()
+    for keyword, kind in KIND_KEYWORDS:
+        if keyword in name:
+            return kind
+    return default
+
+
+def iter_pages(root, pattern=DEFAULT_PATTERN, kind=None):
+    """按路径顺序产出 (相对路径, 页面类型)，跳过无法判断类型的文件"""
+    root = Path(root)
+    for path in sorted(root.rglob(pattern)):
+        if not path.is_file():
+            continue
+        page_kind = detect_kind(path, kind)
+        if page_kind is None:
+            get_logger().warning(f"无法判断页面类型，已跳过: {path}（可使用 --kind 指定）")
+            continue
+        yield path.relative_to(root).as_posix(), page_kind
+
+
+def load_checkpoint(output):
+    """读取已有输出中处理过的文件，并截掉末尾写了一半的行
+
+    Returns:
+        set: 已处理文件的相对路径
+    """
+    done = set()
+    try:
+        f = open(output, "r+b")
+    except FileNotFoundError:
+        return done
+    with f:
+        valid_end = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                break
+            valid_end += len(line)
+        f.truncate(valid_end)
+    return done
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ===== 4. 批量解析 =====
+def reparse(root, output, kind=None, pattern=DEFAULT_PATTERN, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+            resume=False, backend=None):
+    """并行重新解析 root 下的页面，结果写入 output（JSONL）
+
+    Args:
+        root: 页面目录（递归查找）
+        output: 输出文件
+        kind: 无法按文件名判断类型时使用的页面类型（"grades" / "schedule"）
+        pattern: 文件名匹配模式
+        workers: 进程数，默认 CPU 核数
+        chunk_size: 每个任务块的文件数
+        resume: 跳过 output 中已处理的文件并追加写入；否则覆盖 output
+        backend: 解析后端（同 parse_grades / parse_schedule）
+
+    Returns:
+        dict: {"parsed": 成功数, "failed": 失败数, "skipped": 已处理跳过数, "rows": 条目总数, "seconds": 用时}
+    """
+    if kind is not None and kind not in PARSERS:
+        raise ValueError(f"未知的页面类型: {kind}")
+    # 在主进程中确定解析后端：工作进程不继承 set_default_backend 的设置
+    resolved = parserBackend.resolve_backend(backend)
+    if backend and resolved != backend:
+        get_logger().warning(f"解析后端 {backend} 不可用，已回退到 {resolved}")
+    root = str(root)
+    done = load_checkpoint(output) if resume else set()
+    stats = {"parsed": 0, "failed": 0, "skipped": 0, "rows": 0, "seconds": 0.0}
+
+    def pending_pages():
+        for item in iter_pages(root, pattern, kind):
+            if item[0] in done:
+                stats["skipped"] += 1
+            else:
+                yield item
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    chunks = _chunks(pending_pages(), chunk_size)
+    with open(output, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(resolved,)) as executor:
+        running = set()
+        exhausted = False
+        processed = 0
+        while running or not exhausted:
+            # 限制排队的任务块数，文件列表与结果都不会整体堆积在内存中
+            while not exhausted and len(running) < workers * PENDING_PER_WORKER:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    running.add(executor.submit(_parse_chunk, root, chunk))
+            if not running:
+                break
+
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                lines, failed, rows = future.result()
+                out.writelines(lines)
+                stats["parsed"] += len(lines) - failed
+                stats["failed"] += failed
+                stats["rows"] += rows
+                previous = processed
+                processed += len(lines)
+                if processed // PROGRESS_EVERY != previous // PROGRESS_EVERY:
+                    get_logger().info(f"已处理 {processed} 个文件（{processed / (time.perf_counter() - start):.0f} 个/秒）")
+            # 每块写完即刷新，中断后检查点最多丢失正在写的一行
+            out.flush()
+
+    stats["seconds"] = time.perf_counter() - start
+    get_logger().info(f"批量解析完成: 成功 {stats['parsed']}，失败 {stats['failed']}，跳过 {stats['skipped']}，"
+                f"共 {stats['rows']} 条，用时 {stats['seconds']:.1f} 秒")
+    return stats
+
+
+# ===== 5. 主程序入口 =====
+def main():
+    parser = argparse.ArgumentParser(description="并行批量重新解析成绩 / 课表页面，输出 JSONL")
+    parser.add_argument("root", help="页面目录（递归查找）")
+    parser.add_argument("output", help="输出 JSONL 文件")
+    parser.add_argument("--kind", choices=sorted(PARSERS), help="无法按文件名判断时的页面类型")
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN, help="文件名匹配模式")
+    parser.add_argument("--workers", type=int, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每个任务块的文件数")
+    parser.add_argument("--backend", help="解析后端（html.parser / lxml）")
+    parser.add_argument("--resume", action="store_true", help="跳过输出中已处理的文件，继续追加")
+    args = parser.parse_args()
+
+    stats = reparse(args.root, args.output, args.kind, args.pattern, args.workers, args.chunk_size,
+                    args.resume, args.backend)
+    print(f"✅ 成功 {stats['parsed']}，❌ 失败 {stats['failed']}，跳过 {stats['skipped']}，"
+          f"共 {stats['rows']} 条，用时 {stats['seconds']:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
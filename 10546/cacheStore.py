@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+缓存存储模块
+
+成绩、课表的页面缓存统一保存在 AppData 目录下的一个 SQLite 文件中，
+代替原来的 grade.html / grade_timestamp.txt / grade_parsed.json 等散落文件：
+
+- 每个 (数据类型, 账号) 一行：压缩后的原始 HTML、内容哈希、获取时间、解析结果
+- 每次写入都是一个事务，HTML、哈希和时间戳总是一起更新；多个进程同时运行时
+  不会读到写了一半的页面（WAL 模式，读写互不阻塞）
+- 读取只需一次主键查询；只判断是否过期时不读取 HTML 和解析结果
+- 记录数据最近一次变化的时间和此后连续未变化的获取次数（自适应循环检测使用）。是否变化按解析结果判断，
+  页面中每次请求都不同的标记、流式获取截断的页面、按学期拆分的分区都不会被误判为变化
+
+账号在库中以学号摘要保存，与会话 Cookie 文件的命名方式一致。
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+# ===== 1. 常量定义 =====
+DEFAULT_FILENAME = "cache.sqlite3"
+# 未指定账号时使用的账号键
+DEFAULT_ACCOUNT = ""
+# 其他进程正在写入时的最长等待时间（秒）
+BUSY_TIMEOUT = 10
+COMPRESS_LEVEL = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    kind TEXT NOT NULL,
+    account TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    html BLOB NOT NULL,
+    rows_hash TEXT,
+    rows BLOB,
+    data_hash TEXT,
+    changed_at REAL,
+    unchanged_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, account)
+) WITHOUT ROWID
+"""
+# 旧版数据库缺少的列 -> 定义
+ADDED_COLUMNS = {
+    "data_hash": "TEXT",
+    "changed_at": "REAL",
+    "unchanged_count": "INTEGER NOT NULL DEFAULT 0",
+}
+
+# content_hash: HTML 的 sha256；rows: 与 content_hash 对应的解析结果，没有或已过时为 None
+# changed_at: 解析结果最近一次变化（或首次获取）的时间；unchanged_count: 此后连续获取到相同数据的次数
+CacheEntry = namedtuple("CacheEntry", ["content_hash", "fetched_at", "html", "rows", "changed_at",
+                                       "unchanged_count"])
+
+
+# ===== 2. 工具函数 =====
+def hash_html(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def hash_rows(rows):
+    """解析结果的哈希（与字段顺序无关）"""
+    text = json.dumps(rows, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def account_key(username):
+    """账号在库中的键（学号摘要）"""
+    if not username:
+        return DEFAULT_ACCOUNT
+    return hashlib.sha1(username.encode("utf-8")).hexdigest()[:16]
+
+
+def _compress_text(text):
+    return zlib.compress(text.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _decompress_text(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _dump_rows(rows):
+    return zlib.compress(json.dumps(rows, ensure_ascii=False).encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _load_rows(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+# ===== 3. 缓存存储 =====
+class CacheStore:
+    """按 (数据类型, 账号) 保存页面缓存的 SQLite 存储（线程安全，每个线程使用独立连接）
+
+    Args:
+        path: 数据库文件路径
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connect(self):
+        """当前线程的数据库连接（首次调用时创建并建表）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._schema_lock:
+            if not self._schema_ready:
+                with conn:
+                    conn.execute(SCHEMA)
+                    existing = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+                    for column, definition in ADDED_COLUMNS.items():
+                        if column not in existing:
+                            conn.execute(f"ALTER TABLE cache_entries ADD COLUMN {column} {definition}")
+                self._schema_ready = True
+        self._local.conn = conn
+        return conn
+
+    # ---------- 读取 ----------
+    def get(self, kind, username=None, with_html=False, with_rows=False):
+        """读取一条缓存，不存在时返回 None
+
+        Args:
+            kind: 数据类型（"grade" / "schedule"）
+            username: 学号
+            with_html: 是否读取并解压 HTML（否则 html 为 None）
+            with_rows: 是否读取解析结果（否则 rows 为 None）
+        """
+        columns = "content_hash, fetched_at, changed_at, unchanged_count, {}, {}".format(
+            "html" if with_html else "NULL",
+            "rows_hash, rows" if with_rows else "NULL, NULL",
+        )
+        row = self.connect().execute(
+            f"SELECT {columns} FROM cache_entries WHERE kind = ? AND account = ?",
+            (kind, account_key(username)),
+        ).fetchone()
+        if row is None:
+            return None
+
+        content_hash, fetched_at, changed_at, unchanged_count, html, rows_hash, rows = row
+        html = _decompress_text(html) if html is not None else None
+        rows = _load_rows(rows) if rows is not None and rows_hash == content_hash else None
+        return CacheEntry(content_hash, fetched_at, html, rows, changed_at if changed_at is not None else fetched_at,
+                          unchanged_count)
+
+    # ---------- 写入 ----------
+    def put(self, kind, username, html, rows=None, fetched_at=None):
+        """在一个事务中写入页面及其获取时间（和解析结果），返回内容哈希
+
+        页面内容与已有缓存相同时保留已有的解析结果。连续未变化次数按解析结果判断：
+        - 带解析结果时，与上次的解析结果相同则加一，否则清零
+        - 不带解析结果时，页面与已有缓存完全相同则加一；页面不同时暂不改变，
+          由随后的 put_rows 按解析结果判断
+        """
+        content_hash = hash_html(html)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        rows_hash = content_hash if rows is not None else None
+        rows_blob = _dump_rows(rows) if rows is not None else None
+        data_hash = hash_rows(rows) if rows is not None else None
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO cache_entries (kind, account, content_hash, fetched_at, html, rows_hash, rows,
+                                           data_hash, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (kind, account) DO UPDATE SET
+                    unchanged_count = CASE
+                        WHEN excluded.data_hash IS NOT NULL
+                            THEN CASE WHEN data_hash IS excluded.data_hash THEN unchanged_count + 1 ELSE 0 END
+                        WHEN content_hash = excluded.content_hash THEN unchanged_count + 1
+                        ELSE unchanged_count END,
+                    changed_at = CASE
+                        WHEN excluded.data_hash IS NOT NULL AND data_hash IS NOT excluded.data_hash
+                            THEN excluded.fetched_at
+                        ELSE changed_at END,
+                    data_hash = COALESCE(excluded.data_hash, data_hash),
+                    content_hash = excluded.content_hash,
+                    fetched_at = excluded.fetched_at,
+                    html = excluded.html,
+                    rows_hash = COALESCE(excluded.rows_hash, rows_hash),
+                    rows = COALESCE(excluded.rows, rows)
+                """,
+                (kind, account_key(username), content_hash, fetched_at, _compress_text(html),
+                 rows_hash, rows_blob, data_hash, fetched_at),
+            )
+        return content_hash
+
+    def put_rows(self, kind, username, content_hash, rows):
+        """保存解析结果；content_hash 与当前缓存的页面不一致（已被其他进程更新）时不写入
+
+        页面变化后首次保存解析结果时，按解析结果是否与上次相同更新连续未变化次数（见 put）。
+
+        Returns:
+            bool: 是否写入
+        """
+        data_hash = hash_rows(rows)
+        conn = self.connect()
+        with conn:
+            # 已有解析结果与页面对应（rows_hash = content_hash）时只是重新保存，不计为一次获取
+            cursor = conn.execute(
+                """
+                UPDATE cache_entries SET
+                    unchanged_count = CASE
+                        WHEN rows_hash IS content_hash THEN unchanged_count
+                        WHEN data_hash IS :data_hash THEN unchanged_count + 1
+                        ELSE 0 END,
+                    changed_at = CASE
+                        WHEN rows_hash IS NOT content_hash AND data_hash IS NOT :data_hash THEN fetched_at
+                        ELSE changed_at END,
+                    data_hash = :data_hash,
+                    rows_hash = :content_hash,
+                    rows = :rows
+                WHERE kind = :kind AND account = :account AND content_hash = :content_hash
+                """,
+                {"data_hash": data_hash, "content_hash": content_hash, "rows": _dump_rows(rows),
+                 "kind": kind, "account": account_key(username)},
+            )
+        return cursor.rowcount > 0
+
+    def import_legacy(self, kind, username, html, fetched_at):
+        """导入旧版缓存文件的内容；已有缓存时不覆盖
+
+        Returns:
+            bool: 是否导入
+        """
+        conn = self.connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache_entries (kind, account, content_hash, fetched_at, html) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, account_key(username), hash_html(html), fetched_at, _compress_text(html)),
+            )
+        return cursor.rowcount > 0
+
+    def kinds(self, username=None, prefix=""):
+        """账号已缓存的数据类型中以 prefix 开头的列表"""
+        return [row[0] for row in self.connect().execute(
+            "SELECT kind FROM cache_entries WHERE account = ? AND substr(kind, 1, ?) = ? ORDER BY kind",
+            (account_key(username), len(prefix), prefix),
+        )]
+
+    def delete(self, kind, username=None):
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE kind = ? AND account = ?",
+                         (kind, account_key(username)))
+
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# ===== 4. 共享实例 =====
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(cache_dir):
+    """cache_dir 目录下的共享 CacheStore（成绩与课表模块共用同一个文件）"""
+    path = Path(cache_dir) / DEFAULT_FILENAME
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = CacheStore(path)
+        return store
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+增量变更检测模块
+
+按账号记录上次获取页面的内容哈希以及按主键索引的解析结果，
+下次只返回新增、变化、删除的条目；页面哈希未变化时完全跳过解析。
+"""
+from cacheStore import hash_html  # 与页面缓存使用相同的内容哈希
+
+# ===== 1. 主键定义 =====
+GRADE_KEY_FIELDS = ("学期", "课程编号")
+SCHEDULE_KEY_FIELDS = ("星期", "开始小节", "课程名称")
+
+
+# ===== 2. 工具函数 =====
+def index_rows(rows, key_fields):
+    """按主键建立索引；主键重复时追加出现序号以区分（如同一时段同名课程分周次开设）"""
+    indexed = {}
+    for row in rows:
+        key = tuple(row.get(field) for field in key_fields)
+        if key in indexed:
+            n = 1
+            while key + (n,) in indexed:
+                n += 1
+            key = key + (n,)
+        indexed[key] = row
+    return indexed
+
+
+def compute_delta(old_rows, new_rows, key_fields):
+    """比较两次解析结果
+
+    Returns:
+        dict: {"added": [新增条目], "changed": [{"old": 旧条目, "new": 新条目}], "removed": [删除条目]}
+    """
+    old_index = index_rows(old_rows, key_fields)
+    new_index = index_rows(new_rows, key_fields)
+
+    added = [row for key, row in new_index.items() if key not in old_index]
+    removed = [row for key, row in old_index.items() if key not in new_index]
+    changed = [
+        {"old": old_index[key], "new": row}
+        for key, row in new_index.items()
+        if key in old_index and old_index[key] != row
+    ]
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+# ===== 3. 增量跟踪器 =====
+class DeltaTracker:
+    """按账号保存上次的页面哈希与解析结果，并计算与本次的差异
+
+    状态保存在缓存库（cacheStore）中 (kind, 账号) 对应的一行：页面、内容哈希和解析结果，
+    多个账号的增量互不影响。
+
+    Args:
+        store: cacheStore.CacheStore
+        kind: 状态在缓存库中的数据类型（如 "grade_delta"）
+        key_fields: 条目主键字段
+        logger: 调用方模块的日志对象
+    """
+
+    def __init__(self, store, kind, key_fields, logger):
+        self.store = store
+        self.kind = kind
+        self.key_fields = tuple(key_fields)
+        self.logger = logger
+
+    def _get_entry(self, username, with_rows=False):
+        try:
+            return self.store.get(self.kind, username, with_rows=with_rows)
+        except Exception as e:
+            self.logger.warning(f"读取增量状态失败: {e}，将视为首次获取")
+            return None
+
+    def update(self, html, parse_func, username=None):
+        """用账号的新页面更新状态并返回差异；页面哈希与上次相同时不调用 parse_func"""
+        entry = self._get_entry(username)
+        if entry is not None and entry.content_hash == hash_html(html):
+            self.logger.info("页面内容未变化，跳过解析")
+            return {"added": [], "changed": [], "removed": []}
+
+        rows = parse_func(html)
+        old_entry = self._get_entry(username, with_rows=True) if entry is not None else None
+        old_rows = old_entry.rows if old_entry is not None and old_entry.rows is not None else []
+        delta = compute_delta(old_rows, rows, self.key_fields)
+        self.logger.info(
+            f"增量结果: 新增 {len(delta['added'])} 条，变化 {len(delta['changed'])} 条，"
+            f"删除 {len(delta['removed'])} 条"
+        )
+        try:
+            self.store.put(self.kind, username, html, rows)
+        except Exception as e:
+            self.logger.warning(f"保存增量状态失败: {e}")
+        return delta
+
+    def reset(self, username=None):
+        """清空账号的状态，下次获取时全部条目视为新增"""
+        self.store.delete(self.kind, username)
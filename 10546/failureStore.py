@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+失败响应存储模块
+
+登录失败、页面无法识别时的响应内容用于排查问题，以前每次都同步写入 login_failed_*.html /
+*_failed.html 并覆盖上一份。现在保存到缓存库（cacheStore 的 SQLite 文件）的 failure_artifacts 表：
+
+- 写入在后台线程进行，不占用请求路径；队列满时丢弃并计数
+- 按内容哈希去重：相同的错误页面只保存一份（保留首次出现的样本），只更新出现次数和最后出现时间
+- 内容压缩保存，总大小超过上限时按最后出现时间淘汰最久未出现的样本
+- 每份样本附带元数据：阶段、来源模块、账号摘要、HTTP 状态码、请求耗时、URL
+
+查看：list_failures() / get_failure(content_hash)，或 export(content_hash, path) 导出为 HTML 文件。
+"""
+import atexit
+import queue
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+import cacheStore
+import metrics
+
+# ===== 1. 常量定义 =====
+# 样本（压缩后）总大小上限（字节）
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+# 等待写入的样本数上限
+QUEUE_SIZE = 256
+# 进程退出时等待写入完成的最长时间（秒）
+FLUSH_TIMEOUT = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS failure_artifacts (
+    content_hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    count INTEGER NOT NULL,
+    stage TEXT,
+    source TEXT,
+    account TEXT,
+    status_code INTEGER,
+    elapsed REAL,
+    url TEXT
+)
+"""
+INDEX = "CREATE INDEX IF NOT EXISTS failure_artifacts_last_seen ON failure_artifacts (last_seen)"
+
+# 元数据为首次出现时的记录；count / last_seen 随重复出现更新
+FailureRecord = namedtuple("FailureRecord", ["content_hash", "size", "first_seen", "last_seen", "count",
+                                             "stage", "source", "account", "status_code", "elapsed", "url"])
+_RECORD_COLUMNS = ", ".join(FailureRecord._fields)
+
+
+# ===== 2. 失败响应存储 =====
+class FailureStore:
+    """失败响应样本存储
+
+    Args:
+        store: cacheStore.CacheStore，样本保存在其数据库文件中
+        max_bytes: 样本（压缩后）总大小上限
+    """
+
+    def __init__(self, store, max_bytes=DEFAULT_MAX_BYTES):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(QUEUE_SIZE)
+        # 样本总大小的累计值，只在后台写入线程中读写；None 表示尚未从数据库读取
+        self._total_bytes = None
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = self.store.connect()
+        if not self._schema_ready:
+            with conn:
+                conn.execute(SCHEMA)
+                conn.execute(INDEX)
+            self._schema_ready = True
+        return conn
+
+    # ---------- 记录（请求路径上调用） ----------
+    def record(self, text, stage, source=None, username=None, status_code=None, elapsed=None, url=None):
+        """登记一份失败响应，立即返回内容哈希，写入在后台线程完成
+
+        Args:
+            text: 响应内容
+            stage: 失败阶段（如 "login"、"page"、"stream"）
+            source: 来源模块（METRIC_SOURCE）
+            username: 学号（只保存摘要）
+            status_code: HTTP 状态码
+            elapsed: 请求耗时（秒）
+            url: 请求地址
+        """
+        content_hash = cacheStore.hash_html(text)
+        item = (content_hash, text, time.time(), stage, source, cacheStore.account_key(username),
+                status_code, elapsed, url)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._drop(source)
+            return content_hash
+        metrics.inc("failure_artifacts", source=source)
+        self._ensure_writer()
+        return content_hash
+
+    def _drop(self, source):
+        """丢弃一份样本并计数（请求线程与后台写入线程都会调用）"""
+        with self._dropped_lock:
+            self.dropped += 1
+        metrics.inc("failure_artifacts_dropped", source=source)
+
+    def _ensure_writer(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="failure-store", daemon=True)
+                self._thread.start()
+
+    # ---------- 后台写入 ----------
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._write(*item)
+            except Exception:
+                # 写入失败不影响插件运行，样本丢弃；累计大小重新从数据库读取
+                self._total_bytes = None
+                self._drop(item[4])
+            finally:
+                self._queue.task_done()
+
+    def _write(self, content_hash, text, seen_at, stage, source, account, status_code, elapsed, url):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE failure_artifacts SET count = count + 1, last_seen = MAX(last_seen, ?) "
+                "WHERE content_hash = ?",
+                (seen_at, content_hash),
+            )
+            if cursor.rowcount:
+                return
+            total = self._total_bytes
+            if total is None:
+                total = self._sum_size(conn)
+            body = zlib.compress(text.encode("utf-8"), cacheStore.COMPRESS_LEVEL)
+            conn.execute(
+                f"INSERT INTO failure_artifacts ({_RECORD_COLUMNS}, body) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, len(body), seen_at, seen_at, 1, stage, source, account, status_code, elapsed, url,
+                 body),
+            )
+            total = self._evict(conn, total + len(body))
+        # 事务提交后才更新累计值，写入失败时保持不变
+        self._total_bytes = total
+
+    @staticmethod
+    def _sum_size(conn):
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM failure_artifacts").fetchone()
+        return total
+
+    def _evict(self, conn, total):
+        """总大小超过上限时删除最久未出现的样本（至少保留刚写入的一份），返回删除后的总大小
+
+        total 为本进程累计的总大小；超过上限时重新统计一次，计入其他进程写入或删除的样本。
+        """
+        if total <= self.max_bytes:
+            return total
+        total = self._sum_size(conn)
+        if total <= self.max_bytes:
+            return total
+        rows = conn.execute("SELECT content_hash, size FROM failure_artifacts ORDER BY last_seen").fetchall()
+        for content_hash, size in rows[:-1]:
+            conn.execute("DELETE FROM failure_artifacts WHERE content_hash = ?", (content_hash,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return total
+
+    def flush(self, timeout=None):
+        """等待已登记的样本写入完成
+
+        Returns:
+            bool: 是否在 timeout 内全部写入
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    # ---------- 查询 ----------
+    def list_failures(self, limit=None):
+        """FailureRecord 列表，按最后出现时间降序"""
+        sql = f"SELECT {_RECORD_COLUMNS} FROM failure_artifacts ORDER BY last_seen DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return [FailureRecord(*row) for row in self._connect().execute(sql)]
+
+    def get_failure(self, content_hash):
+        """样本内容，不存在时返回 None"""
+        row = self._connect().execute(
+            "SELECT body FROM failure_artifacts WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def export(self, content_hash, path):
+        """把样本写入 path（用浏览器查看），成功返回 True"""
+        text = self.get_failure(content_hash)
+        if text is None:
+            return False
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return True
+
+
+# ===== 3. 共享实例 =====
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(store):
+    """cacheStore.CacheStore 对应的共享 FailureStore"""
+    with _stores_lock:
+        failure_store = _stores.get(store.path)
+        if failure_store is None or failure_store.store is not store:
+            failure_store = _stores[store.path] = FailureStore(store)
+        return failure_store
+
+
+@atexit.register
+def _flush_all():
+    with _stores_lock:
+        stores = list(_stores.values())
+    for failure_store in stores:
+        failure_store.flush(FLUSH_TIMEOUT)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+合并获取模块
+
+fetch_all() 只登录一次，在同一个会话上并行请求成绩页面和课表页面并分别解析，
+总耗时约为较慢的一个请求而不是两者之和；缓存策略与 fetch_grades / fetch_course_schedule 一致，
+未过期的部分直接使用本地缓存，不发起请求。
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加项目根目录到 sys.path（确保能找到 core 模块）
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.log import init_logger
+
+import getCourseGrades
+import getCourseSchedule
+
+logger = init_logger('fetchAll')
+
+# ===== 1. 常量定义 =====
+# 获取类型 -> (模块, 是否需要更新, 读取缓存的解析结果, 下载函数, 解析函数, 保存解析结果)
+PARTS = {
+    "grades": (getCourseGrades, getCourseGrades.should_update_grades, getCourseGrades.load_parsed_grades,
+               getCourseGrades.download_grade_html, getCourseGrades.parse_grades,
+               getCourseGrades.save_parsed_grades),
+    "schedule": (getCourseSchedule, getCourseSchedule.should_update_schedule,
+                 getCourseSchedule.load_parsed_schedule, getCourseSchedule.download_schedule_html,
+                 getCourseSchedule.parse_schedule, getCourseSchedule.save_parsed_schedule),
+}
+# 登录使用的会话管理器；登录后的会话同时登记到各模块的会话管理器
+LOGIN_MODULE = getCourseGrades
+
+
+# ===== 2. 单项获取 =====
+def _load_cached(kind, username, force_update):
+    """按缓存策略读取本地解析结果，需要从网络获取时返回 None（DEV 模式下始终只读缓存）"""
+    module, should_update, load_parsed = PARTS[kind][:3]
+    if module.run_mode() == 'DEV' or (not force_update and not should_update(username)):
+        return load_parsed(username)
+    return None
+
+
+def _download_and_parse(kind, session, username):
+    """在已登录的会话上下载并解析一项数据
+
+    Returns:
+        tuple: (解析结果, 错误信息, 是否下载失败)；只有下载失败说明会话可能已失效
+    """
+    module, _, _, download, parse, save_parsed = PARTS[kind]
+    html = download(session, username=username)
+    if not html:
+        return None, "未获取到有效页面", True
+    try:
+        rows = parse(html)
+    except Exception as e:
+        logger.error(f"解析 {kind} 异常: {e}")
+        return None, f"解析失败: {e}", False
+    save_parsed(rows, username, html)
+    return rows, None, False
+
+
+def _invalidate_sessions(username):
+    """丢弃各模块会话管理器中该账号的会话"""
+    for kind in PARTS:
+        PARTS[kind][0].SESSION_MANAGER.invalidate(username)
+
+
+# ===== 3. 合并获取入口 =====
+def fetch_all(username, password, force_update=False, kinds=("grades", "schedule")):
+    """登录一次，同时获取成绩和课表
+
+    Args:
+        username: 学号
+        password: 密码
+        force_update: 是否强制从网络更新（忽略循环检测；DEV 模式下只读缓存，此参数无效）
+        kinds: 要获取的数据类型，可选 "grades"、"schedule"
+
+    Returns:
+        dict: {"username": 学号, "grades": [...] 或 None, "schedule": [...] 或 None, "errors": {类型: 错误信息}}
+    """
+    for kind in kinds:
+        if kind not in PARTS:
+            raise ValueError(f"未知的获取类型: {kind}")
+
+    result = {"username": username, "errors": {}}
+    pending = []
+    for kind in kinds:
+        result[kind] = _load_cached(kind, username, force_update)
+        if result[kind] is not None:
+            logger.info(f"{kind} 使用本地缓存")
+        elif LOGIN_MODULE.run_mode() == 'DEV':
+            result["errors"][kind] = "DEV 模式下未找到缓存"
+        else:
+            pending.append(kind)
+    if not pending:
+        return result
+
+    start = time.perf_counter()
+    session = LOGIN_MODULE.SESSION_MANAGER.get_session(username, password)
+    if not session:
+        for kind in pending:
+            result["errors"][kind] = "登录失败"
+        _invalidate_sessions(username)
+        return result
+    for kind in pending:
+        PARTS[kind][0].SESSION_MANAGER.adopt(username, session)
+
+    download_failed = False
+    with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+        futures = {kind: executor.submit(_download_and_parse, kind, session, username) for kind in pending}
+        for kind, future in futures.items():
+            try:
+                result[kind], error, failed = future.result()
+            except Exception as e:
+                logger.error(f"获取 {kind} 异常: {e}")
+                result[kind], error, failed = None, str(e), False
+            if error:
+                result["errors"][kind] = error
+            download_failed = download_failed or failed
+
+    if download_failed:
+        # 可能是会话在探测后失效，丢弃以便下次重新登录；解析失败与会话无关，保留会话
+        _invalidate_sessions(username)
+    logger.info(f"合并获取 {pending} 完成，用时 {time.perf_counter() - start:.2f} 秒，"
+                f"失败: {list(result['errors']) or '无'}")
+    return result
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+成绩、课表获取模块的公共流程
+
+getCourseGrades 与 getCourseSchedule 只在请求地址、缓存类型和日志文字上不同，
+登录结果判断、失败响应登记、更新间隔、旧版缓存导入和性能分析流程由本模块统一实现。
+
+各函数的 module 参数为 getCourseGrades 或 getCourseSchedule，
+调用时才读取其中的 logger、CACHE_STORE、METRIC_SOURCE、DATA_LABEL 等属性，运行中替换的属性同样生效。
+"""
+import os
+import time
+
+import failureStore
+import metrics
+
+
+# ===== 1. 登录结果 =====
+def check_login_response(module, text, username=None, status_code=None, elapsed=None):
+    """根据登录响应内容判断是否登录成功，未知失败时保存响应以便排查
+
+    username / status_code / elapsed 随失败响应一起记录（见 record_failure）
+    """
+    logger = module.logger
+    if "xsMain_new.htmlx" in text or "xsMain.htmlx" in text:
+        logger.info("登录成功")
+        return True
+    elif "用户名或密码错误" in text:
+        logger.error("用户名或密码错误")
+    elif "验证码" in text:
+        logger.warning("检测到验证码，脚本无法处理")
+    else:
+        logger.error("登录失败，未知原因")
+        record_failure(module, text, "login", module.LOGIN_URL, username, status_code, elapsed)
+    metrics.inc("login_failures", source=module.METRIC_SOURCE)
+    return False
+
+
+def record_failure(module, text, stage, url=None, username=None, status_code=None, elapsed=None):
+    """登记无法识别的响应以便排查：在后台写入缓存库，按内容去重、压缩保存并限制总大小
+
+    查看方式见 failureStore（list_failures / export）。
+    """
+    content_hash = failureStore.get_store(module.CACHE_STORE).record(
+        text, stage, module.METRIC_SOURCE, username, status_code, elapsed, url)
+    module.logger.debug(f"失败响应已登记: {content_hash[:12]}（stage={stage}）")
+
+
+# ===== 2. 更新间隔 =====
+def get_update_interval(module, loop, entry):
+    """本次缓存之后的更新间隔（秒）
+
+    自适应模式下由页面连续未变化的次数决定：刚发生变化时为 min_time，之后逐次退避到 max_time。
+    """
+    interval = loop.next_interval(entry.unchanged_count, seed=entry.fetched_at)
+    if loop.adaptive:
+        module.logger.info(f"自适应间隔: 页面已连续 {entry.unchanged_count} 次未变化，本次间隔 {interval:.0f} 秒")
+    return interval
+
+
+def next_update_time(module, username=None):
+    """下次需要从网络获取的时间戳；循环检测未启用或没有缓存时返回当前时间"""
+    loop = module.get_loop_config()
+    entry = module.get_cache_entry(username) if loop.enabled else None
+    if entry is None:
+        return time.time()
+    return entry.fetched_at + get_update_interval(module, loop, entry)
+
+
+# ===== 3. 旧版缓存导入 =====
+def import_legacy_cache(module, username):
+    """把旧版缓存文件（module.LEGACY_CACHE_FILES）导入缓存库，导入后文件改名为 *.migrated"""
+    html_file, timestamp_file = (module.APPDATA_DIR / name for name in module.LEGACY_CACHE_FILES)
+    try:
+        with open(html_file, "r", encoding="utf-8") as f:
+            html = f.read()
+    except FileNotFoundError:
+        return False
+    try:
+        with open(timestamp_file, "r", encoding="utf-8") as f:
+            fetched_at = float(f.read().strip())
+    except (OSError, ValueError):
+        fetched_at = 0.0  # 没有时间戳时视为已过期
+
+    store = module.CACHE_STORE
+    imported = store.import_legacy(module.CACHE_KIND, username, html, fetched_at)
+    for path in (html_file, timestamp_file):
+        try:
+            os.replace(path, path.with_name(path.name + ".migrated"))
+        except OSError:
+            pass
+    if imported:
+        module.logger.info(f"已把旧版{module.DATA_LABEL}缓存 {html_file} 导入 {store.path}")
+    return imported
+
+
+# ===== 4. 性能分析模式 =====
+def fetch_profiled(module, username, password, force_update, print_result,
+                   should_update, get_html, parse, save_parsed, print_rows):
+    """按阶段（login / fetch / parse / save / print）采集 cProfile 与 tracemalloc 数据的获取流程
+
+    总是重新解析页面（即使有缓存的解析结果），报告写入 AppData 目录下的 profiles/（见 profiler 模块）。
+    should_update / get_html / parse / save_parsed / print_rows 为 module 中对应的函数。
+
+    Returns:
+        tuple: (解析结果或 None, 报告路径)
+    """
+    rows = None
+    # cProfile / tracemalloc 等只在性能分析时才导入，不增加插件的导入耗时
+    import profiler
+    with profiler.profile(module.METRIC_SOURCE, module.APPDATA_DIR) as prof:
+        # 与普通获取流程相同：DEV 模式和缓存未过期时不登录
+        need_network = module.run_mode() != 'DEV' and (force_update or should_update(username))
+        session = None
+        if need_network:
+            with prof.stage("login"):
+                session = module.SESSION_MANAGER.get_session(username, password)
+
+        html = None
+        if session or not need_network:
+            with prof.stage("fetch"):
+                html = get_html(session, force_update, username)
+
+        if html:
+            with prof.stage("parse"):
+                rows = parse(html)
+            with prof.stage("save"):
+                save_parsed(rows, username, html)
+            if print_result:
+                with prof.stage("print"):
+                    print_rows(rows)
+    return rows, prof.report_path
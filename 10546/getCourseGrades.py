@@ -1,14 +1,14 @@
 # -*- coding: utf-8 -*-
-import requests
 import base64
-from bs4 import BeautifulSoup
-import socket
-import configparser
+import logging
 import os
+import tempfile
 import json
 import time
 import sys
+from datetime import date, datetime
 from pathlib import Path
+from urllib.parse import urlsplit
 
 # 添加项目根目录到 sys.path（确保能找到 core 模块）
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
@@ -17,7 +17,19 @@ if str(BASE_DIR) not in sys.path:
 
 # 导入统一日志模块（AppData 目录）
 from core.log import init_logger, get_config_path, get_log_file_path
-from core.config_manager import load_config
+from sessionManager import SessionManager
+from deltaTracker import DeltaTracker, GRADE_KEY_FIELDS
+import parserBackend
+import streamParser
+import metrics
+import pluginConfig
+import records
+import cacheStore
+import fetchCommon
+import gradeHistory
+
+# 本模块对象，传给 fetchCommon 的公共流程
+_MODULE = sys.modules[__name__]
 
 # 初始化日志（如果失败直接崩溃）
 logger = init_logger('getCourseGrades')
@@ -31,233 +43,416 @@ APPDATA_DIR = get_log_file_path('getCourseGrades').parent
 # ===== 2. 读取运行模式 =====
 def get_run_mode():
     try:
-        config = load_config()
-        mode = config.get('run_model', 'model', fallback='BUILD').strip().upper()
-        if mode not in ('DEV', 'BUILD'):
-            logger.warning(f"未知运行模式 '{mode}'，默认使用 BUILD")
-            mode = 'BUILD'
-        return mode
+        return pluginConfig.get_config(logger).run_mode
     except Exception as e:
         logger.warning(f"读取 run_model 失败，使用默认模式 BUILD: {e}")
         return 'BUILD'
 
-RUN_MODE = get_run_mode()
-logger.info(f"当前运行模式: {RUN_MODE}")
+# 赋值后覆盖配置文件中的运行模式
+RUN_MODE = None
+
+def run_mode():
+    """当前运行模式（'DEV' 或 'BUILD'），配置文件修改后无需重启即可生效"""
+    if RUN_MODE is not None:
+        return RUN_MODE
+    return get_run_mode()
 
 # ===== 3. 常量定义 =====
 BASE_URL = "https://hysfjw.hynu.edu.cn/jsxsd/"
 LOGIN_URL = BASE_URL + "xk/LoginToXk"
 GRADE_URL = BASE_URL + "kscj/cjcx_list"
+# 运行指标中区分成绩/课表的标签值
+METRIC_SOURCE = "grades"
+# 日志中的数据名称
+DATA_LABEL = "成绩"
+
+def create_session():
+    """创建未登录的会话（强制 IPv4，并设置通用请求头）
+
+    requests 在首次创建会话时才导入；所有会话共用 ipv4Adapter 的适配器与 DNS 缓存。
+    """
+    import requests
+    import ipv4Adapter
+    session = requests.Session()
+    adapter = ipv4Adapter.get_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Referer": BASE_URL
+    })
+    return session
 
-class IPv4Adapter(requests.adapters.HTTPAdapter):
-    def init_poolmanager(self, *args, **kwargs):
-        import urllib3.util.connection as urllib3_conn
-        urllib3_conn.allowed_gai_family = lambda: socket.AF_INET
-        return super().init_poolmanager(*args, **kwargs)
+def prewarm():
+    """预先解析教务服务器地址并建立 TLS 连接，供随后的登录/请求直接使用（不发送请求）"""
+    import ipv4Adapter
+    ok = ipv4Adapter.prewarm(BASE_URL)
+    logger.info(f"预热到 {BASE_URL} 的连接{'成功' if ok else '失败'}")
+    return ok
 
 # ===== 4. 登录函数 =====
 def login(username, password):
-    hostname = "hysfjw.hynu.edu.cn"
-    try:
-        ipv4_addr = socket.gethostbyname(hostname)
-        logger.info(f"目标服务器 {hostname} 解析到 IPv4 地址: {ipv4_addr}")
-    except Exception as e:
-        logger.warning(f"解析 {hostname} IPv4 失败: {e}")
-
     b64_user = base64.b64encode(username.encode("utf-8")).decode("utf-8")
     b64_pwd = base64.b64encode(password.encode("utf-8")).decode("utf-8")
     encoded = f"{b64_user}%%%{b64_pwd}"
     logger.debug(f"生成的 encoded: {encoded}")
 
-    session = requests.Session()
-    session.mount('http://', IPv4Adapter())
-    session.mount('https://', IPv4Adapter())
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Referer": BASE_URL
-    })
+    import ipv4Adapter
+    session = create_session()
+    hostname = urlsplit(LOGIN_URL).hostname
+    try:
+        # 解析结果缓存在共享的 DnsCache 中，随后的登录请求直接使用
+        ipv4_addrs = ipv4Adapter.DNS_CACHE.resolve(hostname)
+        logger.info(f"目标服务器 {hostname} 解析到 IPv4 地址: {', '.join(ipv4_addrs)}")
+    except Exception as e:
+        logger.warning(f"解析 {hostname} IPv4 失败: {e}")
 
+    start = time.perf_counter()
     try:
-        response = session.post(LOGIN_URL, data={"encoded": encoded}, timeout=10)
+        with metrics.timed("login_post", source=METRIC_SOURCE):
+            response = session.post(LOGIN_URL, data={"encoded": encoded}, timeout=10)
         logger.debug(f"登录响应状态码: {response.status_code}")
     except Exception as e:
         logger.error(f"登录请求异常: {e}")
+        metrics.inc("login_failures", source=METRIC_SOURCE)
         return None
 
-    if "xsMain_new.htmlx" in response.text or "xsMain.htmlx" in response.text:
-        logger.info("登录成功")
+    if check_login_response(response.text, username, response.status_code, time.perf_counter() - start):
         return session
-    elif "用户名或密码错误" in response.text:
-        logger.error("用户名或密码错误")
-    elif "验证码" in response.text:
-        logger.warning("检测到验证码，脚本无法处理")
-    else:
-        logger.error("登录失败，未知原因")
-        failed_file = APPDATA_DIR / "login_failed_grade.html"
-        with open(failed_file, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.debug(f"登录失败响应已保存到: {failed_file}")
     return None
 
+def check_login_response(text, username=None, status_code=None, elapsed=None):
+    """根据登录响应内容判断是否登录成功，未知失败时保存响应以便排查（见 fetchCommon）"""
+    return fetchCommon.check_login_response(_MODULE, text, username, status_code, elapsed)
+
+def record_failure(text, stage, url=None, username=None, status_code=None, elapsed=None):
+    """登记无法识别的响应以便排查（见 fetchCommon、failureStore）"""
+    fetchCommon.record_failure(_MODULE, text, stage, url, username, status_code, elapsed)
+
+# 会话复用：Cookie 保存在 AppData 目录，仅在会话过期时重新登录
+SESSION_MANAGER = SessionManager(login, create_session, APPDATA_DIR, BASE_URL, logger)
+
 # ===== 5. 循环检测配置读取 =====
 def get_loop_config():
-    """读取循环检测配置"""
+    """读取循环检测配置（pluginConfig.LoopConfig，可按 enabled, interval = ... 解包）"""
     try:
-        config = load_config()
-        enabled = config.getboolean('loop_getCourseGrades', 'enabled', fallback=False)
-        interval = config.getint('loop_getCourseGrades', 'time', fallback=3600)
-        logger.info(f"循环检测配置: enabled={enabled}, interval={interval}秒")
-        return enabled, interval
+        loop = pluginConfig.get_config(logger).loop('getCourseGrades')
+        logger.info(f"循环检测配置: {loop}")
+        return loop
     except Exception as e:
         logger.warning(f"读取循环检测配置失败: {e}，使用默认值")
-        return False, 3600
+        return pluginConfig.LoopConfig()
 
 # ===== 6. 检查是否需要更新 =====
-def should_update_grades():
-    """检查是否需要从网络更新成绩"""
-    enabled, interval = get_loop_config()
+def should_update_grades(username=None):
+    """检查是否需要从网络更新成绩
+
+    Args:
+        username: 学号（缓存按账号保存）
+    """
+    loop = get_loop_config()
     
     # 如果循环检测未启用，直接返回True（总是更新）
-    if not enabled:
+    if not loop.enabled:
         logger.info("循环检测未启用，将从网络获取最新成绩")
         return True
     
-    # 检查本地缓存文件是否存在（AppData 目录）
-    cache_file = APPDATA_DIR / "grade.html"
-    timestamp_file = APPDATA_DIR / "grade_timestamp.txt"
-    
-    if not cache_file.exists():
+    # 检查本地缓存（AppData 目录下的缓存库，只读取获取时间）
+    entry = get_cache_entry(username)
+    if entry is None:
         logger.info("本地成绩缓存不存在，需要从网络获取")
         return True
-    
-    # 检查时间戳文件
-    if not timestamp_file.exists():
-        logger.info("时间戳文件不存在，需要从网络获取")
+
+    interval = get_update_interval(loop, entry)
+    elapsed = time.time() - entry.fetched_at
+    logger.info(f"距离上次更新已过 {elapsed:.0f} 秒，更新间隔设置为 {interval:.0f} 秒")
+
+    if elapsed >= interval:
+        logger.info("超过更新间隔，需要从网络获取")
         return True
-    
+    else:
+        logger.info(f"未超过更新间隔，还需 {interval - elapsed:.0f} 秒，使用本地缓存")
+        return False
+
+def get_update_interval(loop, entry):
+    """本次缓存之后的更新间隔（秒），自适应模式下随页面连续未变化的次数退避（见 fetchCommon）"""
+    return fetchCommon.get_update_interval(_MODULE, loop, entry)
+
+def next_update_time(username=None):
+    """下次需要从网络获取成绩的时间戳；循环检测未启用或没有缓存时返回当前时间"""
+    return fetchCommon.next_update_time(_MODULE, username)
+
+# ===== 7. 读写缓存 =====
+# 页面、获取时间和解析结果保存在 AppData 目录下的缓存库中（cacheStore），按账号区分；
+# 旧版的 grade.html / grade_timestamp.txt 在首次读取时导入
+CACHE_KIND = "grade"
+CACHE_STORE = cacheStore.get_store(APPDATA_DIR)
+LEGACY_CACHE_FILES = ("grade.html", "grade_timestamp.txt")
+
+def get_cache_entry(username=None, with_html=False, with_rows=False):
+    """读取账号的成绩缓存（cacheStore.CacheEntry），不存在或读取失败返回 None"""
     try:
-        with open(timestamp_file, "r", encoding="utf-8") as f:
-            last_update = float(f.read().strip())
-        
-        current_time = time.time()
-        elapsed = current_time - last_update
-        
-        logger.info(f"距离上次更新已过 {elapsed:.0f} 秒，更新间隔设置为 {interval} 秒")
-        
-        if elapsed >= interval:
-            logger.info("超过更新间隔，需要从网络获取")
-            return True
-        else:
-            logger.info(f"未超过更新间隔，还需 {interval - elapsed:.0f} 秒，使用本地缓存")
-            return False
+        with metrics.timed("cache_read", source=METRIC_SOURCE):
+            entry = CACHE_STORE.get(CACHE_KIND, username, with_html, with_rows)
+            if entry is None and _import_legacy_cache(username):
+                entry = CACHE_STORE.get(CACHE_KIND, username, with_html, with_rows)
     except Exception as e:
-        logger.warning(f"读取时间戳失败: {e}，需要从网络获取")
-        return True
+        logger.warning(f"读取成绩缓存失败: {e}")
+        return None
+    return entry
+
+def _import_legacy_cache(username):
+    """把旧版缓存文件导入缓存库，导入后文件改名为 *.migrated"""
+    return fetchCommon.import_legacy_cache(_MODULE, username)
 
-# ===== 7. 更新时间戳 =====
-def update_timestamp():
-    """更新成绩获取时间戳（AppData 目录）"""
-    timestamp_file = APPDATA_DIR / "grade_timestamp.txt"
+def save_grade_cache(html, username=None, grades=None):
+    """在一个事务中写入成绩页面、获取时间（及解析结果），成功返回 True"""
     try:
-        with open(timestamp_file, "w", encoding="utf-8") as f:
-            f.write(str(time.time()))
-        logger.info(f"时间戳已更新: {timestamp_file}")
+        with metrics.timed("cache_write", source=METRIC_SOURCE):
+            CACHE_STORE.put(CACHE_KIND, username, html, grades)
     except Exception as e:
-        logger.error(f"更新时间戳失败: {e}")
+        logger.error(f"写入成绩缓存失败: {e}")
+        return False
+    logger.debug(f"成绩数据已缓存到: {CACHE_STORE.path}")
+    return True
 
 # ===== 8. 获取成绩 HTML =====
-def get_grade_html(session, force_update=False):
-    """获取成绩HTML，支持循环检测。所有文件存储在 AppData 目录。"""
-    cache_file = APPDATA_DIR / "grade.html"
-    
-    logger.info(f"get_grade_html 被调用, force_update={force_update}, RUN_MODE={RUN_MODE}")
+def get_grade_html(session, force_update=False, username=None):
+    """获取成绩HTML，支持循环检测。缓存存储在 AppData 目录。"""
+    logger.info(f"get_grade_html 被调用, force_update={force_update}, RUN_MODE={run_mode()}")
 
     if force_update:
         logger.info("强制更新模式：将忽略缓存并尝试从网络获取最新成绩")
     else:
         # 1. DEV 模式下的缓存处理
-        if RUN_MODE == 'DEV':
-            logger.info(f"[DEV 模式] 从 AppData 文件读取成绩数据: {cache_file}")
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    return f.read()
-            except FileNotFoundError:
-                logger.error(f"未找到 {cache_file}，请先在 BUILD 模式运行生成")
-                return None
-            except Exception as e:
-                logger.error(f"读取 {cache_file} 失败: {e}")
+        if run_mode() == 'DEV':
+            logger.info(f"[DEV 模式] 从 AppData 缓存读取成绩数据: {CACHE_STORE.path}")
+            entry = get_cache_entry(username, with_html=True)
+            if entry is None:
+                logger.error("未找到成绩缓存，请先在 BUILD 模式运行生成")
                 return None
+            return entry.html
         
         # 2. 检查是否需要更新（基于时间间隔）
-        if not should_update_grades():
+        if not should_update_grades(username):
             logger.info("未达到更新间隔，将使用本地缓存的成绩数据")
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    return f.read()
-            except Exception as e:
-                logger.warning(f"读取本地缓存失败: {e}，将回退到网络获取")
+            html = read_grade_cache(username)
+            if html is not None:
+                return html
     
     # 3. 从网络获取
-    if RUN_MODE == 'DEV' and not force_update:
+    if run_mode() == 'DEV' and not force_update:
         # 兜底逻辑：DEV 模式下如果没有 force_update 且没读取到缓存，不应尝试网络请求（除非明确要求）
         return None
     
-    # 从网络获取
+    return download_grade_html(session, username=username)
+
+def download_grade_html(session, save_cache=True, username=None):
+    """从网络获取成绩HTML
+
+    Args:
+        session: 已登录的会话
+        save_cache: 成功后是否写入 AppData 缓存（连同获取时间）
+        username: 学号，缓存按账号保存
+    """
     logger.info("开始从网络请求成绩页面")
     headers = {"Referer": BASE_URL + "framework/xsMain.jsp"}
+    start = time.perf_counter()
     try:
-        response = session.get(GRADE_URL, headers=headers, timeout=10)
+        with metrics.timed("page_get", source=METRIC_SOURCE):
+            response = session.get(GRADE_URL, headers=headers, timeout=10)
+        metrics.inc("bytes_downloaded", len(response.content), source=METRIC_SOURCE)
         logger.debug(f"成绩请求状态码: {response.status_code}")
     except Exception as e:
         logger.error(f"成绩请求异常: {e}")
         return None
 
-    if "N122101QueryResult" in response.text or "kscj" in response.text:
+    return handle_grade_response(response.text, save_cache, username, response.status_code, time.perf_counter() - start)
+
+def handle_grade_response(text, save_cache=True, username=None, status_code=None, elapsed=None):
+    """校验成绩页面内容，有效时按需写入缓存并返回，无效时保存响应以便排查并返回 None"""
+    if "N122101QueryResult" in text or "kscj" in text:
         logger.info("成功获取成绩数据")
-        with open(cache_file, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.debug(f"成绩数据已缓存到: {cache_file}")
-        update_timestamp()  # 更新时间戳
-        return response.text
+        if save_cache:
+            save_grade_cache(text, username)
+        return text
     else:
         logger.error("未识别到有效成绩内容")
-        failed_file = APPDATA_DIR / "grade_failed.html"
-        with open(failed_file, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.debug(f"失败响应已保存到: {failed_file}")
+        record_failure(text, "page", GRADE_URL, username, status_code, elapsed)
         return None
 
-# ===== 9. 解析成绩 =====
-def parse_grades(html):
-    logger.info("开始解析成绩表格")
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table", id="dataList")
-    if not table:
-        logger.error("未找到 <table id='dataList'>")
-        return []
+# ===== 8.1 流式获取 =====
+def stream_grades(session, save_cache=True, chunk_size=streamParser.DEFAULT_CHUNK_SIZE, username=None):
+    """流式获取成绩：边下载边解析并逐条产出，目标表格闭合后立即停止下载
+
+    Args:
+        session: 已登录的会话
+        save_cache: 是否把下载内容（截至表格结束）写入 AppData 缓存
+        chunk_size: 每次读取的字节数
+        username: 学号，缓存按账号保存
+    """
+    logger.info("开始流式请求成绩页面")
+    headers = {"Referer": BASE_URL + "framework/xsMain.jsp"}
+    start = time.perf_counter()
+    try:
+        response = session.get(GRADE_URL, headers=headers, timeout=10, stream=True)
+        logger.debug(f"成绩请求状态码: {response.status_code}")
+    except Exception as e:
+        logger.error(f"成绩请求异常: {e}")
+        return
 
-    rows = table.find_all("tr")[1:]  # 跳过表头
+    # 每次下载使用独立的临时文件，多个进程同时获取时互不干扰
+    fd, tmp_file = tempfile.mkstemp(prefix="grade.", suffix=".part", dir=APPDATA_DIR)
+    os.close(fd)
+    download = streamParser.StreamDownload(response, streamParser.GradeStreamParser(), tmp_file,
+                                           ("N122101QueryResult", "kscj"), chunk_size)
+    # 产出的条目同时作为解析结果写入缓存（调用方不应修改）
     grades = []
+    try:
+        for cols in download:
+            grade = records.build_grade(cols)
+            if grade:
+                grades.append(grade)
+                yield grade
+    except BaseException:
+        # 调用方提前结束迭代或下载出错
+        os.remove(tmp_file)
+        raise
+
+    # 流式下载与解析交替进行，耗时记为一个阶段（包含调用方消费条目的时间）
+    metrics.observe("page_stream", time.perf_counter() - start, source=METRIC_SOURCE)
+    metrics.inc("bytes_downloaded", download.bytes_read, source=METRIC_SOURCE)
+    stopped = "，表格结束后提前停止下载" if download.completed else ""
+    logger.info(f"流式解析 {len(grades)} 门课程成绩，已下载 {download.bytes_read} 字节{stopped}")
+
+    if download.has_marker("N122101QueryResult") or download.has_marker("kscj"):
+        if save_cache:
+            with open(tmp_file, "r", encoding="utf-8") as f:
+                saved = save_grade_cache(f.read(), username, grades)
+            if saved:
+                record_grade_history(grades, username)
+        os.remove(tmp_file)
+    else:
+        logger.error("未识别到有效成绩内容")
+        with open(tmp_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        os.remove(tmp_file)
+        record_failure(text, "stream", GRADE_URL, username, response.status_code, time.perf_counter() - start)
 
-    for row in rows:
-        cols = row.find_all("td")
-        if len(cols) < 5:
-            continue
+# ===== 9. 解析成绩 =====
+def parse_grades(html, backend=None, compact=False):
+    """解析成绩表格
 
-        course = {
-            "课程编号": cols[2].get_text(strip=True),
-            "课程名称": cols[3].get_text(strip=True),
-            "成绩": cols[4].get_text(strip=True),
-            "学期": cols[1].get_text(strip=True),
-            "课程属性": cols[5].get_text(strip=True) if len(cols) > 5 else "",
-            "学分": cols[6].get_text(strip=True) if len(cols) > 6 else "",  # 添加学分字段
-        }
-        grades.append(course)
+    Args:
+        html: 成绩页面 HTML
+        backend: 解析后端（"html.parser" 或 "lxml"），默认使用 parserBackend.DEFAULT_BACKEND
+        compact: 返回 records.GradeRecord 列表而不是 dict 列表（可按原字段名访问，内存占用更小）
+    """
+    resolved = parserBackend.resolve_backend(backend)
+    logger.info(f"开始解析成绩表格（解析后端: {resolved}）")
+    if backend and resolved != backend:
+        logger.warning(f"解析后端 {backend} 不可用，已回退到 {resolved}")
+
+    with metrics.timed("parse", source=METRIC_SOURCE):
+        rows = parserBackend.extract_grade_rows(html, resolved)
+    if rows is None:
+        logger.error("未找到 <table id='dataList'>")
+        return []
 
+    grades = records.grades_from_rows(rows, compact)
     logger.info(f"成功解析 {len(grades)} 门课程成绩")
     # >>>>>>>>>>>>>>>>>> 关键改进：DEBUG 输出解析结果 <<<<<<<<<<<<<<<<<<
-    if grades:
-        logger.debug("【成绩解析结果】\n" + json.dumps(grades, ensure_ascii=False, indent=2))
+    if grades and logger.isEnabledFor(logging.DEBUG):
+        dump = records.to_dicts(grades) if compact else grades
+        logger.debug("【成绩解析结果】\n" + json.dumps(dump, ensure_ascii=False, indent=2))
+    return grades
+
+# ===== 9.1 解析结果缓存 =====
+# 解析结果与页面一起保存在缓存库中；内存中每个账号保留最近一份，页面内容哈希相同时无需再次解析。
+# 每次以一个元组整体替换，多线程同时读写时不会读到哈希与解析结果不对应的状态
+_parsed_cache = {}  # 学号 -> (页面内容哈希, 解析结果)
+
+def save_parsed_grades(grades, username=None, html=None):
+    """保存成绩解析结果（内存 + 缓存库）
+
+    Args:
+        grades: 解析结果
+        username: 学号
+        html: 解析所用的页面；缓存库中的页面已被其他进程更新时不写入。None 表示当前缓存的页面
+    """
+    try:
+        entry = CACHE_STORE.get(CACHE_KIND, username)
+        if html is not None:
+            content_hash = cacheStore.hash_html(html)
+        elif entry is None:
+            logger.warning("成绩缓存不存在，不保存解析结果")
+            return
+        else:
+            content_hash = entry.content_hash
+
+        _parsed_cache[username] = (content_hash, grades)
+        with metrics.timed("cache_write", source=METRIC_SOURCE):
+            saved = CACHE_STORE.put_rows(CACHE_KIND, username, content_hash, grades)
+        if saved:
+            logger.debug(f"成绩解析结果已缓存到: {CACHE_STORE.path}")
+    except Exception as e:
+        logger.warning(f"保存成绩解析结果失败: {e}")
+        return
+
+    if saved:
+        # 历史版本的时间为页面的获取时间（重新解析较早缓存的页面时不是当前时间）
+        record_grade_history(grades, username, entry.fetched_at if entry is not None else None)
+
+def get_grade_history():
+    """成绩历史归档（gradeHistory.GradeHistory），可按时间查询成绩状态与变化记录"""
+    return gradeHistory.get_history(CACHE_STORE)
+
+def record_grade_history(grades, username=None, recorded_at=None):
+    """把成绩追加到历史归档（与上一版本相同时不写入），返回新版本号
+
+    recorded_at: 成绩页面的获取时间（时间戳），默认当前时间
+    """
+    try:
+        with metrics.timed("history_write", source=METRIC_SOURCE):
+            version = get_grade_history().record(username, grades, recorded_at)
+    except Exception as e:
+        logger.warning(f"记录成绩历史失败: {e}")
+        return None
+    if version is not None:
+        logger.info(f"成绩有变化，已记录为历史版本 {version}")
+    return version
+
+def load_parsed_grades(username=None):
+    """读取本地缓存的成绩解析结果
+
+    依次尝试内存、缓存库中保存的解析结果，都未命中时才解析缓存的页面。
+    返回的列表与缓存共享，调用方不应修改。
+    """
+    entry = get_cache_entry(username)
+    if entry is None:
+        logger.error("未找到成绩缓存")
+        return None
+
+    cached = _parsed_cache.get(username)
+    if cached is not None and cached[0] == entry.content_hash:
+        metrics.inc("cache_hits", cache="parsed_memory", source=METRIC_SOURCE)
+        logger.info("命中内存中的成绩解析结果缓存")
+        return cached[1]
+
+    entry = get_cache_entry(username, with_rows=True)
+    if entry is not None and entry.rows is not None:
+        metrics.inc("cache_hits", cache="parsed_store", source=METRIC_SOURCE)
+        logger.info(f"命中成绩解析结果缓存: {CACHE_STORE.path}")
+        _parsed_cache[username] = (entry.content_hash, entry.rows)
+        return entry.rows
+
+    metrics.inc("cache_misses", cache="parsed", source=METRIC_SOURCE)
+    entry = get_cache_entry(username, with_html=True)
+    if entry is None:
+        logger.error("未找到成绩缓存")
+        return None
+    grades = parse_grades(entry.html)
+    save_parsed_grades(grades, username, entry.html)
     return grades
 
 # ===== 10. 打印成绩 =====
@@ -282,30 +477,327 @@ def fetch_grades(username, password, force_update=False):
         password: 密码
         force_update: 是否强制从网络更新（忽略循环检测）
     """
-    if RUN_MODE == 'DEV':
-        html = get_grade_html(None, force_update)
+    if run_mode() == 'DEV':
+        if not force_update:
+            logger.info("[DEV 模式] 使用 AppData 中缓存的成绩数据")
+            return load_parsed_grades(username)
+        html = get_grade_html(None, force_update, username)
         return parse_grades(html) if html else None
 
-    session = login(username, password)
+    # 缓存未过期时直接返回解析结果，不进行登录等任何网络请求
+    if not force_update and not should_update_grades(username):
+        grades = load_parsed_grades(username)
+        if grades is not None:
+            logger.info("未达到更新间隔，使用本地缓存的成绩数据")
+            return grades
+        logger.warning("本地缓存不可用，将回退到网络获取")
+
+    html = _login_and_download(username, password)
+    if not html:
+        return None
+
+    grades = parse_grades(html)
+    save_parsed_grades(grades, username, html)
+    return grades
+
+def _login_and_download(username, password):
+    """获取会话并从网络下载成绩页面"""
+    session = SESSION_MANAGER.get_session(username, password)
     if not session:
         return None
 
-    html = get_grade_html(session, force_update)
-    return parse_grades(html) if html else None
+    html = download_grade_html(session, username=username)
+    if not html:
+        # 可能是会话在探测后失效，丢弃以便下次重新登录
+        SESSION_MANAGER.invalidate(username)
+    return html
+
+# ===== 11.1 增量模式 =====
+GRADE_DELTA_TRACKER = DeltaTracker(CACHE_STORE, "grade_delta", GRADE_KEY_FIELDS, logger)
+
+def fetch_grade_html(username, password, force_update=False):
+    """按缓存策略获取成绩HTML：未达到更新间隔时读取本地缓存，否则从网络获取"""
+    if run_mode() == 'DEV':
+        return get_grade_html(None, force_update, username)
+
+    if not force_update and not should_update_grades(username):
+        html = read_grade_cache(username)
+        if html is not None:
+            return html
+
+    return _login_and_download(username, password)
+
+def read_grade_cache(username=None):
+    """读取 AppData 中缓存的成绩HTML，不存在或读取失败返回 None"""
+    entry = get_cache_entry(username, with_html=True)
+    if entry is None:
+        metrics.inc("cache_misses", cache="html", source=METRIC_SOURCE)
+        logger.warning("本地成绩缓存不可用，将回退到网络获取")
+        return None
+    metrics.inc("cache_hits", cache="html", source=METRIC_SOURCE)
+    return entry.html
+
+def fetch_grades_delta(username, password, force_update=False):
+    """获取成绩增量：只返回与上次获取相比新增、变化、删除的条目
+
+    页面内容哈希与该账号上次获取的相同时不进行解析。每个账号首次调用时全部条目视为新增。
+
+    Returns:
+        dict: {"added": [...], "changed": [{"old": ..., "new": ...}], "removed": [...]}，获取失败返回 None
+    """
+    html = fetch_grade_html(username, password, force_update)
+    if not html:
+        return None
+
+    def parse_and_save(page):
+        # 与 fetch_grades 相同：保存解析结果并记录成绩历史
+        grades = parse_grades(page)
+        save_parsed_grades(grades, username, page)
+        return grades
+
+    return GRADE_DELTA_TRACKER.update(html, parse_and_save, username)
+
+# ===== 11.2 流式模式 =====
+def fetch_grades_stream(username, password, force_update=False):
+    """流式获取成绩，逐条产出；缓存未过期时直接产出本地缓存的解析结果
+
+    与 fetch_grades 不同，获取失败时不返回 None，而是不产出任何条目。
+    """
+    if run_mode() == 'DEV':
+        yield from load_parsed_grades(username) or []
+        return
+
+    if not force_update and not should_update_grades(username):
+        grades = load_parsed_grades(username)
+        if grades is not None:
+            yield from grades
+            return
+
+    session = SESSION_MANAGER.get_session(username, password)
+    if not session:
+        return
+    yield from stream_grades(session, username=username)
+
+# ===== 11.3 按学期分区模式 =====
+# 每个学期的成绩单独缓存（缓存库中的数据类型为 grade_term:<学期>）。已结束的学期视为不再变化：
+# 每当又有学期结束时请求一次全部学期的页面并按学期拆分保存，其余时候只请求仍可能变化的最近几个学期（kksj 参数），
+# 每次请求的页面和解析量只与这几个学期的成绩数成正比
+TERM_CACHE_PREFIX = "grade_term:"
+# 全部学期页面的获取记录（页面本身也保存在这里，DEV 模式下可用）
+TERM_INDEX_KIND = "grade_terms"
+# 仍可能变化的最近学期数：当前学期及其上一学期（上一学期的成绩通常在新学期开始后才陆续录入）
+OPEN_TERM_COUNT = 2
+# 内存中的学期分区解析结果：(账号, 学期) -> (获取时间, 成绩列表)
+_term_rows_cache = {}
+
+def term_of(day=None):
+    """日期所在的学期（如 "2023-2024-1"）：8 月至次年 1 月为第一学期，2 月至 7 月为第二学期"""
+    day = day or date.today()
+    if day.month >= 8:
+        return f"{day.year}-{day.year + 1}-1"
+    if day.month >= 2:
+        return f"{day.year - 1}-{day.year}-2"
+    return f"{day.year - 1}-{day.year}-1"
+
+def previous_term(term):
+    start, end, half = term.split("-")
+    if half == "2":
+        return f"{start}-{end}-1"
+    return f"{int(start) - 1}-{start}-2"
+
+def _term_start(term):
+    """学期开始时间戳（与 term_of 的划分一致）"""
+    start, end, half = term.split("-")
+    day = date(int(start), 8, 1) if half == "1" else date(int(end), 2, 1)
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+def open_terms(day=None, count=OPEN_TERM_COUNT):
+    """仍可能变化的学期（从新到旧）"""
+    terms = [term_of(day)]
+    while len(terms) < count:
+        terms.append(previous_term(terms[-1]))
+    return terms
+
+def _needs_full_fetch(username, terms):
+    """最近一次获取全部学期页面是否早于最近一个学期结束（或从未获取）"""
+    entry = CACHE_STORE.get(TERM_INDEX_KIND, username)
+    # 最近结束的学期在 terms[0] 开始时变为不再变化
+    return entry is None or entry.fetched_at < _term_start(terms[0])
+
+def _split_by_term(grades):
+    """成绩列表 -> {学期: 成绩列表}（保持原有顺序）"""
+    by_term = {}
+    for grade in grades:
+        by_term.setdefault(grade["学期"], []).append(grade)
+    return by_term
+
+def _due_terms(username, terms):
+    """terms 中达到更新间隔（或尚无分区）的学期；循环检测未启用时为全部学期"""
+    loop = get_loop_config()
+    if not loop.enabled:
+        return list(terms)
+    due = []
+    for term in terms:
+        entry = CACHE_STORE.get(TERM_CACHE_PREFIX + term, username)
+        if entry is None or time.time() - entry.fetched_at >= get_update_interval(loop, entry):
+            due.append(term)
+    return due
+
+def should_update_terms(username=None, terms=None):
+    """按学期分区模式下是否需要从网络更新（任一仍可能变化的学期达到更新间隔即更新）"""
+    terms = terms or open_terms()
+    if _needs_full_fetch(username, terms) or _due_terms(username, terms):
+        return True
+    logger.info(f"学期 {', '.join(terms)} 均未达到更新间隔，使用本地缓存")
+    return False
+
+def download_term_grades(session, term, username=None):
+    """只请求一个学期的成绩页面并解析，失败返回 None"""
+    headers = {"Referer": BASE_URL + "framework/xsMain.jsp"}
+    data = {"kksj": term, "kcxz": "", "kcmc": "", "xsfs": "all"}
+    start = time.perf_counter()
+    try:
+        with metrics.timed("page_get", source=METRIC_SOURCE):
+            response = session.post(GRADE_URL, data=data, headers=headers, timeout=10)
+        metrics.inc("bytes_downloaded", len(response.content), source=METRIC_SOURCE)
+        logger.debug(f"学期 {term} 成绩请求状态码: {response.status_code}")
+    except Exception as e:
+        logger.error(f"学期 {term} 成绩请求异常: {e}")
+        return None
+
+    html = handle_grade_response(response.text, False, username, response.status_code,
+                                 time.perf_counter() - start)
+    if html is None:
+        return None
+    # 页面按学期筛选，仍按学期字段过滤一次，避免服务器忽略参数时把其他学期的成绩写入本分区
+    grades = [grade for grade in parse_grades(html) if grade["学期"] == term]
+    logger.info(f"学期 {term}: {len(grades)} 门课程，页面 {len(html)} 字符")
+    return grades
+
+def _save_term(term, username, rows):
+    """保存一个学期分区
+
+    全部学期页面拆分得到的分区没有单独的页面，因此分区一律以该学期成绩的 JSON 代替页面保存，
+    两种获取方式得到相同成绩时内容哈希相同。
+    """
+    CACHE_STORE.put(TERM_CACHE_PREFIX + term, username, json.dumps(rows, ensure_ascii=False), rows)
+
+def _save_full_terms(html, username, terms):
+    """把全部学期页面按学期拆分保存，删除页面中已不存在的学期分区
+
+    terms 中尚无成绩的学期保存为空分区，之后按更新间隔请求。
+    """
+    grades = parse_grades(html)
+    by_term = _split_by_term(grades)
+    for term in terms:
+        by_term.setdefault(term, [])
+    with metrics.timed("cache_write", source=METRIC_SOURCE):
+        for kind in CACHE_STORE.kinds(username, TERM_CACHE_PREFIX):
+            if kind[len(TERM_CACHE_PREFIX):] not in by_term:
+                CACHE_STORE.delete(kind, username)
+        for term, rows in by_term.items():
+            _save_term(term, username, rows)
+        CACHE_STORE.put(TERM_INDEX_KIND, username, html)
+    logger.info(f"已按学期拆分保存 {len(grades)} 门课程成绩（{len(by_term)} 个学期）")
+
+def load_term_grades(username=None):
+    """合并各学期分区的成绩（学期升序，学期内保持页面顺序），与 parse_grades 的返回结构相同
+
+    已结束学期的解析结果保留在内存中，之后只读取获取时间判断是否变化。没有任何分区时返回 None。
+    """
+    kinds = CACHE_STORE.kinds(username, TERM_CACHE_PREFIX)
+    if not kinds:
+        return None
+    grades = []
+    for kind in kinds:
+        term = kind[len(TERM_CACHE_PREFIX):]
+        entry = CACHE_STORE.get(kind, username)
+        if entry is None:
+            continue
+        cached = _term_rows_cache.get((username, term))
+        if cached is None or cached[0] != entry.fetched_at:
+            entry = CACHE_STORE.get(kind, username, with_rows=True)
+            if entry is None or entry.rows is None:
+                continue
+            cached = _term_rows_cache[(username, term)] = (entry.fetched_at, entry.rows)
+        grades.extend(cached[1])
+    return grades
+
+def fetch_grades_by_term(username, password, force_update=False):
+    """按学期分区获取成绩：只请求仍可能变化且达到更新间隔的学期，与其余学期的缓存合并后返回
+
+    首次调用以及每当又有学期结束后，请求一次全部学期的页面并拆分缓存。
+    force_update 时请求全部仍可能变化的学期。返回结构与 fetch_grades 相同。
+    """
+    if run_mode() == 'DEV':
+        logger.info("[DEV 模式] 使用 AppData 中缓存的学期分区成绩")
+        return load_term_grades(username)
+
+    terms = open_terms()
+    full_fetch = _needs_full_fetch(username, terms)
+    due = terms if force_update or full_fetch else _due_terms(username, terms)
+    if not due:
+        grades = load_term_grades(username)
+        if grades is not None:
+            logger.info(f"学期 {', '.join(terms)} 均未达到更新间隔，使用本地缓存")
+            return grades
+        due = terms
+
+    session = SESSION_MANAGER.get_session(username, password)
+    if not session:
+        return None
+
+    if full_fetch:
+        logger.info("没有最近一个已结束学期的完整成绩，请求全部学期的成绩页面")
+        html = download_grade_html(session, save_cache=False, username=username)
+        if not html:
+            SESSION_MANAGER.invalidate(username)
+            return None
+        _save_full_terms(html, username, terms)
+    else:
+        for term in due:
+            rows = download_term_grades(session, term, username)
+            if rows is None:
+                SESSION_MANAGER.invalidate(username)
+                return None
+            with metrics.timed("cache_write", source=METRIC_SOURCE):
+                _save_term(term, username, rows)
+
+    grades = load_term_grades(username) or []
+    record_grade_history(grades, username)
+    return grades
+
+# ===== 11.4 性能分析模式 =====
+def fetch_grades_profiled(username, password, force_update=False, print_result=True):
+    """按阶段采集 cProfile 与 tracemalloc 数据的获取流程，报告写入 AppData 目录下的 profiles/（见 fetchCommon）
+
+    Returns:
+        tuple: (成绩数据或 None, 报告路径)
+    """
+    return fetchCommon.fetch_profiled(_MODULE, username, password, force_update, print_result,
+                                      should_update_grades, get_grade_html, parse_grades, save_parsed_grades, print_grades)
 
 # ===== 12. 主程序入口 =====
 def main():
     """
     主程序入口，从配置文件读取账号密码
-    支持 --force 参数强制从网络更新
+    支持 --force 参数强制从网络更新，--by-term 参数按学期分区获取，
+    --profile 参数按阶段采集性能分析报告（写入 AppData 目录下的 profiles/）
     """
     import sys
     force_update = '--force' in sys.argv
+    by_term = '--by-term' in sys.argv
+    profile = '--profile' in sys.argv
+    if profile and by_term:
+        # 性能分析按 fetch_grades 的流程分阶段采集，不适用于按学期分区获取
+        logger.error("--profile 与 --by-term 不能同时使用")
+        print("❌ --profile 与 --by-term 不能同时使用")
+        return
     
     # 从配置文件读取账号密码
-    config = load_config()
-    username = config.get('account', 'username', fallback='')
-    password = config.get('account', 'password', fallback='')
+    config = pluginConfig.get_config(logger)
+    username = config.username
+    password = config.password
     
     if not username or not password:
         logger.error("配置文件中未设置账号或密码")
@@ -313,10 +805,18 @@ def main():
         return
     
     logger.info(f"开始获取成绩（强制更新: {force_update}）")
-    grades = fetch_grades(username, password, force_update)
+    if profile:
+        grades, report_path = fetch_grades_profiled(username, password, force_update)
+        print(f"📊 性能分析报告: {report_path}")
+        logger.info(f"性能分析报告已保存到: {report_path}")
+    elif by_term:
+        grades = fetch_grades_by_term(username, password, force_update)
+    else:
+        grades = fetch_grades(username, password, force_update)
 
     if grades is not None:
-        print_grades(grades)
+        if not profile:
+            print_grades(grades)
         print("✅ 成绩解析完成")
         logger.info("成绩解析完成")
     else:
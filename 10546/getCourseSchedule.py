@@ -1,15 +1,13 @@
 # -*- coding: utf-8 -*-
-import requests
 import base64
-from bs4 import BeautifulSoup
-import socket
-import configparser
-import re
+import logging
 import os
+import tempfile
 import json
 import time
 import sys
 from pathlib import Path
+from urllib.parse import urlsplit
 
 # 添加项目根目录到 sys.path（确保能找到 core 模块）
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
@@ -18,7 +16,18 @@ if str(BASE_DIR) not in sys.path:
 
 # 导入统一日志模块（AppData 目录）
 from core.log import init_logger, get_config_path, get_log_file_path
-from core.config_manager import load_config
+from sessionManager import SessionManager
+from deltaTracker import DeltaTracker, SCHEDULE_KEY_FIELDS
+import parserBackend
+import streamParser
+import metrics
+import pluginConfig
+import records
+import cacheStore
+import fetchCommon
+
+# 本模块对象，传给 fetchCommon 的公共流程
+_MODULE = sys.modules[__name__]
 
 # 初始化日志（如果失败直接崩溃）
 logger = init_logger('getCourseSchedule')
@@ -32,299 +41,396 @@ APPDATA_DIR = get_log_file_path('getCourseSchedule').parent
 # ===== 2. 读取运行模式 =====
 def get_run_mode():
     try:
-        config = load_config()
-        mode = config.get('run_model', 'model', fallback='BUILD').strip().upper()
-        if mode not in ('DEV', 'BUILD'):
-            logger.warning(f"未知运行模式 '{mode}'，默认使用 BUILD")
-            mode = 'BUILD'
-        return mode
+        return pluginConfig.get_config(logger).run_mode
     except Exception as e:
         logger.warning(f"读取 run_model 失败，使用默认模式 BUILD: {e}")
         return 'BUILD'
 
-RUN_MODE = get_run_mode()
-logger.info(f"当前运行模式: {RUN_MODE}")
+# 赋值后覆盖配置文件中的运行模式
+RUN_MODE = None
+
+def run_mode():
+    """当前运行模式（'DEV' 或 'BUILD'），配置文件修改后无需重启即可生效"""
+    if RUN_MODE is not None:
+        return RUN_MODE
+    return get_run_mode()
 
 # ===== 3. 常量定义 =====
 BASE_URL = "https://hysfjw.hynu.edu.cn/jsxsd/"
 LOGIN_URL = BASE_URL + "xk/LoginToXk"
 SCHEDULE_URL = BASE_URL + "xskb/xskb_list.do"
+# 运行指标中区分成绩/课表的标签值
+METRIC_SOURCE = "schedule"
+# 日志中的数据名称
+DATA_LABEL = "课表"
+
+def create_session():
+    """创建未登录的会话（强制 IPv4，并设置通用请求头）
 
-class IPv4Adapter(requests.adapters.HTTPAdapter):
-    def init_poolmanager(self, *args, **kwargs):
-        import urllib3.util.connection as urllib3_conn
-        urllib3_conn.allowed_gai_family = lambda: socket.AF_INET
-        return super().init_poolmanager(*args, **kwargs)
+    requests 在首次创建会话时才导入；所有会话共用 ipv4Adapter 的适配器与 DNS 缓存。
+    """
+    import requests
+    import ipv4Adapter
+    session = requests.Session()
+    adapter = ipv4Adapter.get_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Referer": BASE_URL
+    })
+    return session
+
+def prewarm():
+    """预先解析教务服务器地址并建立 TLS 连接，供随后的登录/请求直接使用（不发送请求）"""
+    import ipv4Adapter
+    ok = ipv4Adapter.prewarm(BASE_URL)
+    logger.info(f"预热到 {BASE_URL} 的连接{'成功' if ok else '失败'}")
+    return ok
 
 # ===== 4. 登录函数 =====
 def login(username, password):
-    hostname = "hysfjw.hynu.edu.cn"
-    try:
-        ipv4_addr = socket.gethostbyname(hostname)
-        logger.info(f"目标服务器 {hostname} 解析到 IPv4 地址: {ipv4_addr}")
-    except Exception as e:
-        logger.warning(f"解析 {hostname} IPv4 失败: {e}")
-
     b64_user = base64.b64encode(username.encode("utf-8")).decode("utf-8")
     b64_pwd = base64.b64encode(password.encode("utf-8")).decode("utf-8")
     encoded = f"{b64_user}%%%{b64_pwd}"
     logger.debug(f"生成的 encoded: {encoded}")
 
-    session = requests.Session()
-    session.mount('http://', IPv4Adapter())
-    session.mount('https://', IPv4Adapter())
-    session.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Referer": BASE_URL
-    })
+    import ipv4Adapter
+    session = create_session()
+    hostname = urlsplit(LOGIN_URL).hostname
+    try:
+        # 解析结果缓存在共享的 DnsCache 中，随后的登录请求直接使用
+        ipv4_addrs = ipv4Adapter.DNS_CACHE.resolve(hostname)
+        logger.info(f"目标服务器 {hostname} 解析到 IPv4 地址: {', '.join(ipv4_addrs)}")
+    except Exception as e:
+        logger.warning(f"解析 {hostname} IPv4 失败: {e}")
 
+    start = time.perf_counter()
     try:
-        response = session.post(LOGIN_URL, data={"encoded": encoded}, timeout=10)
+        with metrics.timed("login_post", source=METRIC_SOURCE):
+            response = session.post(LOGIN_URL, data={"encoded": encoded}, timeout=10)
         logger.debug(f"登录响应状态码: {response.status_code}")
     except Exception as e:
         logger.error(f"登录请求异常: {e}")
+        metrics.inc("login_failures", source=METRIC_SOURCE)
         return None
 
-    if "xsMain_new.htmlx" in response.text or "xsMain.htmlx" in response.text:
-        logger.info("登录成功")
+    if check_login_response(response.text, username, response.status_code, time.perf_counter() - start):
         return session
-    elif "用户名或密码错误" in response.text:
-        logger.error("用户名或密码错误")
-    elif "验证码" in response.text:
-        logger.warning("检测到验证码，脚本无法处理")
-    else:
-        logger.error("登录失败，未知原因")
-        failed_file = APPDATA_DIR / "login_failed_schedule.html"
-        with open(failed_file, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.debug(f"登录失败响应已保存到: {failed_file}")
     return None
 
+def check_login_response(text, username=None, status_code=None, elapsed=None):
+    """根据登录响应内容判断是否登录成功，未知失败时保存响应以便排查（见 fetchCommon）"""
+    return fetchCommon.check_login_response(_MODULE, text, username, status_code, elapsed)
+
+def record_failure(text, stage, url=None, username=None, status_code=None, elapsed=None):
+    """登记无法识别的响应以便排查（见 fetchCommon、failureStore）"""
+    fetchCommon.record_failure(_MODULE, text, stage, url, username, status_code, elapsed)
+
+# 会话复用：Cookie 保存在 AppData 目录，仅在会话过期时重新登录
+SESSION_MANAGER = SessionManager(login, create_session, APPDATA_DIR, BASE_URL, logger)
+
 # ===== 5. 循环检测配置读取 =====
 def get_loop_config():
-    """读取循环检测配置"""
+    """读取循环检测配置（pluginConfig.LoopConfig，可按 enabled, interval = ... 解包）"""
     try:
-        config = load_config()
-        enabled = config.getboolean('loop_getCourseSchedule', 'enabled', fallback=False)
-        interval = config.getint('loop_getCourseSchedule', 'time', fallback=3600)
-        logger.info(f"循环检测配置: enabled={enabled}, interval={interval}秒")
-        return enabled, interval
+        loop = pluginConfig.get_config(logger).loop('getCourseSchedule')
+        logger.info(f"循环检测配置: {loop}")
+        return loop
     except Exception as e:
         logger.warning(f"读取循环检测配置失败: {e}，使用默认值")
-        return False, 3600
+        return pluginConfig.LoopConfig()
 
 # ===== 6. 检查是否需要更新 =====
-def should_update_schedule():
-    """检查是否需要从网络更新课表"""
-    enabled, interval = get_loop_config()
+def should_update_schedule(username=None):
+    """检查是否需要从网络更新课表
+
+    Args:
+        username: 学号（缓存按账号保存）
+    """
+    loop = get_loop_config()
     
     # 如果循环检测未启用，直接返回True（总是更新）
-    if not enabled:
+    if not loop.enabled:
         logger.info("循环检测未启用，将从网络获取最新课表")
         return True
     
-    # 检查本地缓存文件是否存在（AppData 目录）
-    cache_file = APPDATA_DIR / "schedule.html"
-    timestamp_file = APPDATA_DIR / "schedule_timestamp.txt"
-    
-    if not cache_file.exists():
+    # 检查本地缓存（AppData 目录下的缓存库，只读取获取时间）
+    entry = get_cache_entry(username)
+    if entry is None:
         logger.info("本地课表缓存不存在，需要从网络获取")
         return True
-    
-    # 检查时间戳文件
-    if not timestamp_file.exists():
-        logger.info("时间戳文件不存在，需要从网络获取")
+
+    interval = get_update_interval(loop, entry)
+    elapsed = time.time() - entry.fetched_at
+    logger.info(f"距离上次更新已过 {elapsed:.0f} 秒，更新间隔设置为 {interval:.0f} 秒")
+
+    if elapsed >= interval:
+        logger.info("超过更新间隔，需要从网络获取")
         return True
-    
+    else:
+        logger.info(f"未超过更新间隔，还需 {interval - elapsed:.0f} 秒，使用本地缓存")
+        return False
+
+def get_update_interval(loop, entry):
+    """本次缓存之后的更新间隔（秒），自适应模式下随页面连续未变化的次数退避（见 fetchCommon）"""
+    return fetchCommon.get_update_interval(_MODULE, loop, entry)
+
+def next_update_time(username=None):
+    """下次需要从网络获取课表的时间戳；循环检测未启用或没有缓存时返回当前时间"""
+    return fetchCommon.next_update_time(_MODULE, username)
+
+# ===== 7. 读写缓存 =====
+# 页面、获取时间和解析结果保存在 AppData 目录下的缓存库中（cacheStore），按账号区分；
+# 旧版的 schedule.html / schedule_timestamp.txt 在首次读取时导入
+CACHE_KIND = "schedule"
+CACHE_STORE = cacheStore.get_store(APPDATA_DIR)
+LEGACY_CACHE_FILES = ("schedule.html", "schedule_timestamp.txt")
+
+def get_cache_entry(username=None, with_html=False, with_rows=False):
+    """读取账号的课表缓存（cacheStore.CacheEntry），不存在或读取失败返回 None"""
     try:
-        with open(timestamp_file, "r", encoding="utf-8") as f:
-            last_update = float(f.read().strip())
-        
-        current_time = time.time()
-        elapsed = current_time - last_update
-        
-        logger.info(f"距离上次更新已过 {elapsed:.0f} 秒，更新间隔设置为 {interval} 秒")
-        
-        if elapsed >= interval:
-            logger.info("超过更新间隔，需要从网络获取")
-            return True
-        else:
-            logger.info(f"未超过更新间隔，还需 {interval - elapsed:.0f} 秒，使用本地缓存")
-            return False
+        with metrics.timed("cache_read", source=METRIC_SOURCE):
+            entry = CACHE_STORE.get(CACHE_KIND, username, with_html, with_rows)
+            if entry is None and _import_legacy_cache(username):
+                entry = CACHE_STORE.get(CACHE_KIND, username, with_html, with_rows)
     except Exception as e:
-        logger.warning(f"读取时间戳失败: {e}，需要从网络获取")
-        return True
+        logger.warning(f"读取课表缓存失败: {e}")
+        return None
+    return entry
 
-# ===== 7. 更新时间戳 =====
-def update_timestamp():
-    """更新课表获取时间戳（AppData 目录）"""
-    timestamp_file = APPDATA_DIR / "schedule_timestamp.txt"
+def _import_legacy_cache(username):
+    """把旧版缓存文件导入缓存库，导入后文件改名为 *.migrated"""
+    return fetchCommon.import_legacy_cache(_MODULE, username)
+
+def save_schedule_cache(html, username=None, schedule=None):
+    """在一个事务中写入课表页面、获取时间（及解析结果），成功返回 True"""
     try:
-        with open(timestamp_file, "w", encoding="utf-8") as f:
-            f.write(str(time.time()))
-        logger.info(f"时间戳已更新: {timestamp_file}")
+        with metrics.timed("cache_write", source=METRIC_SOURCE):
+            CACHE_STORE.put(CACHE_KIND, username, html, schedule)
     except Exception as e:
-        logger.error(f"更新时间戳失败: {e}")
+        logger.error(f"写入课表缓存失败: {e}")
+        return False
+    logger.debug(f"课表数据已缓存到: {CACHE_STORE.path}")
+    return True
 
 # ===== 8. 获取课表 HTML =====
-def get_schedule_html(session, force_update=False):
-    """获取课表HTML，支持循环检测。所有文件存储在 AppData 目录。"""
-    cache_file = APPDATA_DIR / "schedule.html"
-    
-    logger.info(f"get_schedule_html 被调用, force_update={force_update}, RUN_MODE={RUN_MODE}")
+def get_schedule_html(session, force_update=False, username=None):
+    """获取课表HTML，支持循环检测。缓存存储在 AppData 目录。"""
+    logger.info(f"get_schedule_html 被调用, force_update={force_update}, RUN_MODE={run_mode()}")
 
     if force_update:
         logger.info("强制更新模式：将忽略缓存并尝试从网络获取最新课表")
     else:
         # 1. DEV 模式下的缓存处理
-        if RUN_MODE == 'DEV':
-            logger.info(f"[DEV 模式] 从 AppData 文件读取课表数据: {cache_file}")
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    return f.read()
-            except FileNotFoundError:
-                logger.error(f"未找到 {cache_file}，请先在 BUILD 模式运行生成")
-                return None
-            except Exception as e:
-                logger.error(f"读取 {cache_file} 失败: {e}")
+        if run_mode() == 'DEV':
+            logger.info(f"[DEV 模式] 从 AppData 缓存读取课表数据: {CACHE_STORE.path}")
+            entry = get_cache_entry(username, with_html=True)
+            if entry is None:
+                logger.error("未找到课表缓存，请先在 BUILD 模式运行生成")
                 return None
+            return entry.html
         
         # 2. 检查是否需要更新（基于时间间隔）
-        if not should_update_schedule():
+        if not should_update_schedule(username):
             logger.info("未达到更新间隔，将使用本地缓存的课表数据")
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    return f.read()
-            except Exception as e:
-                logger.warning(f"读取本地缓存失败: {e}，将回退到网络获取")
+            html = read_schedule_cache(username)
+            if html is not None:
+                return html
     
     # 3. 从网络获取
-    if RUN_MODE == 'DEV' and not force_update:
+    if run_mode() == 'DEV' and not force_update:
         # 兜底逻辑
         return None
     
-    # 从网络获取
+    return download_schedule_html(session, username=username)
+
+def download_schedule_html(session, save_cache=True, username=None):
+    """从网络获取课表HTML
+
+    Args:
+        session: 已登录的会话
+        save_cache: 成功后是否写入 AppData 缓存（连同获取时间）
+        username: 学号，缓存按账号保存
+    """
     logger.info("开始从网络请求课表页面")
     headers = {"Referer": BASE_URL + "framework/xsMain.jsp"}
+    start = time.perf_counter()
     try:
-        response = session.get(SCHEDULE_URL, headers=headers, timeout=10)
+        with metrics.timed("page_get", source=METRIC_SOURCE):
+            response = session.get(SCHEDULE_URL, headers=headers, timeout=10)
+        metrics.inc("bytes_downloaded", len(response.content), source=METRIC_SOURCE)
         logger.debug(f"课表请求状态码: {response.status_code}")
     except Exception as e:
         logger.error(f"课表请求异常: {e}")
         return None
 
-    if "timetable" in response.text and ("kbcontent" in response.text):
+    return handle_schedule_response(response.text, save_cache, username, response.status_code, time.perf_counter() - start)
+
+def handle_schedule_response(text, save_cache=True, username=None, status_code=None, elapsed=None):
+    """校验课表页面内容，有效时按需写入缓存并返回，无效时保存响应以便排查并返回 None"""
+    if "timetable" in text and ("kbcontent" in text):
         logger.info("成功获取课表数据")
-        with open(cache_file, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.debug(f"课表数据已缓存到: {cache_file}")
-        update_timestamp()  # 更新时间戳
-        return response.text
+        if save_cache:
+            save_schedule_cache(text, username)
+        return text
     else:
         logger.error("未识别到有效课表内容")
-        failed_file = APPDATA_DIR / "schedule_failed.html"
-        with open(failed_file, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        logger.debug(f"失败响应已保存到: {failed_file}")
+        record_failure(text, "page", SCHEDULE_URL, username, status_code, elapsed)
         return None
 
-# ===== 9. 解析青果课表 =====
-def parse_schedule(html):
-    logger.info("开始解析青果系统课表结构")
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table", id="timetable")
-    if not table:
-        logger.error("未找到 <table id='timetable'>")
-        return []
+# ===== 8.1 流式获取 =====
+def stream_schedule(session, save_cache=True, chunk_size=streamParser.DEFAULT_CHUNK_SIZE, username=None):
+    """流式获取课表：边下载边解析并逐条产出，目标表格闭合后立即停止下载
+
+    Args:
+        session: 已登录的会话
+        save_cache: 是否把下载内容（截至表格结束）写入 AppData 缓存
+        chunk_size: 每次读取的字节数
+        username: 学号，缓存按账号保存
+    """
+    logger.info("开始流式请求课表页面")
+    headers = {"Referer": BASE_URL + "framework/xsMain.jsp"}
+    start = time.perf_counter()
+    try:
+        response = session.get(SCHEDULE_URL, headers=headers, timeout=10, stream=True)
+        logger.debug(f"课表请求状态码: {response.status_code}")
+    except Exception as e:
+        logger.error(f"课表请求异常: {e}")
+        return
 
-    rows = table.find_all("tr")[1:]
+    # 每次下载使用独立的临时文件，多个进程同时获取时互不干扰
+    fd, tmp_file = tempfile.mkstemp(prefix="schedule.", suffix=".part", dir=APPDATA_DIR)
+    os.close(fd)
+    download = streamParser.StreamDownload(response, streamParser.ScheduleStreamParser(), tmp_file,
+                                           ("timetable", "kbcontent"), chunk_size)
+    # 产出的条目同时作为解析结果写入缓存（调用方不应修改）
     schedule = []
-    period_mapping = {0: (1, 2), 1: (3, 4), 2: (5, 6), 3: (7, 8), 4: (9, 10), 5: (11, 12)}
+    try:
+        for row_idx, cells in download:
+            if cells is None:
+                continue
+            for item in records.build_course_items(row_idx, cells):
+                schedule.append(item)
+                yield item
+    except BaseException:
+        # 调用方提前结束迭代或下载出错
+        os.remove(tmp_file)
+        raise
+
+    # 流式下载与解析交替进行，耗时记为一个阶段（包含调用方消费条目的时间）
+    metrics.observe("page_stream", time.perf_counter() - start, source=METRIC_SOURCE)
+    metrics.inc("bytes_downloaded", download.bytes_read, source=METRIC_SOURCE)
+    stopped = "，表格结束后提前停止下载" if download.completed else ""
+    logger.info(f"流式解析 {len(schedule)} 条课程记录，已下载 {download.bytes_read} 字节{stopped}")
+
+    if download.has_marker("timetable") and download.has_marker("kbcontent"):
+        if save_cache:
+            with open(tmp_file, "r", encoding="utf-8") as f:
+                save_schedule_cache(f.read(), username, schedule)
+        os.remove(tmp_file)
+    else:
+        logger.error("未识别到有效课表内容")
+        with open(tmp_file, "r", encoding="utf-8") as f:
+            text = f.read()
+        os.remove(tmp_file)
+        record_failure(text, "stream", SCHEDULE_URL, username, response.status_code, time.perf_counter() - start)
 
-    for row_idx, row in enumerate(rows):
-        tds = row.find_all("td")
-        if len(tds) < 7:
-            continue
+# ===== 9. 解析青果课表 =====
+# 由单元格构造课程条目的函数在 records 中（批量重新解析共用），保留原有名称以兼容
+parse_week_list = records.parse_week_list
+PERIOD_MAPPING = records.PERIOD_MAPPING
 
-        start_period, end_period = period_mapping.get(row_idx, (row_idx * 2 + 1, row_idx * 2 + 2))
+def parse_schedule(html, backend=None, compact=False):
+    """解析青果课表
 
-        for weekday in range(1, 8):
-            td = tds[weekday - 1]
-            full_div = td.find("div", class_="kbcontent", style=lambda x: x and "none" in x.lower())
-            if not full_div or not full_div.get_text(strip=True):
-                continue
+    Args:
+        html: 课表页面 HTML
+        backend: 解析后端（"html.parser" 或 "lxml"），默认使用 parserBackend.DEFAULT_BACKEND
+        compact: 返回 records.CourseRecord 列表而不是 dict 列表（可按原字段名访问，内存占用更小）
+    """
+    resolved = parserBackend.resolve_backend(backend)
+    logger.info(f"开始解析青果系统课表结构（解析后端: {resolved}）")
+    if backend and resolved != backend:
+        logger.warning(f"解析后端 {backend} 不可用，已回退到 {resolved}")
+
+    with metrics.timed("parse", source=METRIC_SOURCE):
+        rows = parserBackend.extract_schedule_rows(html, resolved)
+    if rows is None:
+        logger.error("未找到 <table id='timetable'>")
+        return []
 
-            # 先在HTML层面分割课程块，保留HTML标签
-            full_html = str(full_div)
-            # 使用正则分割，匹配 ----- 这种分隔符（至少5个减号）
-            course_html_blocks = re.split(r'(?:-{5,})<br\s*/?>', full_html)
-            
-            for block_html in course_html_blocks:
-                # 解析当前 HTML 块
-                block_soup = BeautifulSoup(block_html, "html.parser")
-                block_text = block_soup.get_text("\n", strip=True)
-                
-                lines = [line.strip() for line in block_text.split("\n") if line.strip()]
-                if len(lines) < 2:
-                    continue
-
-                course_name = lines[0]
-
-                # === 修复：从当前 block 的 lines 中找周次 ===
-                weeks = []
-                time_info_line = None
-                for line in lines:
-                    if "(周)" in line and not line.startswith("通知单编号") and "教室" not in line:
-                        time_info_line = line
-                        break
-
-                if time_info_line:
-                    # 使用更鲁棒的正则：匹配 (数字或数字范围)
-                    # 先提取 (周) 之前的部分，避免匹配到节次 [01-02节]
-                    week_part = time_info_line.split('(周)')[0]
-                    week_matches = re.findall(r'(\d+(?:-\d+)?)', week_part)
-                    for part in week_matches:
-                        if '-' in part:
-                            try:
-                                s, e = map(int, part.split('-'))
-                                weeks.extend(range(s, e + 1))
-                            except ValueError:
-                                continue
-                        else:
-                            try:
-                                weeks.append(int(part))
-                            except ValueError:
-                                continue
-
-                # === 提取教师和教室（修复：在当前 block 内查找）===
-                # 直接从 block_soup 中查找教师和教室信息
-                teacher_tag = block_soup.find("font", {"title": "教师"})
-                teacher = teacher_tag.get_text(strip=True) if teacher_tag else ""
-                
-                room_tag = block_soup.find("font", {"title": "教室"})
-                room = room_tag.get_text(strip=True) if room_tag else ""
-
-                # 如果没找到周次，设为全学期（保持兼容）
-                if not weeks:
-                    weeks = ["全学期"]
-                else:
-                    weeks = sorted(set(weeks))
-
-                item = {
-                    "星期": weekday,
-                    "开始小节": start_period,
-                    "结束小节": end_period,
-                    "课程名称": course_name,
-                    "教师": teacher,
-                    "教室": room,
-                    "周次列表": weeks
-                }
-                schedule.append(item)
+    schedule = records.courses_from_rows(rows, compact)
 
     logger.info(f"成功解析 {len(schedule)} 条课程记录")
     # >>>>>>>>>>>>>>>>>> 关键改进：DEBUG 输出解析结果 <<<<<<<<<<<<<<<<<<
-    if schedule:
-        logger.debug("【课表解析结果】\n" + json.dumps(schedule, ensure_ascii=False, indent=2))
+    if schedule and logger.isEnabledFor(logging.DEBUG):
+        dump = records.to_dicts(schedule) if compact else schedule
+        logger.debug("【课表解析结果】\n" + json.dumps(dump, ensure_ascii=False, indent=2))
+    return schedule
+
+# ===== 9.1 解析结果缓存 =====
+# 解析结果与页面一起保存在缓存库中；内存中每个账号保留最近一份，页面内容哈希相同时无需再次解析。
+# 每次以一个元组整体替换，多线程同时读写时不会读到哈希与解析结果不对应的状态
+_parsed_cache = {}  # 学号 -> (页面内容哈希, 解析结果)
+
+def save_parsed_schedule(schedule, username=None, html=None):
+    """保存课表解析结果（内存 + 缓存库）
+
+    Args:
+        schedule: 解析结果
+        username: 学号
+        html: 解析所用的页面；缓存库中的页面已被其他进程更新时不写入。None 表示当前缓存的页面
+    """
+    try:
+        if html is not None:
+            content_hash = cacheStore.hash_html(html)
+        else:
+            entry = CACHE_STORE.get(CACHE_KIND, username)
+            if entry is None:
+                logger.warning("课表缓存不存在，不保存解析结果")
+                return
+            content_hash = entry.content_hash
+
+        _parsed_cache[username] = (content_hash, schedule)
+        with metrics.timed("cache_write", source=METRIC_SOURCE):
+            saved = CACHE_STORE.put_rows(CACHE_KIND, username, content_hash, schedule)
+        if saved:
+            logger.debug(f"课表解析结果已缓存到: {CACHE_STORE.path}")
+    except Exception as e:
+        logger.warning(f"保存课表解析结果失败: {e}")
+
+def load_parsed_schedule(username=None):
+    """读取本地缓存的课表解析结果
+
+    依次尝试内存、缓存库中保存的解析结果，都未命中时才解析缓存的页面。
+    返回的列表与缓存共享，调用方不应修改。
+    """
+    entry = get_cache_entry(username)
+    if entry is None:
+        logger.error("未找到课表缓存")
+        return None
+
+    cached = _parsed_cache.get(username)
+    if cached is not None and cached[0] == entry.content_hash:
+        metrics.inc("cache_hits", cache="parsed_memory", source=METRIC_SOURCE)
+        logger.info("命中内存中的课表解析结果缓存")
+        return cached[1]
+
+    entry = get_cache_entry(username, with_rows=True)
+    if entry is not None and entry.rows is not None:
+        metrics.inc("cache_hits", cache="parsed_store", source=METRIC_SOURCE)
+        logger.info(f"命中课表解析结果缓存: {CACHE_STORE.path}")
+        _parsed_cache[username] = (entry.content_hash, entry.rows)
+        return entry.rows
+
+    metrics.inc("cache_misses", cache="parsed", source=METRIC_SOURCE)
+    entry = get_cache_entry(username, with_html=True)
+    if entry is None:
+        logger.error("未找到课表缓存")
+        return None
+    schedule = parse_schedule(entry.html)
+    save_parsed_schedule(schedule, username, entry.html)
     return schedule
 
 # ===== 10. 打印课表为表格 =====
@@ -372,30 +478,131 @@ def fetch_course_schedule(username, password, force_update=False):
         password: 密码
         force_update: 是否强制从网络更新（忽略循环检测）
     """
-    if RUN_MODE == 'DEV':
-        html = get_schedule_html(None, force_update)
+    if run_mode() == 'DEV':
+        if not force_update:
+            logger.info("[DEV 模式] 使用 AppData 中缓存的课表数据")
+            return load_parsed_schedule(username)
+        html = get_schedule_html(None, force_update, username)
         return parse_schedule(html) if html else None
 
-    session = login(username, password)
+    # 缓存未过期时直接返回解析结果，不进行登录等任何网络请求
+    if not force_update and not should_update_schedule(username):
+        schedule = load_parsed_schedule(username)
+        if schedule is not None:
+            logger.info("未达到更新间隔，使用本地缓存的课表数据")
+            return schedule
+        logger.warning("本地缓存不可用，将回退到网络获取")
+
+    html = _login_and_download(username, password)
+    if not html:
+        return None
+
+    schedule = parse_schedule(html)
+    save_parsed_schedule(schedule, username, html)
+    return schedule
+
+def _login_and_download(username, password):
+    """获取会话并从网络下载课表页面"""
+    session = SESSION_MANAGER.get_session(username, password)
     if not session:
         return None
 
-    html = get_schedule_html(session, force_update)
-    return parse_schedule(html) if html else None
+    html = download_schedule_html(session, username=username)
+    if not html:
+        # 可能是会话在探测后失效，丢弃以便下次重新登录
+        SESSION_MANAGER.invalidate(username)
+    return html
+
+# ===== 11.1 增量模式 =====
+SCHEDULE_DELTA_TRACKER = DeltaTracker(CACHE_STORE, "schedule_delta", SCHEDULE_KEY_FIELDS, logger)
+
+def fetch_schedule_html(username, password, force_update=False):
+    """按缓存策略获取课表HTML：未达到更新间隔时读取本地缓存，否则从网络获取"""
+    if run_mode() == 'DEV':
+        return get_schedule_html(None, force_update, username)
+
+    if not force_update and not should_update_schedule(username):
+        html = read_schedule_cache(username)
+        if html is not None:
+            return html
+
+    return _login_and_download(username, password)
+
+def read_schedule_cache(username=None):
+    """读取 AppData 中缓存的课表HTML，不存在或读取失败返回 None"""
+    entry = get_cache_entry(username, with_html=True)
+    if entry is None:
+        metrics.inc("cache_misses", cache="html", source=METRIC_SOURCE)
+        logger.warning("本地课表缓存不可用，将回退到网络获取")
+        return None
+    metrics.inc("cache_hits", cache="html", source=METRIC_SOURCE)
+    return entry.html
+
+def fetch_course_schedule_delta(username, password, force_update=False):
+    """获取课表增量：只返回与上次获取相比新增、变化、删除的条目
+
+    页面内容哈希与该账号上次获取的相同时不进行解析。每个账号首次调用时全部条目视为新增。
+
+    Returns:
+        dict: {"added": [...], "changed": [{"old": ..., "new": ...}], "removed": [...]}，获取失败返回 None
+    """
+    html = fetch_schedule_html(username, password, force_update)
+    if not html:
+        return None
+
+    def parse_and_save(page):
+        # 与 fetch_course_schedule 相同：保存解析结果，缓存库据此更新未变化计数
+        schedule = parse_schedule(page)
+        save_parsed_schedule(schedule, username, page)
+        return schedule
+
+    return SCHEDULE_DELTA_TRACKER.update(html, parse_and_save, username)
+
+# ===== 11.2 流式模式 =====
+def fetch_course_schedule_stream(username, password, force_update=False):
+    """流式获取课表，逐条产出；缓存未过期时直接产出本地缓存的解析结果
+
+    与 fetch_course_schedule 不同，获取失败时不返回 None，而是不产出任何条目。
+    """
+    if run_mode() == 'DEV':
+        yield from load_parsed_schedule(username) or []
+        return
+
+    if not force_update and not should_update_schedule(username):
+        schedule = load_parsed_schedule(username)
+        if schedule is not None:
+            yield from schedule
+            return
+
+    session = SESSION_MANAGER.get_session(username, password)
+    if not session:
+        return
+    yield from stream_schedule(session, username=username)
+
+# ===== 11.3 性能分析模式 =====
+def fetch_course_schedule_profiled(username, password, force_update=False, print_result=True):
+    """按阶段采集 cProfile 与 tracemalloc 数据的获取流程，报告写入 AppData 目录下的 profiles/（见 fetchCommon）
+
+    Returns:
+        tuple: (课表数据或 None, 报告路径)
+    """
+    return fetchCommon.fetch_profiled(_MODULE, username, password, force_update, print_result,
+                                      should_update_schedule, get_schedule_html, parse_schedule, save_parsed_schedule, print_schedule)
 
 # ===== 12. 主程序入口 =====
 def main():
     """
     主程序入口，从配置文件读取账号密码
-    支持 --force 参数强制从网络更新
+    支持 --force 参数强制从网络更新，--profile 参数按阶段采集性能分析报告（写入 AppData 目录下的 profiles/）
     """
     import sys
     force_update = '--force' in sys.argv
+    profile = '--profile' in sys.argv
     
     # 从配置文件读取账号密码
-    config = load_config()
-    username = config.get('account', 'username', fallback='')
-    password = config.get('account', 'password', fallback='')
+    config = pluginConfig.get_config(logger)
+    username = config.username
+    password = config.password
     
     if not username or not password:
         logger.error("配置文件中未设置账号或密码")
@@ -403,10 +610,16 @@ def main():
         return
     
     logger.info(f"开始获取课表（强制更新: {force_update}）")
-    schedule = fetch_course_schedule(username, password, force_update)
+    if profile:
+        schedule, report_path = fetch_course_schedule_profiled(username, password, force_update)
+        print(f"📊 性能分析报告: {report_path}")
+        logger.info(f"性能分析报告已保存到: {report_path}")
+    else:
+        schedule = fetch_course_schedule(username, password, force_update)
 
     if schedule is not None:
-        print_schedule(schedule)
+        if not profile:
+            print_schedule(schedule)
         print("✅ 课表解析完成")
         logger.info("课表解析完成")
     else:
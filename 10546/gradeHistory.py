@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+成绩历史归档模块
+
+每次获取到与上一版本不同的成绩时追加一个版本，只保存相对上一版本的差异
+（新增、变化的条目和删除的主键），存储量与实际变化成正比；
+每 CHECKPOINT_INTERVAL 个版本额外保存一份完整快照，限制还原某一时刻状态时需要回放的差异数。
+
+    history = gradeHistory.get_history(getCourseGrades.CACHE_STORE)
+    history.state_at(username, datetime(2024, 7, 1))       # 某一时刻的成绩
+    history.changes(username, since=..., until=...)         # 一段时间内的变化记录
+    history.timeline(username, ("2023-2024-2", "A001"))    # 某门课程成绩的变化过程
+
+历史与页面缓存保存在同一个 SQLite 文件中（cacheStore），按账号区分。
+"""
+import json
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import cacheStore
+from deltaTracker import GRADE_KEY_FIELDS, compute_delta, index_rows
+
+# ===== 1. 常量定义 =====
+# 每隔多少个版本保存一份完整快照
+CHECKPOINT_INTERVAL = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS grade_history (
+    account TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    recorded_at REAL NOT NULL,
+    delta BLOB NOT NULL,
+    snapshot BLOB,
+    PRIMARY KEY (account, version)
+) WITHOUT ROWID
+"""
+INDEX = "CREATE INDEX IF NOT EXISTS grade_history_time ON grade_history (account, recorded_at)"
+
+
+# ===== 2. 工具函数 =====
+def _to_timestamp(value):
+    """datetime 或时间戳 -> 时间戳；None 原样返回"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def _pack(obj):
+    return zlib.compress(json.dumps(obj, ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _make_delta(old_state, rows, key_fields):
+    """计算从 old_state（{主键: 条目}）到 rows 的差异；没有变化时返回 None
+
+    Returns:
+        dict: {"put": [[主键, 条目], ...], "removed": [主键, ...]}（主键为列表，便于 JSON 保存）
+    """
+    new_state = index_rows(rows, key_fields)
+    put = [[list(key), row] for key, row in new_state.items() if old_state.get(key) != row]
+    removed = [list(key) for key in old_state if key not in new_state]
+    if not put and not removed:
+        return None
+    return {"put": put, "removed": removed}
+
+
+def _apply_delta(state, delta):
+    for key in delta["removed"]:
+        state.pop(tuple(key), None)
+    for key, row in delta["put"]:
+        state[tuple(key)] = row
+
+
+# ===== 3. 成绩历史 =====
+class GradeHistory:
+    """按账号保存成绩版本历史（线程安全，多进程共用同一文件时通过事务保证版本号连续）
+
+    Args:
+        store: cacheStore.CacheStore，历史保存在其数据库文件中
+        key_fields: 条目主键字段
+    """
+
+    def __init__(self, store, key_fields=GRADE_KEY_FIELDS):
+        self.store = store
+        self.key_fields = tuple(key_fields)
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._latest = {}  # 账号键 -> (最新版本号, 该版本的状态)
+
+    def _connect(self):
+        conn = self.store.connect()
+        if not self._schema_ready:
+            with conn:
+                conn.execute(SCHEMA)
+                conn.execute(INDEX)
+            self._schema_ready = True
+        return conn
+
+    def _load_state(self, conn, account, version):
+        """还原 version 版本的状态（{主键: 条目}）；version 为 None 或 0 时返回空状态"""
+        state = {}
+        if not version:
+            return state
+        row = conn.execute(
+            "SELECT version, snapshot FROM grade_history "
+            "WHERE account = ? AND version <= ? AND snapshot IS NOT NULL ORDER BY version DESC LIMIT 1",
+            (account, version),
+        ).fetchone()
+        start = 0
+        if row is not None:
+            start = row[0]
+            _apply_delta(state, {"put": _unpack(row[1]), "removed": []})
+        for (delta,) in conn.execute(
+            "SELECT delta FROM grade_history WHERE account = ? AND version > ? AND version <= ? ORDER BY version",
+            (account, start, version),
+        ):
+            _apply_delta(state, _unpack(delta))
+        return state
+
+    # ---------- 写入 ----------
+    def record(self, username, grades, recorded_at=None):
+        """记录一次获取到的成绩，与最新版本相同时不写入
+
+        Returns:
+            int: 新版本号；没有变化时返回 None
+        """
+        account = cacheStore.account_key(username)
+        recorded_at = time.time() if recorded_at is None else _to_timestamp(recorded_at)
+        conn = self._connect()
+        with self._lock:
+            # BEGIN IMMEDIATE：读取最新版本到写入新版本之间不允许其他进程写入
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (latest,) = conn.execute(
+                    "SELECT COALESCE(MAX(version), 0) FROM grade_history WHERE account = ?", (account,)
+                ).fetchone()
+                cached = self._latest.get(account)
+                state = cached[1] if cached and cached[0] == latest else self._load_state(conn, account, latest)
+
+                delta = _make_delta(state, grades, self.key_fields)
+                if delta is None:
+                    conn.execute("COMMIT")
+                    self._latest[account] = (latest, state)
+                    return None
+
+                _apply_delta(state, delta)
+                version = latest + 1
+                snapshot = None
+                if version % CHECKPOINT_INTERVAL == 0:
+                    snapshot = _pack([[list(key), row] for key, row in state.items()])
+                conn.execute(
+                    "INSERT INTO grade_history (account, version, recorded_at, delta, snapshot) VALUES (?, ?, ?, ?, ?)",
+                    (account, version, recorded_at, _pack(delta), snapshot),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._latest.pop(account, None)
+                raise
+            self._latest[account] = (version, state)
+            return version
+
+    # ---------- 查询 ----------
+    def versions(self, username):
+        """[(版本号, 记录时间戳), ...]，按版本升序"""
+        return self._connect().execute(
+            "SELECT version, recorded_at FROM grade_history WHERE account = ? ORDER BY version",
+            (cacheStore.account_key(username),),
+        ).fetchall()
+
+    def state_at(self, username, when=None):
+        """when（datetime 或时间戳，默认当前）时刻的成绩列表；此前没有任何记录时返回 None"""
+        account = cacheStore.account_key(username)
+        conn = self._connect()
+        when = time.time() if when is None else _to_timestamp(when)
+        row = conn.execute(
+            "SELECT MAX(version) FROM grade_history WHERE account = ? AND recorded_at <= ?", (account, when)
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return list(self._load_state(conn, account, row[0]).values())
+
+    def changes(self, username, since=None, until=None):
+        """since 之后（不含）到 until（含）之间每个版本的变化
+
+        Returns:
+            list: [{"version", "recorded_at", "added": [...], "changed": [{"old", "new"}], "removed": [...]}]
+        """
+        account = cacheStore.account_key(username)
+        conn = self._connect()
+        since = _to_timestamp(since)
+        until = _to_timestamp(until)
+        (before,) = conn.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM grade_history WHERE account = ? AND recorded_at <= ?",
+            (account, since if since is not None else float("-inf")),
+        ).fetchone()
+        state = self._load_state(conn, account, before)
+        old_rows = list(state.values())
+
+        result = []
+        for version, recorded_at, delta in conn.execute(
+            "SELECT version, recorded_at, delta FROM grade_history "
+            "WHERE account = ? AND version > ? AND recorded_at <= ? ORDER BY version",
+            (account, before, until if until is not None else float("inf")),
+        ).fetchall():
+            _apply_delta(state, _unpack(delta))
+            new_rows = list(state.values())
+            change = compute_delta(old_rows, new_rows, self.key_fields)
+            change.update(version=version, recorded_at=recorded_at)
+            result.append(change)
+            old_rows = new_rows
+        return result
+
+    def timeline(self, username, key):
+        """某门课程（主键值，如 (学期, 课程编号)）的变化过程
+
+        Returns:
+            list: [(记录时间戳, 条目或 None（被删除）), ...]，只包含该课程发生变化的版本
+        """
+        key = list(key)
+        account = cacheStore.account_key(username)
+        result = []
+        for recorded_at, delta in self._connect().execute(
+            "SELECT recorded_at, delta FROM grade_history WHERE account = ? ORDER BY version", (account,)
+        ):
+            delta = _unpack(delta)
+            if key in delta["removed"]:
+                result.append((recorded_at, None))
+            for put_key, row in delta["put"]:
+                if put_key == key:
+                    result.append((recorded_at, row))
+        return result
+
+
+# ===== 4. 共享实例 =====
+_histories = {}
+_histories_lock = threading.Lock()
+
+
+def get_history(store):
+    """store 对应的共享 GradeHistory"""
+    with _histories_lock:
+        history = _histories.get(store.path)
+        if history is None or history.store is not store:
+            history = _histories[store.path] = GradeHistory(store)
+        return history
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+仅 IPv4 的 HTTP 适配器模块
+
+- DnsCache：带 TTL 的 IPv4 解析缓存，同一主机在 TTL 内只解析一次
+- IPv4Adapter：requests 适配器，其连接池中的连接只通过缓存解析出的 IPv4 地址建立，
+  不修改 urllib3 的全局设置，不影响宿主进程中的其他 HTTP 客户端
+- prewarm()：在定时获取前预先建立到教务服务器的 TLS 连接，放入共享连接池备用
+
+插件的所有会话共用同一个适配器（连接池），Cookie 仍由各自的 Session 保存。
+"""
+import ipaddress
+import socket
+import threading
+import time
+
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.poolmanager import PoolManager
+
+import metrics
+
+# ===== 1. 常量定义 =====
+# 解析结果缓存时间（秒）
+DEFAULT_DNS_TTL = 300
+METRIC_SOURCE = "resolver"
+
+
+# ===== 2. DNS 解析缓存 =====
+class DnsCache:
+    """线程安全的 IPv4 解析缓存
+
+    Args:
+        ttl: 解析结果的有效期（秒）
+    """
+
+    def __init__(self, ttl=DEFAULT_DNS_TTL):
+        self.ttl = ttl
+        self._entries = {}  # host -> (地址列表, 过期时间)
+        self._lock = threading.Lock()
+
+    def resolve(self, host, port=443):
+        """返回 host 的 IPv4 地址列表，解析失败时抛出 socket.gaierror"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(host)
+        if entry and entry[1] > now:
+            metrics.inc("cache_hits", cache="dns", source=METRIC_SOURCE)
+            return entry[0]
+
+        metrics.inc("cache_misses", cache="dns", source=METRIC_SOURCE)
+        with metrics.timed("dns", source=METRIC_SOURCE):
+            infos = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        with self._lock:
+            self._entries[host] = (addresses, time.monotonic() + self.ttl)
+        return addresses
+
+    def invalidate(self, host=None):
+        """丢弃 host 的解析结果（None 表示全部丢弃）"""
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(host, None)
+
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+# ===== 3. 仅 IPv4 的连接 =====
+class _IPv4ConnectionMixin:
+    """通过 DnsCache 解析出的 IPv4 地址建立 TCP 连接
+
+    只替换连接的目标地址，Host 请求头、TLS 的 SNI 和证书校验仍使用原主机名。
+    """
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        self.resolver = resolver
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        host = self._dns_host
+        if self.resolver is None or _is_ip_address(host):
+            return super()._new_conn()
+
+        try:
+            addresses = self.resolver.resolve(host, self.port)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f"Failed to resolve {host} to an IPv4 address: {e}") from e
+
+        last_error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except ConnectTimeoutError as e:  # 包括 NewConnectionError
+                last_error = e
+            finally:
+                self._dns_host = host
+        # 所有地址都无法连接，可能是解析结果已过时
+        self.resolver.invalidate(host)
+        raise last_error
+
+
+class IPv4HTTPConnection(_IPv4ConnectionMixin, HTTPConnection):
+    pass
+
+
+class IPv4HTTPSConnection(_IPv4ConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _IPv4PoolManager(PoolManager):
+    CONNECTION_CLASSES = {"http": IPv4HTTPConnection, "https": IPv4HTTPSConnection}
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        self.resolver = resolver
+        super().__init__(*args, **kwargs)
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context)
+        pool.ConnectionCls = self.CONNECTION_CLASSES[scheme]
+        pool.conn_kw["resolver"] = self.resolver
+        return pool
+
+
+# ===== 4. 适配器 =====
+class IPv4Adapter(requests.adapters.HTTPAdapter):
+    """只使用 IPv4 连接的 requests 适配器（不修改 urllib3 的全局设置）
+
+    Args:
+        resolver: DnsCache 实例，默认使用模块共享的 DNS_CACHE
+    """
+
+    def __init__(self, resolver=None, **kwargs):
+        self.resolver = resolver or DNS_CACHE
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _IPv4PoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, resolver=self.resolver, **pool_kwargs
+        )
+
+    def __setstate__(self, state):
+        # 反序列化时 HTTPAdapter 会调用 init_poolmanager，需先恢复 resolver
+        self.resolver = DNS_CACHE
+        super().__setstate__(state)
+
+
+DNS_CACHE = DnsCache()
+_shared_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def get_adapter():
+    """插件共享的 IPv4Adapter（所有会话共用一个连接池，预热的连接可被后续登录直接使用）"""
+    global _shared_adapter
+    with _adapter_lock:
+        if _shared_adapter is None:
+            _shared_adapter = IPv4Adapter()
+        return _shared_adapter
+
+
+# ===== 5. 连接预热 =====
+def prewarm(url, timeout=10):
+    """预先解析 url 的主机并在共享连接池中建立一条连接（HTTPS 时包括 TLS 握手）
+
+    应在定时获取前不久调用（服务器会关闭长时间空闲的连接）。不发送任何 HTTP 请求。
+
+    Returns:
+        bool: 是否成功建立连接
+    """
+    adapter = get_adapter()
+    # 按 Session 发送请求时的方式取连接池：池的键包含 TLS 校验参数，
+    # 而 verify / proxies 可能来自环境变量（REQUESTS_CA_BUNDLE、HTTPS_PROXY 等）
+    settings = requests.Session().merge_environment_settings(url, {}, None, None, None)
+    if hasattr(adapter, "get_connection_with_tls_context"):
+        request = requests.Request("GET", url).prepare()
+        pool = adapter.get_connection_with_tls_context(request, settings["verify"], settings["proxies"],
+                                                       settings["cert"])
+    else:
+        pool = adapter.get_connection(url, settings["proxies"])
+    conn = pool._get_conn()
+    try:
+        if conn.sock is None:
+            conn.timeout = timeout
+            conn.connect()
+        return True
+    except Exception:
+        conn.close()
+        conn = None
+        return False
+    finally:
+        pool._put_conn(conn)
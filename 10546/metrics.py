@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标模块
+
+记录获取流程各阶段的耗时（DNS 解析、登录请求、页面请求、缓存读写、解析）和计数
+（缓存命中/未命中、登录失败、下载字节数），可注册回调实时接收，也可导出为 Prometheus 文本格式。
+
+用法：
+    import metrics
+    metrics.add_listener(lambda kind, name, value, labels: print(kind, name, value, labels))
+    ...
+    print(metrics.export_prometheus())
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ===== 1. 常量定义 =====
+METRIC_PREFIX = "capture_push"
+STAGE_METRIC = "stage_duration_seconds"
+
+# 回调收到的事件类型
+KIND_COUNTER = "counter"
+KIND_TIMING = "timing"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+# ===== 2. 指标注册表 =====
+class MetricsRegistry:
+    """线程安全的计数器与阶段耗时注册表
+
+    回调签名为 callback(kind, name, value, labels)：kind 为 "counter" 或 "timing"，
+    计数器的 value 为增量，耗时的 value 为秒数。回调抛出的异常会被忽略，不影响获取流程。
+    """
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}   # name -> {label_key: value}
+        self._stages = {}     # stage -> {label_key: [count, sum, max]}
+        self._listeners = []
+
+    # ----- 回调 -----
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify(self, kind, name, value, labels):
+        for callback in list(self._listeners):
+            try:
+                callback(kind, name, value, labels)
+            except Exception:
+                pass
+
+    # ----- 记录 -----
+    def inc(self, name, value=1, **labels):
+        """计数器 name 增加 value"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+        self._notify(KIND_COUNTER, name, value, labels)
+
+    def observe(self, stage, seconds, **labels):
+        """记录阶段 stage 的一次耗时"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._stages.setdefault(stage, {})
+            entry = series.get(key)
+            if entry is None:
+                series[key] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+        self._notify(KIND_TIMING, stage, seconds, labels)
+
+    @contextmanager
+    def timed(self, stage, **labels):
+        """记录 with 块的耗时（块内抛出异常时同样记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._stages.clear()
+
+    # ----- 读取与导出 -----
+    def snapshot(self):
+        """返回当前指标的副本
+
+        Returns:
+            dict: {"counters": {name: [(labels, value), ...]},
+                   "stages": {stage: [(labels, {"count": n, "sum": 秒, "max": 秒}), ...]}}
+        """
+        with self._lock:
+            counters = {
+                name: [(dict(key), value) for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            stages = {
+                stage: [(dict(key), {"count": e[0], "sum": e[1], "max": e[2]}) for key, e in series.items()]
+                for stage, series in self._stages.items()
+            }
+        return {"counters": counters, "stages": stages}
+
+    def export_prometheus(self):
+        """导出为 Prometheus 文本格式（计数器为 *_total，阶段耗时为 summary 的 _count/_sum）"""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                metric = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+
+            if self._stages:
+                metric = f"{self.prefix}_{STAGE_METRIC}"
+                lines.append(f"# HELP {metric} Duration of fetch pipeline stages.")
+                lines.append(f"# TYPE {metric} summary")
+                for stage in sorted(self._stages):
+                    for key, (count, total, _) in sorted(self._stages[stage].items()):
+                        labels = _format_labels(_label_key({**dict(key), "stage": stage}))
+                        lines.append(f"{metric}_count{labels} {count}")
+                        lines.append(f"{metric}_sum{labels} {total:.6f}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def write_prometheus(self, path):
+        """把 Prometheus 文本写入文件（供 node_exporter textfile collector 采集）"""
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(self.export_prometheus())
+        os.replace(tmp_file, path)
+
+
+# ===== 3. 默认注册表 =====
+REGISTRY = MetricsRegistry()
+
+
+def add_listener(callback):
+    REGISTRY.add_listener(callback)
+
+
+def remove_listener(callback):
+    REGISTRY.remove_listener(callback)
+
+
+def inc(name, value=1, **labels):
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(stage, seconds, **labels):
+    REGISTRY.observe(stage, seconds, **labels)
+
+
+def timed(stage, **labels):
+    return REGISTRY.timed(stage, **labels)
+
+
+def snapshot():
+    return REGISTRY.snapshot()
+
+
+def reset():
+    REGISTRY.reset()
+
+
+def export_prometheus():
+    return REGISTRY.export_prometheus()
+
+
+def write_prometheus(path):
+    REGISTRY.write_prometheus(path)
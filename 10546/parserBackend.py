@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+HTML 解析后端模块
+
+parse_grades / parse_schedule 通过本模块从页面中取出表格内容：
+- "html.parser"：BeautifulSoup 全文解析，作为参考实现
+- "lxml"：只截取目标表格（table#dataList / table#timetable）交给 lxml 解析，速度快一个数量级
+
+两种后端的输出保持一致。lxml 为可选依赖，未安装时回退到 html.parser。
+bs4 与 lxml 在首次使用对应后端时才导入。
+"""
+import re
+
+# 延迟导入的模块：None 表示尚未导入，False 表示 lxml 未安装
+_bs4 = None
+_lxml_etree = None
+
+
+def _import_bs4():
+    global _bs4, _TEXT_TYPES
+    if _bs4 is None:
+        import bs4
+        # 计入文本的节点类型（与 get_text 的默认行为一致，不含注释）
+        _TEXT_TYPES = (bs4.NavigableString, bs4.CData)
+        _bs4 = bs4
+    return _bs4
+
+
+def _import_lxml():
+    """返回 lxml.etree 模块，未安装时返回 None"""
+    global _lxml_etree
+    if _lxml_etree is None:
+        try:
+            import lxml.etree
+            _lxml_etree = lxml.etree
+        except ImportError:
+            _lxml_etree = False
+    return _lxml_etree or None
+
+# ===== 1. 后端选择 =====
+BACKEND_BS4 = "html.parser"
+BACKEND_LXML = "lxml"
+BACKENDS = (BACKEND_BS4, BACKEND_LXML)
+
+DEFAULT_BACKEND = BACKEND_BS4
+
+
+def set_default_backend(backend):
+    """设置 parse_grades / parse_schedule 未指定 backend 时使用的解析后端"""
+    global DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的解析后端: {backend}")
+    DEFAULT_BACKEND = backend
+
+
+def resolve_backend(backend=None):
+    """返回实际使用的解析后端（lxml 未安装时回退到 html.parser）"""
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的解析后端: {backend}")
+    if backend == BACKEND_LXML and _import_lxml() is None:
+        return BACKEND_BS4
+    return backend
+
+
+# ===== 2. 目标表格截取 =====
+_TABLE_TAG_RE = re.compile(r"<(/?)table\b[^>]*>", re.IGNORECASE)
+
+
+def extract_table_html(html, table_id):
+    """截取 id 为 table_id 的 <table> 源码（含嵌套表格），未找到返回 None"""
+    start_re = re.compile(
+        r"<table\b[^>]*\bid\s*=\s*(?:\"%s\"|'%s'|%s(?=[\s>/]))[^>]*>" % ((re.escape(table_id),) * 3),
+        re.IGNORECASE,
+    )
+    start = start_re.search(html)
+    if not start:
+        return None
+
+    depth = 1
+    for match in _TABLE_TAG_RE.finditer(html, start.end()):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return html[start.start():match.end()]
+    # 表格未闭合时截取到文档末尾，与 html.parser 的容错行为一致
+    return html[start.start():]
+
+
+# ===== 3. lxml 辅助函数 =====
+# 不计入文本的元素（与 BeautifulSoup get_text 的默认行为一致）
+_SKIP_TEXT_TAGS = ("script", "style", "template")
+
+
+def _lxml_parse(html):
+    # 使用 etree 的 HTMLParser 而不是 lxml.html，省去自定义元素类的查找开销
+    etree = _import_lxml()
+    parser = etree.HTMLParser(encoding="utf-8")
+    return etree.fromstring(html.encode("utf-8"), parser)
+
+
+def _lxml_find_table(html, table_id):
+    fragment = extract_table_html(html, table_id)
+    if fragment is None:
+        return None
+    # 只解析目标表格；截取结果无法定位表格时回退到全文解析
+    for source in (fragment, html):
+        root = _lxml_parse(source)
+        if root is None:
+            continue
+        tables = root.xpath("//table[@id=$id]", id=table_id)
+        if tables:
+            return tables[0]
+    return None
+
+
+def _lxml_strings(element):
+    """按文档顺序遍历元素内的文本节点（跳过注释和脚本）"""
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            yield from _lxml_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _lxml_text(element):
+    """等价于 BeautifulSoup 的 get_text(strip=True)"""
+    if len(element) == 0:
+        return element.text.strip() if element.text else ""
+    return "".join(s.strip() for s in _lxml_strings(element))
+
+
+def _lxml_events(element):
+    """把元素内容转换为事件序列，供 split_course_blocks 使用"""
+    if element.text:
+        yield ("text", element.text)
+    for child in element:
+        if isinstance(child.tag, str):
+            if child.tag == "br":
+                yield ("br", dict(child.attrib))
+            else:
+                yield ("start", child.tag, dict(child.attrib))
+                if child.tag not in _SKIP_TEXT_TAGS:
+                    yield from _lxml_events(child)
+                yield ("end", child.tag)
+        if child.tail:
+            yield ("text", child.tail)
+
+
+def _lxml_find_kbcontent(td):
+    for div in td.iter("div"):
+        classes = (div.get("class") or "").split()
+        style = div.get("style")
+        if "kbcontent" in classes and style and "none" in style.lower():
+            return div
+    return None
+
+
+# ===== 4. 课程块切分 =====
+# 课程块分隔符：文本以至少 5 个减号结尾，且紧跟一个无属性的 <br>
+_SEPARATOR_RE = re.compile(r"-{5,}\Z")
+# 需要提取的 <font title="..."> 字段
+_FONT_FIELDS = {"教师": "teacher", "教室": "room"}
+
+
+def _new_block():
+    return {"lines": [], "teacher": None, "room": None, "captures": []}
+
+
+def _finish_block(block, blocks):
+    for field, _, parts in block["captures"]:
+        block[field] = "".join(parts)
+    if len(block["lines"]) >= 2:
+        blocks.append((block["lines"], block["teacher"] or "", block["room"] or ""))
+
+
+def _add_text(block, text):
+    stripped = text.strip()
+    if not stripped:
+        return
+    for line in stripped.split("\n"):
+        line = line.strip()
+        if line:
+            block["lines"].append(line)
+    for capture in block["captures"]:
+        capture[2].append(stripped)
+
+
+def split_course_blocks(events):
+    """按 ----- 分隔符把单元格内容切分为课程块
+
+    Args:
+        events: 事件序列 ("text", 文本) / ("br", 属性) / ("start", 标签, 属性) / ("end", 标签)
+
+    Returns:
+        list: [(文本行列表, 教师, 教室), ...]，只保留至少两行文本的课程块
+    """
+    events = list(events)
+    blocks = []
+    block = _new_block()
+    i = 0
+    while i < len(events):
+        event = events[i]
+        kind = event[0]
+        if kind == "text":
+            text = event[1]
+            following = events[i + 1] if i + 1 < len(events) else None
+            if following and following[0] == "br" and not following[1] and _SEPARATOR_RE.search(text):
+                _add_text(block, text.rstrip("-"))
+                _finish_block(block, blocks)
+                block = _new_block()
+                i += 2
+                continue
+            _add_text(block, text)
+        elif kind == "start":
+            for capture in block["captures"]:
+                capture[1] += 1
+            field = _FONT_FIELDS.get(event[2].get("title")) if event[1] == "font" else None
+            if field and block[field] is None and all(c[0] != field for c in block["captures"]):
+                block["captures"].append([field, 1, []])
+        elif kind == "end":
+            remaining = []
+            for capture in block["captures"]:
+                capture[1] -= 1
+                if capture[1] == 0:
+                    block[capture[0]] = "".join(capture[2])
+                else:
+                    remaining.append(capture)
+            block["captures"] = remaining
+        i += 1
+    _finish_block(block, blocks)
+    return blocks
+
+
+# ===== 5. 成绩表格 =====
+def _bs4_grade_rows(html):
+    soup = _import_bs4().BeautifulSoup(html, "html.parser")
+    table = soup.find("table", id="dataList")
+    if not table:
+        return None
+    return [
+        [td.get_text(strip=True) for td in row.find_all("td")]
+        for row in table.find_all("tr")[1:]  # 跳过表头
+    ]
+
+
+def _lxml_grade_rows(html):
+    table = _lxml_find_table(html, "dataList")
+    if table is None:
+        return None
+    return [
+        [_lxml_text(td) for td in row.iter("td")]
+        for row in list(table.iter("tr"))[1:]  # 跳过表头
+    ]
+
+
+def extract_grade_rows(html, backend=None):
+    """取出 table#dataList 中表头以外每一行的单元格文本，未找到表格返回 None"""
+    if resolve_backend(backend) == BACKEND_LXML:
+        return _lxml_grade_rows(html)
+    return _bs4_grade_rows(html)
+
+
+# ===== 6. 课表表格 =====
+_TEXT_TYPES = ()  # 导入 bs4 时设置
+
+
+def _is_hidden_style(style):
+    return style and "none" in style.lower()
+
+
+def _bs4_events(tag):
+    """把 BeautifulSoup 节点内容转换为事件序列，供 split_course_blocks 使用"""
+    for child in tag.children:
+        if isinstance(child, _bs4.Tag):
+            if child.name == "br":
+                yield ("br", child.attrs)
+            else:
+                yield ("start", child.name, child.attrs)
+                if child.name not in _SKIP_TEXT_TAGS:
+                    yield from _bs4_events(child)
+                yield ("end", child.name)
+        elif type(child) in _TEXT_TYPES:
+            yield ("text", str(child))
+
+
+def _bs4_cell_blocks(td):
+    full_div = td.find("div", class_="kbcontent", style=_is_hidden_style)
+    if not full_div:
+        return []
+    # 单次遍历节点树切分课程块，不再序列化后重新解析每个课程块
+    return split_course_blocks(_bs4_events(full_div))
+
+
+def _bs4_schedule_rows(html):
+    soup = _import_bs4().BeautifulSoup(html, "html.parser")
+    table = soup.find("table", id="timetable")
+    if not table:
+        return None
+    rows = []
+    for row in table.find_all("tr")[1:]:
+        tds = row.find_all("td")
+        rows.append([_bs4_cell_blocks(td) for td in tds[:7]] if len(tds) >= 7 else None)
+    return rows
+
+
+def _lxml_cell_blocks(td):
+    full_div = _lxml_find_kbcontent(td)
+    if full_div is None:
+        return []
+    return split_course_blocks(_lxml_events(full_div))
+
+
+def _lxml_schedule_rows(html):
+    table = _lxml_find_table(html, "timetable")
+    if table is None:
+        return None
+    rows = []
+    for row in list(table.iter("tr"))[1:]:
+        tds = list(row.iter("td"))
+        rows.append([_lxml_cell_blocks(td) for td in tds[:7]] if len(tds) >= 7 else None)
+    return rows
+
+
+def extract_schedule_rows(html, backend=None):
+    """取出 table#timetable 表头以外每一行的课程块
+
+    Returns:
+        list: 每行为 7 个单元格（星期一至星期日）的课程块列表 [(文本行列表, 教师, 教室), ...]；
+              单元格不足 7 个的行为 None；未找到表格返回 None
+    """
+    if resolve_backend(backend) == BACKEND_LXML:
+        return _lxml_schedule_rows(html)
+    return _bs4_schedule_rows(html)
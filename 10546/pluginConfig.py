@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+配置快照模块
+
+插件各模块共用一份解析好的配置，只有配置文件的修改时间或大小变化时才重新读取，
+长驻进程中修改配置无需重启即可生效。
+"""
+import random
+import sys
+import threading
+from pathlib import Path
+
+# 添加项目根目录到 sys.path（确保能找到 core 模块）
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+# ===== 1. 常量定义 =====
+RUN_MODES = ('DEV', 'BUILD')
+DEFAULT_RUN_MODE = 'BUILD'
+DEFAULT_LOOP_ENABLED = False
+DEFAULT_LOOP_INTERVAL = 3600
+# 循环检测模式：fixed 固定间隔；adaptive 根据页面变化自适应调整间隔
+LOOP_MODES = ('fixed', 'adaptive')
+DEFAULT_LOOP_MODE = 'fixed'
+# 自适应模式：页面变化后使用 min_time，此后每次未变化间隔乘以 backoff，最长 max_time，
+# 并随机浮动 ±jitter（比例），避免多个实例同时请求
+DEFAULT_MIN_INTERVAL = 300
+DEFAULT_MAX_INTERVAL = 86400
+DEFAULT_BACKOFF = 2.0
+DEFAULT_JITTER = 0.1
+# 支持循环检测的模块（配置节名为 loop_<模块名>）
+LOOP_MODULES = ('getCourseGrades', 'getCourseSchedule')
+
+
+# ===== 2. 配置快照 =====
+class LoopConfig:
+    """循环检测配置
+
+    Attributes:
+        enabled: 是否启用
+        interval: 固定模式的更新间隔（秒）
+        mode: 'fixed' 或 'adaptive'
+        min_interval / max_interval: 自适应模式的最短 / 最长间隔（秒）
+        backoff: 自适应模式下页面每连续一次未变化，间隔乘以的倍数
+        jitter: 自适应间隔的随机浮动比例
+    """
+
+    def __init__(self, enabled=DEFAULT_LOOP_ENABLED, interval=DEFAULT_LOOP_INTERVAL, mode=DEFAULT_LOOP_MODE,
+                 min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 backoff=DEFAULT_BACKOFF, jitter=DEFAULT_JITTER):
+        self.enabled = enabled
+        self.interval = interval
+        self.mode = mode
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = max(1.0, backoff)
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    @property
+    def adaptive(self):
+        return self.mode == 'adaptive'
+
+    def next_interval(self, unchanged_count=0, seed=None):
+        """距上次获取多久后再次获取（秒）
+
+        Args:
+            unchanged_count: 页面连续未变化的获取次数（0 表示上次获取时页面有变化）
+            seed: 随机浮动的种子；同一次获取应使用相同的种子（如获取时间），
+                  保证两次获取之间反复检查时得到相同的间隔
+        """
+        if not self.adaptive:
+            return self.interval
+        try:
+            interval = min(self.min_interval * self.backoff ** unchanged_count, self.max_interval)
+        except OverflowError:  # 连续未变化次数很大
+            interval = self.max_interval
+        if self.jitter:
+            interval *= 1 + random.Random(seed).uniform(-self.jitter, self.jitter)
+        return interval
+
+    def __iter__(self):
+        # 支持 enabled, interval = loop_config
+        return iter((self.enabled, self.interval))
+
+    def __repr__(self):
+        if self.adaptive:
+            return (f"LoopConfig(enabled={self.enabled}, mode=adaptive, min={self.min_interval}, "
+                    f"max={self.max_interval}, backoff={self.backoff}, jitter={self.jitter})")
+        return f"LoopConfig(enabled={self.enabled}, interval={self.interval})"
+
+
+class ConfigSnapshot:
+    """某一时刻配置文件的解析结果（只读）
+
+    Attributes:
+        run_mode: 'DEV' 或 'BUILD'（未知值按 BUILD 处理）
+        loops: {模块名: LoopConfig}
+        username / password: [account] 节中的账号密码，未设置时为空字符串
+        warnings: 解析过程中使用了默认值的字段说明
+    """
+
+    def __init__(self, config):
+        self.warnings = []
+
+        mode = config.get('run_model', 'model', fallback=DEFAULT_RUN_MODE).strip().upper()
+        if mode not in RUN_MODES:
+            self.warnings.append(f"未知运行模式 '{mode}'，默认使用 {DEFAULT_RUN_MODE}")
+            mode = DEFAULT_RUN_MODE
+        self.run_mode = mode
+
+        self.loops = {}
+        for module in LOOP_MODULES:
+            section = f"loop_{module}"
+            try:
+                loop_mode = config.get(section, 'mode', fallback=DEFAULT_LOOP_MODE).strip().lower()
+                if loop_mode not in LOOP_MODES:
+                    self.warnings.append(f"[{section}] 未知模式 '{loop_mode}'，默认使用 {DEFAULT_LOOP_MODE}")
+                    loop_mode = DEFAULT_LOOP_MODE
+                self.loops[module] = LoopConfig(
+                    config.getboolean(section, 'enabled', fallback=DEFAULT_LOOP_ENABLED),
+                    config.getint(section, 'time', fallback=DEFAULT_LOOP_INTERVAL),
+                    loop_mode,
+                    config.getint(section, 'min_time', fallback=DEFAULT_MIN_INTERVAL),
+                    config.getint(section, 'max_time', fallback=DEFAULT_MAX_INTERVAL),
+                    config.getfloat(section, 'backoff', fallback=DEFAULT_BACKOFF),
+                    config.getfloat(section, 'jitter', fallback=DEFAULT_JITTER),
+                )
+            except ValueError as e:
+                self.warnings.append(f"读取 [{section}] 失败: {e}，使用默认值")
+                self.loops[module] = LoopConfig()
+
+        self.username = config.get('account', 'username', fallback='')
+        self.password = config.get('account', 'password', fallback='')
+
+    def loop(self, module):
+        """模块的循环检测配置"""
+        return self.loops.get(module) or LoopConfig()
+
+
+# ===== 3. 快照缓存 =====
+_lock = threading.Lock()
+_cache = {"key": None, "snapshot": None}
+
+
+def _get_file_key(path):
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_config(logger=None):
+    """返回当前配置快照，配置文件未变化时不重新读取
+
+    Args:
+        logger: 重新读取时用于记录日志和默认值提示的日志对象
+    """
+    from core.log import get_config_path
+    from core.config_manager import load_config
+
+    key = _get_file_key(Path(get_config_path()))
+    with _lock:
+        if _cache["snapshot"] is not None and _cache["key"] == key:
+            return _cache["snapshot"]
+
+        snapshot = ConfigSnapshot(load_config())
+        _cache["key"] = key
+        _cache["snapshot"] = snapshot
+
+    if logger:
+        logger.info(f"已加载配置: run_model={snapshot.run_mode}, "
+                    + ", ".join(f"{m}={snapshot.loops[m]}" for m in LOOP_MODULES))
+        for warning in snapshot.warnings:
+            logger.warning(warning)
+    return snapshot
+
+
+def invalidate():
+    """丢弃缓存的快照，下次调用 get_config() 时重新读取"""
+    with _lock:
+        _cache["key"] = None
+        _cache["snapshot"] = None
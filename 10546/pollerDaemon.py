@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+常驻轮询模块
+
+在一个长驻进程中为一个或多个账号定时获取成绩和/或课表，代替每次启动一次 main()：
+导入、配置快照、登录会话（SessionManager）和连接池只在进程内初始化一次，之后每轮复用。
+
+每个 (账号, 类型) 按各自的循环检测配置安排下次获取时间（自适应模式下由页面变化情况决定），
+到期前先预热到教务服务器的连接。结果通过回调函数和/或队列交付：
+
+    poller = Poller([("20230001", "password")], callback=print)
+    poller.start()       # 后台线程运行；poller.stop() 停止
+    poller.run_forever() # 或在当前线程运行，直到 stop() / Ctrl+C
+
+交付的结果为 dict：
+    {"username": 学号, "kind": "grades"/"schedule", "data": 解析结果或 None,
+     "changed": 本次从网络获取且数据与上次不同, "fetched_at": 获取时间戳, "error": 错误信息或 None}
+"""
+import heapq
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 添加项目根目录到 sys.path（确保能找到 core 模块）
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from core.log import init_logger
+
+import getCourseGrades
+import getCourseSchedule
+import metrics
+import pluginConfig
+from batchFetch import DEFAULT_BURST, DEFAULT_MAX_WORKERS, DEFAULT_RATE, TokenBucket, fetch_kind
+
+logger = init_logger('pollerDaemon')
+
+# ===== 1. 常量定义 =====
+# 获取失败后的重试间隔（秒）
+RETRY_INTERVAL = 300
+# 两次获取之间的最短间隔（秒），防止缓存时间异常时连续获取
+MIN_POLL_INTERVAL = 30
+# 到期前多少秒预热连接
+PREWARM_LEAD = 5
+# 空闲时最长等待时间（秒），期间仍可被 stop() / add_account() 唤醒
+IDLE_WAIT = 60
+
+# 获取类型 -> (模块, 是否需要更新的判断函数, 读取缓存解析结果的函数)
+POLLERS = {
+    "grades": (getCourseGrades, getCourseGrades.should_update_grades, getCourseGrades.load_parsed_grades),
+    "schedule": (getCourseSchedule, getCourseSchedule.should_update_schedule,
+                 getCourseSchedule.load_parsed_schedule),
+}
+
+
+# ===== 2. 轮询器 =====
+class Poller:
+    """常驻轮询器
+
+    Args:
+        accounts: 账号列表，元素为 (username, password) 或 {"username": ..., "password": ...}；
+                  None 表示使用配置文件 [account] 节中的账号
+        kinds: 要获取的数据类型，可选 "grades"、"schedule"
+        callback: 每次获取完成后以结果 dict 调用（在工作线程中调用，应尽快返回）
+        result_queue: 每次获取完成后放入结果 dict 的队列（如 queue.Queue）
+        max_workers: 同时获取的最大数量
+        rate / burst: 对教务服务器的平均请求速率（次/秒）与突发上限
+        prewarm: 到期前是否预热连接
+    """
+
+    def __init__(self, accounts=None, kinds=("grades", "schedule"), callback=None, result_queue=None,
+                 max_workers=DEFAULT_MAX_WORKERS, rate=DEFAULT_RATE, burst=DEFAULT_BURST, prewarm=True):
+        for kind in kinds:
+            if kind not in POLLERS:
+                raise ValueError(f"未知的获取类型: {kind}")
+        self.kinds = tuple(kinds)
+        self.callback = callback
+        self.result_queue = result_queue
+        self.max_workers = max_workers
+        self.prewarm = prewarm
+        self._bucket = TokenBucket(rate, burst)
+        self._accounts = {}  # username -> (password, 添加序号)
+        self._heap = []  # (到期时间, 序号, username, kind, 添加序号)
+        self._counter = 0
+        self._running = set()  # 正在获取的 (username, kind)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        if accounts is None:
+            config = pluginConfig.get_config(logger)
+            accounts = [(config.username, config.password)] if config.username else []
+        for account in accounts:
+            if isinstance(account, dict):
+                self.add_account(account["username"], account["password"])
+            else:
+                self.add_account(*account)
+
+    # ---------- 账号管理 ----------
+    def add_account(self, username, password):
+        """添加（或更新密码）一个账号，按缓存情况安排首次获取"""
+        with self._lock:
+            current = self._accounts.get(username)
+            if current is None:
+                # 添加序号区分移除后重新添加的账号，移除前安排的任务不再执行
+                self._counter += 1
+                generation = self._counter
+            else:
+                generation = current[1]
+            self._accounts[username] = (password, generation)
+        if current is None:
+            for kind in self.kinds:
+                self._schedule(username, kind, generation, self._initial_due(username, kind))
+        self._wakeup.set()
+
+    def remove_account(self, username):
+        """移除账号，已安排的获取不再执行"""
+        with self._lock:
+            self._accounts.pop(username, None)
+        self._wakeup.set()
+
+    def accounts(self):
+        with self._lock:
+            return list(self._accounts)
+
+    # ---------- 调度 ----------
+    def _schedule(self, username, kind, generation, due):
+        with self._lock:
+            self._counter += 1
+            heapq.heappush(self._heap, (due, self._counter, username, kind, generation))
+
+    def _initial_due(self, username, kind):
+        module = POLLERS[kind][0]
+        try:
+            return module.next_update_time(username)
+        except Exception as e:
+            logger.warning(f"计算账号 {username} {kind} 的下次获取时间失败: {e}，立即获取")
+            return time.time()
+
+    def _next_due(self, username, kind, ok):
+        """一次获取结束后的下次获取时间"""
+        module = POLLERS[kind][0]
+        if not ok:
+            return time.time() + RETRY_INTERVAL
+        loop = module.get_loop_config()
+        entry = module.get_cache_entry(username)
+        if entry is None:
+            return time.time() + RETRY_INTERVAL
+        # 常驻模式本身就是循环，未启用循环检测时按固定间隔获取。
+        # DEV 模式下缓存不会更新，从本次读取的时间起算，否则到期时间总在过去
+        start = time.time() if module.run_mode() == 'DEV' else entry.fetched_at
+        due = start + module.get_update_interval(loop, entry)
+        return max(due, time.time() + MIN_POLL_INTERVAL)
+
+    def _pop_due(self, now):
+        """取出所有已到期的任务，返回 (到期任务列表, 下一个任务的到期时间或 None)"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, username, kind, generation = heapq.heappop(self._heap)
+                current = self._accounts.get(username)
+                if current is not None and current[1] == generation and (username, kind) not in self._running:
+                    self._running.add((username, kind))
+                    due.append((username, kind, generation))
+            next_due = self._heap[0][0] if self._heap else None
+        return due, next_due
+
+    # ---------- 获取 ----------
+    def _poll(self, username, kind, generation):
+        module, should_update, load_parsed = POLLERS[kind]
+        result = {"username": username, "kind": kind, "data": None, "changed": False,
+                  "fetched_at": None, "error": None}
+        ok = False
+        try:
+            with self._lock:
+                password = self._accounts.get(username, (None, None))[0]
+            if password is not None:
+                fetched = False
+                with metrics.timed("poll", source=module.METRIC_SOURCE):
+                    # DEV 模式只读取缓存；缓存未达到更新间隔时同样不发起网络请求
+                    if module.run_mode() == 'DEV' or not should_update(username):
+                        result["data"] = load_parsed(username)
+                    if result["data"] is None and module.run_mode() != 'DEV':
+                        result["data"], result["error"] = fetch_kind(username, password, kind, self._bucket)
+                        fetched = True
+                ok = result["data"] is not None
+                if ok:
+                    entry = module.get_cache_entry(username)
+                    if entry is not None:
+                        result["fetched_at"] = entry.fetched_at
+                        result["changed"] = fetched and entry.unchanged_count == 0
+                elif result["error"] is None:
+                    result["error"] = "本地缓存不可用" if not fetched else "获取失败"
+        except Exception as e:
+            logger.error(f"账号 {username} 获取 {kind} 异常: {e}")
+            result["error"] = str(e)
+
+        if not ok:
+            metrics.inc("poll_failures", source=module.METRIC_SOURCE)
+        with self._lock:
+            self._running.discard((username, kind))
+            current = self._accounts.get(username)
+            still_active = current is not None and current[1] == generation
+        if still_active:
+            self._schedule(username, kind, generation, self._next_due(username, kind, ok))
+            self._deliver(result)
+        self._wakeup.set()
+
+    def _deliver(self, result):
+        if self.callback:
+            try:
+                self.callback(result)
+            except Exception as e:
+                logger.error(f"结果回调异常: {e}")
+        if self.result_queue is not None:
+            self.result_queue.put(result)
+
+    def _prewarm(self, kinds):
+        for kind in kinds:
+            module = POLLERS[kind][0]
+            try:
+                module.prewarm()
+            except Exception as e:
+                logger.warning(f"预热连接失败: {e}")
+
+    # ---------- 运行 ----------
+    def run_forever(self):
+        """在当前线程运行，直到 stop() 被调用或收到 KeyboardInterrupt"""
+        logger.info(f"常驻轮询开始: 账号数 {len(self.accounts())}, kinds={list(self.kinds)}")
+        prewarmed_for = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while not self._stopping.is_set():
+                    now = time.time()
+                    due, next_due = self._pop_due(now)
+                    for username, kind, generation in due:
+                        executor.submit(self._poll, username, kind, generation)
+                    if due:
+                        continue
+
+                    wait = IDLE_WAIT if next_due is None else min(IDLE_WAIT, next_due - now)
+                    if self.prewarm and next_due is not None and next_due != prewarmed_for \
+                            and next_due - now <= PREWARM_LEAD:
+                        # 对即将到期的任务预热连接（同一到期时间只预热一次）
+                        prewarmed_for = next_due
+                        self._prewarm(self.kinds)
+                        continue
+                    if self.prewarm and next_due is not None and next_due - now > PREWARM_LEAD:
+                        wait = min(wait, next_due - now - PREWARM_LEAD)
+
+                    self._wakeup.wait(max(wait, 0))
+                    self._wakeup.clear()
+            except KeyboardInterrupt:
+                logger.info("收到中断信号，停止轮询")
+            finally:
+                self._stopping.set()
+        logger.info("常驻轮询已停止")
+
+    def start(self):
+        """在后台线程运行"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止轮询；等待正在进行的获取结束"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+
+# ===== 3. 主程序入口 =====
+def main():
+    """常驻运行，轮询配置文件 [account] 节中账号的成绩和课表"""
+    def report(result):
+        if result["error"]:
+            print(f"❌ {result['username']} {result['kind']}: {result['error']}")
+        else:
+            changed = "有变化" if result["changed"] else "无变化"
+            print(f"✅ {result['username']} {result['kind']}: {len(result['data'])} 条（{changed}）")
+
+    poller = Poller(callback=report)
+    if not poller.accounts():
+        logger.error("配置文件中未设置账号或密码")
+        print("❌ 配置文件中未设置账号或密码，请先配置 [account] 节")
+        return
+    poller.run_forever()
+
+
+if __name__ == "__main__":
+    main()
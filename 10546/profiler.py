@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+性能分析模块
+
+按阶段（登录、获取、解析、打印等）采集 cProfile 调用统计和 tracemalloc 内存数据，
+结束时把报告写入 AppData 目录下的 profiles/，便于直接附在性能问题报告中：
+
+    with profiler.profile("grades", APPDATA_DIR) as prof:
+        with prof.stage("fetch"):
+            html = ...
+        with prof.stage("parse"):
+            grades = parse_grades(html)
+    print(prof.report_path)
+
+报告为 JSON（<名称>_<时间>_<进程号>.json），每个阶段包含耗时、内存峰值与净增量、分配最多的代码行、
+累计耗时最高的函数；各阶段完整的 cProfile 数据另存为同名 .<阶段>.pstats 文件（可用 pstats / snakeviz 查看）。
+"""
+import cProfile
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# ===== 1. 常量定义 =====
+PROFILE_DIRNAME = "profiles"
+# 报告中列出的函数数与代码行数
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+# tracemalloc 保存的调用栈深度（1 即可按代码行统计）
+TRACE_FRAMES = 1
+# 不计入内存统计的文件（分析工具自身的分配）
+_IGNORED_FILES = (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__, "<frozen importlib._bootstrap>",
+                  "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+# ===== 2. 工具函数 =====
+def _top_allocations(before, after, limit=TOP_ALLOCATIONS):
+    """阶段内净分配最多的代码行
+
+    先按代码行汇总再排除分析工具自身的文件（Snapshot.filter_traces 逐条匹配，大快照上很慢）。
+    """
+    result = []
+    for stat in after.compare_to(before, "lineno"):
+        if len(result) >= limit:
+            break
+        frame = stat.traceback[0]
+        if frame.filename in _IGNORED_FILES:
+            continue
+        result.append({"file": frame.filename, "line": frame.lineno, "size_diff": stat.size_diff,
+                       "count_diff": stat.count_diff, "size": stat.size})
+    return result
+
+
+def _top_functions(profile, limit=TOP_FUNCTIONS):
+    """累计耗时最高的函数"""
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({"function": name, "file": filename, "line": line, "calls": calls,
+                     "primitive_calls": primitive_calls, "tottime": tottime, "cumtime": cumtime})
+    rows.sort(key=lambda row: row["cumtime"], reverse=True)
+    return rows[:limit]
+
+
+# ===== 3. 分阶段分析 =====
+class StageProfiler:
+    """分阶段性能分析（一次只能有一个阶段在运行，不支持嵌套）
+
+    Args:
+        name: 报告名称（如 "grades"）
+        output_dir: 报告目录（其下的 profiles/）
+        memory: 是否采集 tracemalloc 数据（会明显拖慢被分析的代码）
+    """
+
+    def __init__(self, name, output_dir, memory=True):
+        self.name = name
+        self.output_dir = Path(output_dir) / PROFILE_DIRNAME
+        self.memory = memory
+        self.stages = []
+        self.report_path = None
+        self._stem = f"{name}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self._started_at = None
+        self._started_tracing = False
+        self._active = None
+
+    def __enter__(self):
+        self._started_at = time.time()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started_tracing = True
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.write_report()
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def stage(self, name):
+        """分析一个阶段的上下文管理器"""
+        return _Stage(self, name)
+
+    def write_report(self):
+        """写入 JSON 报告，返回报告路径"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        report = {
+            "name": self.name,
+            "started_at": self._started_at,
+            "finished_at": time.time(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "argv": sys.argv,
+            "stages": self.stages,
+        }
+        path = self.output_dir / f"{self._stem}.json"
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, path)
+        self.report_path = path
+        return path
+
+
+class _Stage:
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.record = {"name": name}
+        self._profile = None
+        self._snapshot = None
+
+    def __enter__(self):
+        if self.owner._active is not None:
+            raise RuntimeError(f"阶段 {self.owner._active} 尚未结束，不支持嵌套阶段 {self.name}")
+        self.owner._active = self.name
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._snapshot = tracemalloc.take_snapshot()
+            self._memory_before = tracemalloc.get_traced_memory()[0]
+        self._profile = cProfile.Profile()
+        try:
+            self._profile.enable()
+        except ValueError as e:
+            # 其他分析工具（如调试器）正在运行
+            self.record["profile_error"] = str(e)
+            self._profile = None
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        cpu = time.process_time() - self._cpu_start
+        if self._profile is not None:
+            self._profile.disable()
+        self.owner._active = None
+
+        record = self.record
+        record.update(seconds=elapsed, cpu_seconds=cpu)
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        if self._snapshot is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            record["memory"] = {"peak_bytes": peak, "net_bytes": current - self._memory_before,
+                                "top": _top_allocations(self._snapshot, tracemalloc.take_snapshot())}
+        if self._profile is not None:
+            record["functions"] = _top_functions(self._profile)
+            owner = self.owner
+            owner.output_dir.mkdir(parents=True, exist_ok=True)
+            pstats_path = owner.output_dir / f"{owner._stem}.{self.name}.pstats"
+            self._profile.dump_stats(str(pstats_path))
+            record["pstats"] = pstats_path.name
+        self.owner.stages.append(record)
+        return False
+
+
+def profile(name, output_dir, memory=True):
+    """分阶段性能分析的上下文管理器（StageProfiler），退出时写入报告"""
+    return StageProfiler(name, output_dir, memory)
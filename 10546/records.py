@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑记录模块
+
+parse_grades / parse_schedule 在 compact=True 时返回本模块的记录对象，代替每行一个 dict：
+- 使用 __slots__，不为每条记录分配实例字典
+- 学期、课程属性、学分、教师、教室等重复出现的字符串经过驻留（sys.intern），多条记录共享同一对象
+- 周次列表保存为位掩码（第 n 周对应第 n 位），"全学期" 用 FULL_TERM_MASK 表示
+
+记录实现了只读 Mapping 接口，可以像原来的 dict 一样按中文字段名访问（record["课程名称"]），
+与 dict 比较相等；to_dict() 返回与原格式完全一致的 dict（可直接 JSON 序列化）。
+
+本模块还负责由表格单元格文本（parserBackend.extract_*_rows 的输出）构造条目，
+不依赖日志与缓存，批量重新解析的工作进程可以直接使用。
+"""
+import re
+import sys
+from collections.abc import Mapping
+
+# ===== 1. 字段定义 =====
+# (属性名, 原 dict 中的字段名)
+GRADE_FIELDS = (
+    ("course_id", "课程编号"),
+    ("name", "课程名称"),
+    ("score", "成绩"),
+    ("term", "学期"),
+    ("attribute", "课程属性"),
+    ("credit", "学分"),
+)
+COURSE_FIELDS = (
+    ("weekday", "星期"),
+    ("start", "开始小节"),
+    ("end", "结束小节"),
+    ("name", "课程名称"),
+    ("teacher", "教师"),
+    ("room", "教室"),
+    ("weeks", "周次列表"),
+)
+
+_intern = sys.intern
+
+# ===== 1.1 周次位掩码 =====
+# 未解析出周次（parse_schedule 中的 ["全学期"]）时使用的掩码：所有位都置 1
+FULL_TERM = "全学期"
+FULL_TERM_MASK = -1
+
+
+def weeks_to_mask(weeks):
+    """周次列表 -> 位掩码，如 [1, 3] -> 0b1010；["全学期"] -> FULL_TERM_MASK"""
+    mask = 0
+    for week in weeks:
+        if week == FULL_TERM:
+            return FULL_TERM_MASK
+        mask |= 1 << week
+    return mask
+
+
+def mask_to_weeks(mask):
+    """位掩码 -> 升序周次列表（FULL_TERM_MASK -> ["全学期"]）"""
+    if mask == FULL_TERM_MASK:
+        return [FULL_TERM]
+    weeks = []
+    week = 0
+    while mask:
+        if mask & 1:
+            weeks.append(week)
+        mask >>= 1
+        week += 1
+    return weeks
+
+
+def has_week(mask, week):
+    """位掩码中是否包含第 week 周"""
+    return bool(mask >> week & 1)
+
+
+# ===== 2. 记录基类 =====
+class _Record(Mapping):
+    """按中文字段名只读访问的紧凑记录"""
+
+    __slots__ = ()
+    _FIELDS = ()
+    _KEY_TO_ATTR = {}
+
+    def __getitem__(self, key):
+        try:
+            attr = self._KEY_TO_ATTR[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return getattr(self, attr)
+
+    def __iter__(self):
+        return (key for _, key in self._FIELDS)
+
+    def __len__(self):
+        return len(self._FIELDS)
+
+    def __contains__(self, key):
+        return key in self._KEY_TO_ATTR
+
+    def __repr__(self):
+        values = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _ in self._FIELDS)
+        return f"{type(self).__name__}({values})"
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, attr) for attr, _ in self._FIELDS))
+
+    def to_dict(self):
+        return {key: getattr(self, attr) for attr, key in self._FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(*(data[key] for _, key in cls._FIELDS))
+
+
+# ===== 3. 成绩记录 =====
+class GradeRecord(_Record):
+    """一门课程的成绩"""
+
+    __slots__ = tuple(attr for attr, _ in GRADE_FIELDS)
+    _FIELDS = GRADE_FIELDS
+    _KEY_TO_ATTR = {key: attr for attr, key in GRADE_FIELDS}
+
+    def __init__(self, course_id, name, score, term, attribute, credit):
+        self.course_id = course_id
+        self.name = name
+        self.score = score
+        self.term = _intern(term)
+        self.attribute = _intern(attribute)
+        self.credit = _intern(credit)
+
+
+# ===== 4. 课程记录 =====
+class CourseRecord(_Record):
+    """课表中的一条课程安排
+
+    周次保存为位掩码 week_mask；weeks 属性返回元组，通过 Mapping 接口或 to_dict() 访问"周次列表"时返回 list。
+    """
+
+    __slots__ = ("weekday", "start", "end", "name", "teacher", "room", "week_mask")
+    _FIELDS = COURSE_FIELDS
+    _KEY_TO_ATTR = {key: attr for attr, key in COURSE_FIELDS}
+
+    def __init__(self, weekday, start, end, name, teacher, room, weeks):
+        self.weekday = weekday
+        self.start = start
+        self.end = end
+        self.name = _intern(name)
+        self.teacher = _intern(teacher)
+        self.room = _intern(room)
+        self.week_mask = weeks_to_mask(weeks)
+
+    @property
+    def weeks(self):
+        return tuple(mask_to_weeks(self.week_mask))
+
+    def has_week(self, week):
+        """本课程在第 week 周是否上课"""
+        return has_week(self.week_mask, week)
+
+    def __getitem__(self, key):
+        if key == "周次列表":
+            return mask_to_weeks(self.week_mask)
+        return super().__getitem__(key)
+
+    def __reduce__(self):
+        return (_course_from_mask, tuple(getattr(self, attr) for attr in self.__slots__))
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["周次列表"] = mask_to_weeks(self.week_mask)
+        return data
+
+
+def _course_from_mask(weekday, start, end, name, teacher, room, week_mask):
+    record = CourseRecord(weekday, start, end, name, teacher, room, ())
+    record.week_mask = week_mask
+    return record
+
+
+# ===== 5. 转换函数 =====
+def to_dicts(records):
+    """把记录列表转换为原来的 dict 列表"""
+    return [record.to_dict() for record in records]
+
+
+def grades_from_dicts(grades):
+    return [GradeRecord.from_dict(grade) for grade in grades]
+
+
+def courses_from_dicts(schedule):
+    return [CourseRecord.from_dict(item) for item in schedule]
+
+
+# ===== 6. 由表格单元格构造条目 =====
+def build_grade(cols, compact=False):
+    """由一行单元格文本构造成绩条目（compact 时为 GradeRecord），列数不足时返回 None"""
+    if len(cols) < 5:
+        return None
+
+    if compact:
+        return GradeRecord(cols[2], cols[3], cols[4], cols[1],
+                           cols[5] if len(cols) > 5 else "",
+                           cols[6] if len(cols) > 6 else "")
+    return {
+        "课程编号": cols[2],
+        "课程名称": cols[3],
+        "成绩": cols[4],
+        "学期": cols[1],
+        "课程属性": cols[5] if len(cols) > 5 else "",
+        "学分": cols[6] if len(cols) > 6 else "",  # 添加学分字段
+    }
+
+
+def grades_from_rows(rows, compact=False):
+    """成绩表格各行的单元格文本 -> 成绩条目列表（跳过列数不足的行）"""
+    grades = []
+    for cols in rows:
+        grade = build_grade(cols, compact)
+        if grade:
+            grades.append(grade)
+    return grades
+
+
+# 周次中的数字或数字范围，如 1-16、3
+WEEK_NUMBER_RE = re.compile(r'(\d+(?:-\d+)?)')
+
+
+def parse_week_list(lines):
+    """从课程块的文本行中找出周次行并展开，如 "1-8,10(周)[01-02节]" -> [1, ..., 8, 10]（未排序去重）"""
+    weeks = []
+    time_info_line = None
+    for line in lines:
+        if "(周)" in line and not line.startswith("通知单编号") and "教室" not in line:
+            time_info_line = line
+            break
+
+    if time_info_line:
+        # 先提取 (周) 之前的部分，避免匹配到节次 [01-02节]
+        week_part = time_info_line.split('(周)')[0]
+        for part in WEEK_NUMBER_RE.findall(week_part):
+            if '-' in part:
+                s, e = map(int, part.split('-'))
+                weeks.extend(range(s, e + 1))
+            else:
+                weeks.append(int(part))
+    return weeks
+
+
+# 行号 -> (开始小节, 结束小节)
+PERIOD_MAPPING = {0: (1, 2), 1: (3, 4), 2: (5, 6), 3: (7, 8), 4: (9, 10), 5: (11, 12)}
+
+
+def build_course_items(row_idx, cells, compact=False):
+    """由课表一行（7 个单元格的课程块）构造课程条目（compact 时为 CourseRecord）"""
+    items = []
+    start_period, end_period = PERIOD_MAPPING.get(row_idx, (row_idx * 2 + 1, row_idx * 2 + 2))
+
+    for weekday in range(1, 8):
+        for lines, teacher, room in cells[weekday - 1]:
+            course_name = lines[0]
+            weeks = parse_week_list(lines)
+
+            # 如果没找到周次，设为全学期（保持兼容）
+            if not weeks:
+                weeks = [FULL_TERM]
+            else:
+                weeks = sorted(set(weeks))
+
+            if compact:
+                items.append(CourseRecord(weekday, start_period, end_period, course_name, teacher, room, weeks))
+                continue
+            item = {
+                "星期": weekday,
+                "开始小节": start_period,
+                "结束小节": end_period,
+                "课程名称": course_name,
+                "教师": teacher,
+                "教室": room,
+                "周次列表": weeks
+            }
+            items.append(item)
+    return items
+
+
+def courses_from_rows(rows, compact=False):
+    """课表表格各行（None 表示该行没有课程块）-> 课程条目列表"""
+    schedule = []
+    for row_idx, cells in enumerate(rows):
+        if cells is not None:
+            schedule.extend(build_course_items(row_idx, cells, compact))
+    return schedule
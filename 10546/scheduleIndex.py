@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+课表索引模块
+
+把 parse_schedule 的结果预先展开为以 (周次, 星期, 小节) 为键的索引，
+"现在在上什么课" / "下一节课是什么" 只需常数次字典和数组查找，不再逐条扫描课表和周次列表。
+
+    index = ScheduleIndex(schedule, term_start=date(2024, 2, 26))
+    index.now()           # 当前正在上的课程列表
+    index.next_class()    # (上课时间, 课程列表) 或 None
+
+课表条目既可以是 dict，也可以是 records.CourseRecord（compact=True 的解析结果）。
+"""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+import records
+
+# ===== 1. 常量定义 =====
+# 每天的节次数
+PERIODS_PER_DAY = 12
+DAYS_PER_WEEK = 7
+# 课表中只有"全学期"课程时使用的学期周数
+DEFAULT_TERM_WEEKS = 20
+# 默认作息时间：小节 -> (上课时间, 下课时间)，可通过 ScheduleIndex(period_times=...) 覆盖
+DEFAULT_PERIOD_TIMES = {
+    1: (time(8, 0), time(8, 45)),
+    2: (time(8, 55), time(9, 40)),
+    3: (time(10, 0), time(10, 45)),
+    4: (time(10, 55), time(11, 40)),
+    5: (time(14, 30), time(15, 15)),
+    6: (time(15, 25), time(16, 10)),
+    7: (time(16, 20), time(17, 5)),
+    8: (time(17, 15), time(18, 0)),
+    9: (time(19, 0), time(19, 45)),
+    10: (time(19, 55), time(20, 40)),
+    11: (time(20, 50), time(21, 35)),
+    12: (time(21, 45), time(22, 30)),
+}
+
+
+# ===== 2. 工具函数 =====
+def get_week_mask(item):
+    """课表条目的周次位掩码"""
+    mask = getattr(item, "week_mask", None)
+    if mask is None:
+        mask = records.weeks_to_mask(item["周次列表"])
+    return mask
+
+
+def _max_week(masks):
+    highest = 0
+    for mask in masks:
+        if mask != records.FULL_TERM_MASK:
+            highest = max(highest, mask.bit_length() - 1)
+    return highest or DEFAULT_TERM_WEEKS
+
+
+# ===== 3. 课表索引 =====
+class ScheduleIndex:
+    """预先构建的课表查询索引（只读，可在多个线程间共享）
+
+    Args:
+        schedule: parse_schedule 的结果
+        term_start: 学期第一周内的任意一天（date），now() / next_class() 需要
+        term_weeks: 学期周数，默认取课表中出现的最大周次（"全学期"课程按此展开）
+        period_times: {小节: (上课时间, 下课时间)}，默认 DEFAULT_PERIOD_TIMES
+    """
+
+    def __init__(self, schedule, term_start=None, term_weeks=None, period_times=None):
+        self.period_times = dict(period_times or DEFAULT_PERIOD_TIMES)
+        self.periods = max(PERIODS_PER_DAY, max(self.period_times))
+        self.term_start = term_start
+        # 第一周的星期一
+        self._monday = term_start - timedelta(days=term_start.weekday()) if term_start else None
+
+        masks = [get_week_mask(item) for item in schedule]
+        self.term_weeks = term_weeks or _max_week(masks)
+
+        # (周次, 星期, 小节) -> 该小节正在上的课程
+        self._slots = {}
+        # 时段序号 -> 在该小节开始的课程；_next[i] 为 >= i 的第一个有课程开始的时段序号
+        size = self.term_weeks * DAYS_PER_WEEK * self.periods
+        self._starts = [None] * size
+        for item, mask in zip(schedule, masks):
+            weekday, start, end = item["星期"], item["开始小节"], item["结束小节"]
+            for week in range(1, self.term_weeks + 1):
+                if not records.has_week(mask, week):
+                    continue
+                for period in range(start, end + 1):
+                    self._slots.setdefault((week, weekday, period), []).append(item)
+                if start in self.period_times:
+                    slot = self._slot_id(week, weekday, start)
+                    if self._starts[slot] is None:
+                        self._starts[slot] = []
+                    self._starts[slot].append(item)
+
+        self._next = [None] * (size + 1)
+        for slot in range(size - 1, -1, -1):
+            self._next[slot] = slot if self._starts[slot] is not None else self._next[slot + 1]
+
+        # 按上课时间排序的小节，用于由时刻求小节
+        ordered = sorted(self.period_times.items(), key=lambda kv: kv[1][0])
+        self._period_order = [period for period, _ in ordered]
+        self._period_begins = [times[0] for _, times in ordered]
+
+    # ---------- 时段编号 ----------
+    def _slot_id(self, week, weekday, period):
+        return ((week - 1) * DAYS_PER_WEEK + weekday - 1) * self.periods + period - 1
+
+    def _slot_position(self, slot):
+        day, period_idx = divmod(slot, self.periods)
+        week_idx, weekday_idx = divmod(day, DAYS_PER_WEEK)
+        return week_idx + 1, weekday_idx + 1, period_idx + 1
+
+    def _require_term_start(self):
+        if self._monday is None:
+            raise ValueError("未设置 term_start，无法按日期查询课表")
+
+    def week_of(self, day):
+        """day 所在的教学周（第一周为 1，学期开始前为 0 或负数）"""
+        self._require_term_start()
+        return (day - self._monday).days // 7 + 1
+
+    def period_at(self, moment):
+        """moment 时刻正在进行的小节，课间或非上课时间返回 None"""
+        idx = bisect_right(self._period_begins, moment.time()) - 1
+        if idx < 0:
+            return None
+        period = self._period_order[idx]
+        return period if moment.time() < self.period_times[period][1] else None
+
+    def start_time(self, week, weekday, period):
+        """第 week 周星期 weekday 第 period 小节的上课时间"""
+        self._require_term_start()
+        day = self._monday + timedelta(days=(week - 1) * DAYS_PER_WEEK + weekday - 1)
+        return datetime.combine(day, self.period_times[period][0])
+
+    # ---------- 查询 ----------
+    def at(self, week, weekday, period):
+        """第 week 周星期 weekday 第 period 小节正在上的课程列表"""
+        return list(self._slots.get((week, weekday, period), ()))
+
+    def now(self, moment=None):
+        """moment（默认当前时间）正在上的课程列表"""
+        moment = moment or datetime.now()
+        period = self.period_at(moment)
+        if period is None:
+            return []
+        return self.at(self.week_of(moment.date()), moment.isoweekday(), period)
+
+    def next_class(self, moment=None):
+        """moment（默认当前时间）之后最近一次开始的课程
+
+        Returns:
+            tuple: (上课时间 datetime, 课程列表)；本学期之后没有课程时返回 None
+        """
+        moment = moment or datetime.now()
+        week = self.week_of(moment.date())
+        if week < 1:
+            slot = 0
+        else:
+            # 当天上课时间晚于 moment 的第一个小节；没有则从次日第 1 节开始
+            idx = bisect_right(self._period_begins, moment.time())
+            if idx < len(self._period_order):
+                slot = self._slot_id(week, moment.isoweekday(), self._period_order[idx])
+            else:
+                slot = self._slot_id(week, moment.isoweekday(), self.periods) + 1
+
+        if slot >= len(self._starts):
+            return None
+        found = self._next[slot]
+        if found is None:
+            return None
+        week, weekday, period = self._slot_position(found)
+        return self.start_time(week, weekday, period), list(self._starts[found])
+
+    def __len__(self):
+        return len(self._slots)
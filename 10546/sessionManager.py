@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+会话复用模块
+
+登录成功后把 Cookie 保存到 AppData 目录（与页面缓存库同目录），
+下次调用先用轻量探测确认会话仍然有效，只有服务器判定会话过期时才重新登录。
+"""
+import hashlib
+import json
+import os
+import time
+
+# ===== 1. 常量定义 =====
+# 探测页面：登录后的主框架页，未登录时服务器会重定向或返回登录页
+PROBE_PATH = "framework/xsMain.jsp"
+# 登录页特征（会话已过期时探测请求返回的内容）
+EXPIRED_MARKERS = ('name="encoded"', 'id="encoded"', "请先登录")
+# 距上次确认有效不足该秒数时，跳过探测直接复用内存中的会话
+DEFAULT_PROBE_INTERVAL = 300
+
+
+def is_valid_probe(status_code, text):
+    """根据探测请求的响应判断会话是否仍然有效（同步、异步会话共用）"""
+    if status_code != 200:
+        return False
+    return not any(marker in text for marker in EXPIRED_MARKERS)
+
+
+# ===== 2. 会话管理器 =====
+class SessionManager:
+    """按账号管理已登录的 requests.Session
+
+    Args:
+        login_func: 登录函数，签名同 login(username, password)，成功返回 Session，失败返回 None
+        session_factory: 创建未登录 Session 的函数（已挂载 IPv4Adapter 并设置请求头）
+        cache_dir: Cookie 文件存放目录（AppData 目录）
+        base_url: 教务系统根地址
+        logger: 调用方模块的日志对象
+        probe_interval: 内存会话免探测的时间窗口（秒）
+    """
+
+    def __init__(self, login_func, session_factory, cache_dir, base_url, logger,
+                 probe_interval=DEFAULT_PROBE_INTERVAL):
+        self.login_func = login_func
+        self.session_factory = session_factory
+        self.cache_dir = cache_dir
+        self.base_url = base_url
+        self.logger = logger
+        self.probe_interval = probe_interval
+        self._sessions = {}  # username -> (session, 上次确认有效的时间)
+
+    def get_cookie_file(self, username):
+        """账号对应的 Cookie 文件路径（文件名使用学号摘要，避免明文出现在文件名中）"""
+        digest = hashlib.sha1(username.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"session_{digest}.json"
+
+    def get_session(self, username, password, throttle=None):
+        """获取可用会话：内存会话 → 已保存的 Cookie → 重新登录
+
+        Args:
+            throttle: 每次向服务器发送请求（探测、登录）前调用的函数，用于限速（如 TokenBucket.acquire）
+        """
+        # 1. 内存中的会话（长驻进程内复用）
+        cached = self._sessions.get(username)
+        if cached:
+            session, verified_at = cached
+            if time.time() - verified_at < self.probe_interval:
+                self.logger.info("复用内存中的登录会话")
+                return session
+            if self.probe(session, throttle):
+                self._sessions[username] = (session, time.time())
+                self.logger.info("内存会话探测有效，复用登录会话")
+                return session
+            self.logger.info("内存会话已过期")
+            self.invalidate(username)
+
+        # 2. AppData 中保存的 Cookie
+        session = self.load(username)
+        if session is not None:
+            if self.probe(session, throttle):
+                self._sessions[username] = (session, time.time())
+                self.logger.info("已保存的会话探测有效，跳过登录")
+                return session
+            self.logger.info("已保存的会话已过期，需要重新登录")
+            self.invalidate(username)
+
+        # 3. 重新登录（login_func 发送一次登录请求）
+        if throttle is not None:
+            throttle()
+        session = self.login_func(username, password)
+        if session is not None:
+            self._sessions[username] = (session, time.time())
+            self.save(username, session)
+        return session
+
+    def adopt(self, username, session):
+        """登记由其他 SessionManager 登录得到的会话（成绩与课表共用一次登录）"""
+        self._sessions[username] = (session, time.time())
+
+    def probe(self, session, throttle=None):
+        """探测会话是否仍然有效（throttle 同 get_session）"""
+        if throttle is not None:
+            throttle()
+        try:
+            response = session.get(self.base_url + PROBE_PATH, timeout=10, allow_redirects=False)
+            self.logger.debug(f"会话探测响应状态码: {response.status_code}")
+        except Exception as e:
+            self.logger.warning(f"会话探测请求异常: {e}")
+            return False
+
+        return is_valid_probe(response.status_code, response.text)
+
+    def save(self, username, session):
+        """保存会话 Cookie 到 AppData 目录"""
+        self.save_cookies(username, [
+            {
+                "name": c.name,
+                "value": c.value,
+                "domain": c.domain,
+                "path": c.path,
+                "expires": c.expires,
+                "secure": c.secure,
+            }
+            for c in session.cookies
+        ])
+
+    def save_cookies(self, username, cookies):
+        """保存 Cookie 列表（[{"name", "value", "domain", "path", "expires", "secure"}, ...]）到 AppData 目录"""
+        cookie_file = self.get_cookie_file(username)
+        tmp_file = cookie_file.with_suffix(".tmp")
+        try:
+            # 临时文件创建时即为仅所有者可读写（0o600），替换后的 Cookie 文件不会有其他用户可读的时间窗口；
+            # 残留的旧临时文件可能权限更宽，先删除
+            try:
+                os.remove(tmp_file)
+            except FileNotFoundError:
+                pass
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+            os.replace(tmp_file, cookie_file)
+            self.logger.debug(f"会话 Cookie 已保存到: {cookie_file}")
+        except Exception as e:
+            self.logger.warning(f"保存会话 Cookie 失败: {e}")
+
+    def load(self, username):
+        """从 AppData 目录恢复会话，不存在或已全部过期时返回 None"""
+        cookies = self.load_cookies(username)
+        if not cookies:
+            return None
+        session = self.session_factory()
+        for c in cookies:
+            session.cookies.set(
+                c["name"], c["value"],
+                domain=c.get("domain", ""), path=c.get("path", "/"),
+                expires=c.get("expires"), secure=c.get("secure", False),
+            )
+        return session
+
+    def load_cookies(self, username):
+        """读取 AppData 目录中保存的未过期 Cookie 列表，文件不存在或读取失败时返回 None"""
+        cookie_file = self.get_cookie_file(username)
+        if not cookie_file.exists():
+            return None
+        try:
+            with open(cookie_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取会话 Cookie 失败: {e}")
+            return None
+
+        now = time.time()
+        return [c for c in data.get("cookies", []) if not (c.get("expires") and c["expires"] < now)]
+
+    def invalidate(self, username):
+        """丢弃账号的会话（内存与 Cookie 文件）"""
+        self._sessions.pop(username, None)
+        cookie_file = self.get_cookie_file(username)
+        try:
+            cookie_file.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"删除会话 Cookie 失败: {e}")
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+流式解析模块
+
+把 iter_content 读到的分块逐段交给增量 HTML 解析器，边下载边产出表格行，
+目标表格（table#dataList / table#timetable）闭合后即停止下载。
+解析规则与 parserBackend 的 html.parser 参考实现保持一致。
+"""
+import codecs
+from html.parser import HTMLParser
+
+from parserBackend import split_course_blocks
+
+# ===== 1. 常量定义 =====
+DEFAULT_CHUNK_SIZE = 8192
+# 无结束标签的元素
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+))
+# 不计入文本的元素（与 BeautifulSoup get_text 的默认行为一致）
+SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+# ===== 2. 表格增量解析基类 =====
+class TableStreamParser(HTMLParser):
+    """定位 id 为 table_id 的表格，把表格内的标签和文本交给子类处理
+
+    子类实现 table_starttag / table_endtag / table_text，并通过 self.items 输出结果。
+    无结束标签的元素（如 <br>）只触发 table_starttag。
+    """
+
+    def __init__(self, table_id):
+        super().__init__(convert_charrefs=True)
+        self.table_id = table_id
+        self.found = False   # 是否已进入目标表格
+        self.done = False    # 目标表格是否已闭合
+        self.items = []
+        self._table_depth = 0
+        self._skip_depth = 0
+        self._text = []
+
+    def pop_items(self):
+        """取出目前已解析完成的条目"""
+        items, self.items = self.items, []
+        return items
+
+    def _flush_text(self):
+        if self._text:
+            text = "".join(self._text)
+            self._text = []
+            self.table_text(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if self.done:
+            return
+        attrs = dict(attrs)
+        if not self.found:
+            if tag == "table" and attrs.get("id") == self.table_id:
+                self.found = True
+                self._table_depth = 1
+            return
+
+        if tag == "table":
+            self._table_depth += 1
+        if tag in SKIP_TEXT_TAGS:
+            self._skip_depth += 1
+        self.table_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if not self.found or self.done or tag in VOID_TAGS:
+            return
+
+        if tag == "table":
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self.done = True
+                return
+        if tag in SKIP_TEXT_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        self.table_endtag(tag)
+
+    def handle_data(self, data):
+        if self.found and not self.done and not self._skip_depth:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        # 注释把前后文本分隔为两个文本节点
+        self._flush_text()
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+    def table_starttag(self, tag, attrs):
+        pass
+
+    def table_endtag(self, tag):
+        pass
+
+    def table_text(self, text):
+        pass
+
+
+# ===== 3. 成绩表格 =====
+class GradeStreamParser(TableStreamParser):
+    """逐行产出 table#dataList 表头以外每一行的单元格文本列表"""
+
+    def __init__(self):
+        super().__init__("dataList")
+        self._row_count = 0
+        self._cells = None
+        self._parts = None
+
+    def table_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._row_count += 1
+            self._cells = []
+        elif tag == "td" and self._cells is not None:
+            self._parts = []
+
+    def table_endtag(self, tag):
+        if tag == "td" and self._parts is not None:
+            self._cells.append("".join(self._parts))
+            self._parts = None
+        elif tag == "tr" and self._cells is not None:
+            if self._row_count > 1:  # 跳过表头
+                self.items.append(self._cells)
+            self._cells = None
+
+    def table_text(self, text):
+        if self._parts is not None:
+            stripped = text.strip()
+            if stripped:
+                self._parts.append(stripped)
+
+
+# ===== 4. 课表表格 =====
+class ScheduleStreamParser(TableStreamParser):
+    """逐行产出 table#timetable 的 (行号, 单元格课程块)，格式同 parserBackend.extract_schedule_rows 的行"""
+
+    def __init__(self):
+        super().__init__("timetable")
+        self._row_count = 0
+        self._td_count = 0
+        self._cells = None
+        self._events = None     # 当前单元格 kbcontent 的事件序列
+        self._div_found = False
+        self._div_depth = 0     # 处于 kbcontent 内部时的标签深度
+
+    def table_starttag(self, tag, attrs):
+        if self._div_depth:
+            if tag == "br":
+                self._events.append(("br", attrs))
+                return
+            self._events.append(("start", tag, attrs))
+            if tag in VOID_TAGS:
+                self._events.append(("end", tag))
+            else:
+                self._div_depth += 1
+            return
+
+        if tag == "tr":
+            self._row_count += 1
+            self._td_count = 0
+            self._cells = []
+        elif tag == "td" and self._cells is not None:
+            self._td_count += 1
+            self._events = None
+            self._div_found = False
+        elif tag == "div" and self._cells is not None and self._td_count and not self._div_found:
+            classes = (attrs.get("class") or "").split()
+            style = attrs.get("style")
+            if "kbcontent" in classes and style and "none" in style.lower():
+                self._div_found = True
+                self._events = []
+                self._div_depth = 1
+
+    def table_endtag(self, tag):
+        if self._div_depth:
+            self._div_depth -= 1
+            if self._div_depth:
+                self._events.append(("end", tag))
+            return
+
+        if tag == "td" and self._cells is not None:
+            if self._td_count <= 7:
+                self._cells.append(split_course_blocks(self._events) if self._events else [])
+            self._events = None
+        elif tag == "tr" and self._cells is not None:
+            if self._row_count > 1:  # 跳过表头
+                row_idx = self._row_count - 2
+                self.items.append((row_idx, self._cells if self._td_count >= 7 else None))
+            self._cells = None
+
+    def table_text(self, text):
+        if self._div_depth:
+            self._events.append(("text", text))
+
+
+# ===== 5. 边下载边解析 =====
+class StreamDownload:
+    """迭代响应分块并产出解析结果，同时把已下载内容写入临时文件
+
+    Args:
+        response: 以 stream=True 发起请求得到的 requests.Response
+        parser: TableStreamParser 子类实例
+        tmp_file: 下载内容的写入路径，None 表示不写入
+        markers: 需要检测是否出现在页面中的特征字符串
+        chunk_size: 每次读取的字节数
+
+    迭代结束后可读取 completed（目标表格已闭合，提前结束下载）、
+    found_markers（出现过的特征字符串）和 bytes_read。
+    """
+
+    def __init__(self, response, parser, tmp_file=None, markers=(), chunk_size=DEFAULT_CHUNK_SIZE):
+        self.response = response
+        self.parser = parser
+        self.tmp_file = tmp_file
+        self.markers = tuple(markers)
+        self.chunk_size = chunk_size
+        self.completed = False
+        self.found_markers = set()
+        self.bytes_read = 0
+        self._tail = ""
+        self._overlap = max((len(m) for m in self.markers), default=1) - 1
+
+    def _check_markers(self, text):
+        window = self._tail + text
+        for marker in self.markers:
+            if marker not in self.found_markers and marker in window:
+                self.found_markers.add(marker)
+        self._tail = window[-self._overlap:] if self._overlap else ""
+
+    def _feed(self, text, out):
+        if out:
+            out.write(text)
+        self._check_markers(text)
+        self.parser.feed(text)
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder(self.response.encoding or "utf-8")(errors="replace")
+        out = open(self.tmp_file, "w", encoding="utf-8") if self.tmp_file else None
+        try:
+            for chunk in self.response.iter_content(self.chunk_size):
+                self.bytes_read += len(chunk)
+                self._feed(decoder.decode(chunk), out)
+                yield from self.parser.pop_items()
+                if self.parser.done:
+                    self.completed = True
+                    break
+            else:
+                self._feed(decoder.decode(b"", final=True), out)
+                self.parser.close()
+                yield from self.parser.pop_items()
+        finally:
+            if out:
+                out.close()
+            self.response.close()
+
+    def has_marker(self, marker):
+        return marker in self.found_markers
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+合成页面生成模块
+
+按青果教务系统的页面结构生成成绩页（table#dataList）和课表页（table#timetable），
+内容由随机种子决定，同一组参数每次生成的页面完全相同。
+"""
+import random
+
+# ===== 1. 常量定义 =====
+# 成绩页行数：真实规模 ~ 极端规模
+GRADE_SIZES = {
+    "grades_10": 10,
+    "grades_60": 60,
+    "grades_1k": 1000,
+    "grades_10k": 10000,
+    "grades_100k": 100000,
+}
+# 课表页：每个单元格的课程块数（以 ----- 分隔）
+SCHEDULE_SIZES = {
+    "schedule_typical": 1,
+    "schedule_dense": 4,
+    "schedule_extreme": 16,
+}
+
+TERMS = ("2022-2023-1", "2022-2023-2", "2023-2024-1", "2023-2024-2")
+SCORES = ("95", "88", "76", "62", "优", "良", "及格", '<a href="javascript:void(0)">81</a>')
+WEEKS = ("1-16", "1-8,10-12", "3,5,7,9", "9-16", "2")
+SEPARATOR = "---------------------<br/>"
+
+GRADE_HEADER = ("序号", "开课学期", "课程编号", "课程名称", "成绩", "课程属性", "学分", "总学时", "考核方式")
+
+
+# ===== 2. 成绩页 =====
+def generate_grade_page(rows, seed=0):
+    """生成含 rows 行成绩的 kscj/cjcx_list 页面"""
+    rnd = random.Random(seed)
+    parts = [
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>学生个人考试成绩</title>',
+        '<script type="text/javascript">var url = "/jsxsd/kscj/cjcx_list";</script></head><body>',
+        '<form id="kscjForm" action="/jsxsd/kscj/cjcx_list" method="post"></form>',
+        '<table id="dataList" class="Nsb_r_list Nsb_table"><tr>',
+        "".join(f"<th>{h}</th>" for h in GRADE_HEADER),
+        "</tr>\n",
+    ]
+    for i in range(1, rows + 1):
+        cols = (
+            str(i),
+            rnd.choice(TERMS),
+            f"K{rnd.randrange(100000):06d}",
+            f"课程名称{i}",
+            rnd.choice(SCORES),
+            rnd.choice(("必修", "选修", "公选")),
+            rnd.choice(("1", "1.5", "2", "3", "4")),
+            rnd.choice(("16", "32", "48", "64")),
+            rnd.choice(("考试", "考查")),
+        )
+        parts.append('<tr><td align="center">' + '</td><td align="left">'.join(cols) + "</td></tr>\n")
+    parts.append("</table>")
+    parts.append('<div class="Nsb_r_list_fy"><!-- N122101QueryResult --></div></body></html>')
+    return "".join(parts)
+
+
+# ===== 3. 课表页 =====
+def _course_block(rnd, tag):
+    return (
+        f"课程{tag}<br/>"
+        f'<font title="老师">教师{tag}</font><br/>'
+        f'<font title="教师">教师{tag}</font><br/>'
+        f'<font title="周次(节次)">{rnd.choice(WEEKS)}(周)[01-02节]</font><br/>'
+        f'<font title="教室">{rnd.choice("ABCDE")}{rnd.randrange(100, 600)}</font><br/>'
+    )
+
+
+def generate_schedule_page(blocks_per_cell=1, fill=0.6, seed=0):
+    """生成 xskb/xskb_list.do 页面
+
+    Args:
+        blocks_per_cell: 有课单元格中的课程块数
+        fill: 有课单元格所占比例
+        seed: 随机种子
+    """
+    rnd = random.Random(seed)
+    rows = []
+    for row_idx in range(6):
+        cells = [f'<th width="70" height="28" align="center">第{row_idx + 1}大节</th>']
+        for day in range(7):
+            if rnd.random() >= fill:
+                cells.append(
+                    '<td width="123" height="28" align="center" valign="top">'
+                    '<div class="kbcontent1">&nbsp;</div>'
+                    '<div class="kbcontent" style="display: none;">&nbsp;</div></td>'
+                )
+                continue
+            blocks = [_course_block(rnd, f"{row_idx}{day}{k}") for k in range(blocks_per_cell)]
+            cells.append(
+                '<td width="123" height="28" align="center" valign="top">'
+                f'<div class="kbcontent1" id="{row_idx}-{day}-1">{blocks[0]}</div>'
+                f'<div class="kbcontent" style="display: none;" id="{row_idx}-{day}-2">'
+                + SEPARATOR.join(blocks) + "</div></td>"
+            )
+        rows.append("<tr>" + "".join(cells) + "</tr>\n")
+    # 备注行：单元格不足 7 个，解析时应跳过
+    rows.append('<tr><th>备注:</th><td colspan="7">无</td></tr>\n')
+
+    header = "<tr><th>&nbsp;</th>" + "".join(
+        f"<th>{d}</th>" for d in ("星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日")
+    ) + "</tr>\n"
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>学期理论课表</title></head><body>'
+        '<table id="timetable" class="Nsb_table">' + header + "".join(rows) + "</table>"
+        "</body></html>"
+    )
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+插件性能基准测试
+
+- parse_grades / parse_schedule：各解析后端在真实规模到极端规模页面上的解析耗时
+- fetch_*：对本地教务服务器替身的端到端获取（登录 → 下载 → 解析 → 写缓存），fetch_all 为一次登录并行获取两项，
+  fetch_grades_by_term 为按学期分区获取
+- schedule_index：课表索引的构建与 now() / next_class() 查询耗时
+- import：在新的解释器进程中导入插件包（及访问接口）的耗时
+
+结果与 baseline.json 中保存的基线比较，中位数变慢超过阈值的用例视为性能回退，
+存在回退时以退出码 1 结束。
+
+用法（需能导入主程序的 core 包，例如把 Capture_Push 根目录加入 PYTHONPATH）：
+    python benchmarks/run_benchmarks.py                  # 运行全部用例并与基线比较
+    python benchmarks/run_benchmarks.py --quick          # 跳过极端规模用例
+    python benchmarks/run_benchmarks.py -k parse_grades  # 只运行名称包含该字符串的用例
+    python benchmarks/run_benchmarks.py --save-baseline  # 以本次结果覆盖基线
+    python benchmarks/run_benchmarks.py --add-baseline   # 只把基线中还没有的用例写入基线
+
+基线只应在新增用例时更新（--add-baseline），已有用例的基线保持不变，之后的改动都与同一基线比较。
+"""
+import argparse
+import json
+import platform
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PLUGIN_DIR = BENCH_DIR.parent / "10546"
+for path in (BENCH_DIR, PLUGIN_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from pages import GRADE_SIZES, SCHEDULE_SIZES, generate_grade_page, generate_schedule_page
+from standin_server import StandInServer
+
+# ===== 1. 常量定义 =====
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+# 默认允许的变慢比例
+DEFAULT_THRESHOLD = 0.25
+# 绝对差值低于该秒数时不判定为回退（避免微小用例的计时抖动）
+NOISE_FLOOR = 0.002
+# 每个用例至少运行的次数与累计时间
+DEFAULT_REPEAT = 5
+MIN_TIME = 1.0
+# --quick 时跳过的极端规模页面
+EXTREME_SIZES = ("grades_100k", "schedule_extreme")
+
+USERNAME = "20230000"
+PASSWORD = "benchmark"
+# 课表索引用例的学期开始日期
+TERM_START = date(2024, 2, 26)
+
+
+# ===== 2. 用例注册 =====
+class Case:
+    """一个基准测试用例：setup() 返回被计时的无参函数
+
+    提供 runner 时改为调用 runner(repeat, min_time) 自行计时，返回值格式同 measure()。
+    """
+
+    def __init__(self, name, setup=None, extreme=False, runner=None):
+        self.name = name
+        self.setup = setup
+        self.extreme = extreme
+        self.runner = runner
+
+
+def _parse_cases(backends):
+    import getCourseGrades
+    import getCourseSchedule
+    import scheduleIndex
+
+    cases = []
+    for size, rows in GRADE_SIZES.items():
+        for backend in backends:
+            def setup(rows=rows, backend=backend):
+                html = generate_grade_page(rows)
+                return lambda: getCourseGrades.parse_grades(html, backend=backend)
+            cases.append(Case(f"parse_grades[{size}][{backend}]", setup, size in EXTREME_SIZES))
+
+    for size, blocks in SCHEDULE_SIZES.items():
+        for backend in backends:
+            def setup(blocks=blocks, backend=backend):
+                html = generate_schedule_page(blocks)
+                return lambda: getCourseSchedule.parse_schedule(html, backend=backend)
+            cases.append(Case(f"parse_schedule[{size}][{backend}]", setup, size in EXTREME_SIZES))
+
+    # 紧凑记录（records.GradeRecord / CourseRecord）
+    for backend in backends:
+        def setup(backend=backend):
+            html = generate_grade_page(GRADE_SIZES["grades_10k"])
+            return lambda: getCourseGrades.parse_grades(html, backend=backend, compact=True)
+        cases.append(Case(f"parse_grades[grades_10k][{backend}][compact]", setup))
+
+        def setup(backend=backend):
+            html = generate_schedule_page(SCHEDULE_SIZES["schedule_dense"])
+            return lambda: getCourseSchedule.parse_schedule(html, backend=backend, compact=True)
+        cases.append(Case(f"parse_schedule[schedule_dense][{backend}][compact]", setup))
+
+    # 课表索引：构建，以及一周内每个整点的 now() / next_class() 查询
+    def setup():
+        schedule = getCourseSchedule.parse_schedule(generate_schedule_page(SCHEDULE_SIZES["schedule_dense"]))
+        return lambda: scheduleIndex.ScheduleIndex(schedule, TERM_START)
+    cases.append(Case("schedule_index[build][schedule_dense]", setup))
+
+    def setup():
+        schedule = getCourseSchedule.parse_schedule(generate_schedule_page(SCHEDULE_SIZES["schedule_dense"]))
+        index = scheduleIndex.ScheduleIndex(schedule, TERM_START)
+        moments = [datetime.combine(TERM_START, datetime.min.time()) + timedelta(hours=h) for h in range(7 * 24)]
+
+        def run():
+            for moment in moments:
+                index.now(moment)
+                index.next_class(moment)
+        return run
+    cases.append(Case("schedule_index[query][168]", setup))
+    return cases
+
+
+def _point_module_at(module, server, cache_dir):
+    """把模块的请求地址和缓存目录指向替身服务器与临时目录"""
+    import cacheStore
+
+    module.RUN_MODE = "BUILD"
+    module.BASE_URL = server.base_url
+    module.LOGIN_URL = server.base_url + "xk/LoginToXk"
+    module.APPDATA_DIR = cache_dir
+    module.CACHE_STORE = cacheStore.get_store(cache_dir)
+    module.SESSION_MANAGER.base_url = server.base_url
+    module.SESSION_MANAGER.cache_dir = cache_dir
+    module.SESSION_MANAGER.invalidate(USERNAME)
+
+
+def _fetch_cases(server, cache_dir):
+    import getCourseGrades
+    import getCourseSchedule
+    import fetchAll
+
+    _point_module_at(getCourseGrades, server, cache_dir)
+    _point_module_at(getCourseSchedule, server, cache_dir)
+    getCourseGrades.GRADE_URL = server.base_url + "kscj/cjcx_list"
+    getCourseSchedule.SCHEDULE_URL = server.base_url + "xskb/xskb_list.do"
+
+    targets = {
+        "fetch_grades": (getCourseGrades, lambda: getCourseGrades.fetch_grades(USERNAME, PASSWORD, True)),
+        "fetch_course_schedule": (getCourseSchedule,
+                                  lambda: getCourseSchedule.fetch_course_schedule(USERNAME, PASSWORD, True)),
+        "fetch_grades_stream": (getCourseGrades,
+                                lambda: list(getCourseGrades.fetch_grades_stream(USERNAME, PASSWORD, True))),
+        "fetch_course_schedule_stream": (getCourseSchedule, lambda: list(
+            getCourseSchedule.fetch_course_schedule_stream(USERNAME, PASSWORD, True))),
+        "fetch_all": (getCourseGrades, lambda: fetchAll.fetch_all(USERNAME, PASSWORD, True)),
+        # 首次运行请求全部学期并拆分缓存，之后只请求仍可能变化的学期
+        "fetch_grades_by_term": (getCourseGrades,
+                                 lambda: getCourseGrades.fetch_grades_by_term(USERNAME, PASSWORD, True)),
+    }
+
+    cases = []
+    for name, (module, func) in targets.items():
+        # cold：每次都重新登录；warm：复用内存中的会话
+        def setup_cold(module=module, func=func):
+            def run():
+                module.SESSION_MANAGER.invalidate(USERNAME)
+                return func()
+            return run
+
+        def setup_warm(module=module, func=func):
+            module.SESSION_MANAGER.invalidate(USERNAME)
+            func()
+            return func
+
+        cases.append(Case(f"{name}[cold]", setup_cold))
+        cases.append(Case(f"{name}[warm]", setup_warm))
+
+    def setup_large():
+        server.set_pages(grade_html=generate_grade_page(GRADE_SIZES["grades_10k"]))
+        return targets["fetch_grades"][1]
+    cases.append(Case("fetch_grades[warm][grades_10k]", setup_large))
+    return cases
+
+
+# 在子进程中执行的导入语句（插件目录的上级目录已加入 sys.path）
+IMPORT_STATEMENTS = {
+    "import[package]": "importlib.import_module('10546')",
+    "import[package+parse_grades]": "importlib.import_module('10546').parse_grades",
+    "import[package+fetch_grades]": "importlib.import_module('10546').fetch_grades",
+}
+
+IMPORT_SCRIPT = """
+import importlib, sys, time
+sys.path[:0] = {paths!r}
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def _import_cases():
+    def make_runner(statement):
+        script = IMPORT_SCRIPT.format(paths=[str(PLUGIN_DIR.parent), str(PLUGIN_DIR)], statement=statement)
+
+        def runner(repeat, min_time):
+            # 每次都启动新进程，避免模块已导入；解释器启动时间不计入
+            return measure_samples(
+                lambda: float(subprocess.run([sys.executable, "-c", script], check=True, env=os.environ,
+                                             capture_output=True, text=True).stdout.split()[-1]),
+                repeat, min_time)
+        return runner
+
+    return [Case(name, runner=make_runner(statement)) for name, statement in IMPORT_STATEMENTS.items()]
+
+
+# ===== 3. 计时 =====
+def measure(func, repeat=DEFAULT_REPEAT, min_time=MIN_TIME):
+    """运行 func 至少 repeat 次或累计 min_time 秒（单次超过 min_time 时只运行一次）"""
+    timings = []
+    total = 0.0
+    while True:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+        if elapsed >= min_time or (total >= min_time and len(timings) >= repeat):
+            break
+    return _summarize(timings)
+
+
+def measure_samples(sample, repeat=DEFAULT_REPEAT, min_time=MIN_TIME):
+    """sample() 自行计时并返回秒数，运行次数规则同 measure()（按调用的实际耗时累计）"""
+    timings = []
+    total = 0.0
+    while True:
+        start = time.perf_counter()
+        timings.append(sample())
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        if elapsed >= min_time or (total >= min_time and len(timings) >= repeat):
+            break
+    return _summarize(timings)
+
+
+def _summarize(timings):
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "runs": len(timings),
+    }
+
+
+# ===== 4. 基线比较 =====
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_results(path, results):
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(name, result, baseline, threshold):
+    """返回 (相对基线的变化比例, 是否回退)，没有基线时返回 (None, False)"""
+    base = baseline.get(name)
+    if not base:
+        return None, False
+    change = result["median"] / base["median"] - 1
+    regressed = change > threshold and result["median"] - base["median"] > NOISE_FLOOR
+    return change, regressed
+
+
+def _format_ms(seconds):
+    return f"{seconds * 1000:10.2f}"
+
+
+# ===== 5. 主流程 =====
+def run(args):
+    import getCourseGrades
+    import getCourseSchedule
+    import parserBackend
+
+    for module in (getCourseGrades, getCourseSchedule):
+        module.logger.setLevel(args.log_level.upper())
+
+    backends = [parserBackend.BACKEND_BS4]
+    if parserBackend.resolve_backend(parserBackend.BACKEND_LXML) == parserBackend.BACKEND_LXML:
+        backends.append(parserBackend.BACKEND_LXML)
+    else:
+        print("未安装 lxml，跳过 lxml 后端用例")
+
+    baseline = {} if args.save_baseline else load_baseline(args.baseline)
+    results = {}
+    regressions = []
+
+    with tempfile.TemporaryDirectory(prefix="bench_10546_") as tmp, \
+            StandInServer(latency=args.latency) as server:
+        cases = _import_cases() + _parse_cases(backends) + _fetch_cases(server, Path(tmp))
+        for case in cases:
+            if args.filter and args.filter not in case.name:
+                continue
+            if args.quick and case.extreme:
+                continue
+
+            if case.runner:
+                result = case.runner(args.repeat, args.min_time)
+            else:
+                result = measure(case.setup(), args.repeat, args.min_time)
+            results[case.name] = result
+            change, regressed = compare(case.name, result, baseline, args.threshold)
+            if regressed:
+                regressions.append(case.name)
+            status = "REGRESSION" if regressed else ""
+            change_text = f"{change:+8.1%}" if change is not None else "       -"
+            base_text = _format_ms(baseline[case.name]["median"]) if case.name in baseline else "         -"
+            print(f"{case.name:<52}{_format_ms(result['median'])} ms{base_text} ms {change_text}  {status}")
+
+    if args.output:
+        save_results(args.output, results)
+    if args.add_baseline:
+        existing = load_baseline(args.baseline)
+        added = sorted(name for name in results if name not in existing)
+        if added:
+            existing.update((name, results[name]) for name in added)
+            save_results(args.baseline, existing)
+            print(f"已把 {len(added)} 个新用例写入基线: {', '.join(added)}")
+    elif args.save_baseline:
+        if args.filter or args.quick:
+            # 部分运行时保留其余用例的基线
+            merged = load_baseline(args.baseline)
+            merged.update(results)
+            results = merged
+        save_results(args.baseline, results)
+        print(f"基线已保存到: {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} 个用例相对基线变慢超过 {args.threshold:.0%}:")
+        for name in regressions:
+            print(f"  - {name}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="插件性能基准测试")
+    parser.add_argument("-k", dest="filter", default=None, help="只运行名称包含该字符串的用例")
+    parser.add_argument("--quick", action="store_true", help="跳过极端规模用例")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个用例至少运行的次数")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="每个用例至少累计运行的秒数")
+    parser.add_argument("--latency", type=float, default=0.0, help="替身服务器每个请求的模拟延迟（秒）")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="判定为回退的变慢比例")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="以本次结果覆盖基线")
+    parser.add_argument("--add-baseline", action="store_true", help="只把基线中还没有的用例写入基线")
+    parser.add_argument("--output", type=Path, default=None, help="把本次结果写入该 JSON 文件")
+    parser.add_argument("--log-level", default="WARNING", help="插件日志级别（DEBUG 会输出完整解析结果）")
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+本地教务服务器替身
+
+实现插件用到的接口，响应前按 latency 秒模拟网络延迟：
+- POST xk/LoginToXk：登录，返回跳转到 xsMain_new.htmlx 的页面并下发 JSESSIONID
+- GET  framework/xsMain.jsp：会话探测，未登录时 302 到登录页
+- GET/POST kscj/cjcx_list：成绩页（带 kksj 参数时只返回该学期的成绩行）
+- GET/POST xskb/xskb_list.do：课表页
+
+独立运行：python standin_server.py --port 8080 --latency 0.05
+"""
+import argparse
+import base64
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from pages import generate_grade_page, generate_schedule_page
+
+# ===== 1. 常量定义 =====
+PREFIX = "/jsxsd/"
+LOGIN_OK_PAGE = '<script type="text/javascript">window.location.href="/jsxsd/framework/xsMain_new.htmlx";</script>'
+LOGIN_FAILED_PAGE = '<html><body><font color="red">用户名或密码错误</font></body></html>'
+
+
+def filter_term(grade_html, term):
+    """只保留成绩页中 term 学期的成绩行（pages 生成的页面每行一条成绩）"""
+    cell = f">{term}</td>"
+    return "".join(line for line in grade_html.splitlines(keepends=True)
+                   if not line.startswith("<tr><td") or cell in line)
+
+
+# ===== 2. 请求处理 =====
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写出，不关闭 Nagle 算法时会叠加约 40ms 的延迟确认
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body="", headers=()):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html;charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _logged_in(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "JSESSIONID" and value in self.state.sessions:
+                return True
+        return False
+
+    def _dispatch(self, body=b""):
+        state = self.state
+        path = self.path.split("?", 1)[0]
+        state.count(path)
+        if state.latency:
+            time.sleep(state.latency)
+
+        if not path.startswith(PREFIX):
+            return self._send(404, "not found")
+        route = path[len(PREFIX):]
+
+        if route == "xk/LoginToXk":
+            return self._login(body)
+        if not self._logged_in():
+            return self._send(302, "", [("Location", PREFIX)])
+        if route == "framework/xsMain.jsp":
+            return self._send(200, "<html><body>学生个人中心</body></html>")
+        if route == "kscj/cjcx_list":
+            query = parse_qs(self.path.partition("?")[2])
+            query.update(parse_qs(body.decode("utf-8")))
+            term = query.get("kksj", [""])[0]
+            return self._send(200, filter_term(state.grade_html, term) if term else state.grade_html)
+        if route == "xskb/xskb_list.do":
+            return self._send(200, state.schedule_html)
+        return self._send(404, "not found")
+
+    def _login(self, body):
+        encoded = parse_qs(body.decode("utf-8")).get("encoded", [""])[0]
+        user, _, pwd = encoded.partition("%%%")
+        try:
+            password = base64.b64decode(pwd).decode("utf-8")
+        except Exception:
+            password = None
+        if not user or (self.state.password is not None and password != self.state.password):
+            return self._send(200, LOGIN_FAILED_PAGE)
+
+        session_id = uuid.uuid4().hex.upper()
+        self.state.sessions.add(session_id)
+        return self._send(200, LOGIN_OK_PAGE, [("Set-Cookie", f"JSESSIONID={session_id}; Path=/jsxsd")])
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._dispatch(self.rfile.read(length) if length else b"")
+
+
+# ===== 3. 服务器 =====
+class ServerState:
+    def __init__(self, grade_html, schedule_html, latency, password):
+        self.grade_html = grade_html
+        self.schedule_html = schedule_html
+        self.latency = latency
+        self.password = password
+        self.sessions = set()
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端读完目标表格后会提前断开连接（流式获取），不视为错误
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """在后台线程运行的教务服务器替身
+
+    Args:
+        grade_html / schedule_html: 返回的页面，默认使用 pages 模块生成的真实规模页面
+        latency: 每个请求的模拟延迟（秒）
+        password: 期望的密码，None 表示接受任意密码
+        host / port: 监听地址，port 为 0 时自动分配
+
+    用法：
+        with StandInServer(latency=0.05) as server:
+            ... server.base_url ...
+    """
+
+    def __init__(self, grade_html=None, schedule_html=None, latency=0.0, password=None,
+                 host="127.0.0.1", port=0):
+        self.state = ServerState(
+            grade_html if grade_html is not None else generate_grade_page(60),
+            schedule_html if schedule_html is not None else generate_schedule_page(),
+            latency,
+            password,
+        )
+        self.httpd = _QuietHTTPServer((host, port), StandInHandler)
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{PREFIX}"
+
+    @property
+    def requests(self):
+        """各路径收到的请求数"""
+        return dict(self.state.requests)
+
+    def set_pages(self, grade_html=None, schedule_html=None):
+        if grade_html is not None:
+            self.state.grade_html = grade_html
+        if schedule_html is not None:
+            self.state.schedule_html = schedule_html
+
+    def expire_sessions(self):
+        """使所有已登录会话失效"""
+        self.state.sessions.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地教务服务器替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--grade-rows", type=int, default=60, help="成绩页行数")
+    parser.add_argument("--blocks", type=int, default=1, help="课表单元格课程块数")
+    parser.add_argument("--password", default=None, help="期望的密码，默认接受任意密码")
+    args = parser.parse_args()
+
+    server = StandInServer(generate_grade_page(args.grade_rows), generate_schedule_page(args.blocks),
+                           args.latency, args.password, args.host, args.port)
+    print(f"教务服务器替身已启动: {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+插件包管理工具
+
+按 plugins_index.json 安装 / 更新院校插件，只在插件的 sha256 或版本变化时下载：
+
+- 索引缓存在本地，连同验证信息（HTTP 的 ETag / Last-Modified，本地文件的修改时间和大小）；
+  再次检查时发送条件请求，索引未变化时不重新下载，max_age 秒内不重复检查
+- 插件压缩包边下载边计算 sha256，不先整体读入内存；校验失败的下载直接丢弃
+- 压缩包解压到以 sha256 命名的目录（store/<sha256>/），内容相同的版本只解压一次；
+  当前版本由 installed.json 记录（原子替换），切换版本只是修改这一记录
+- 索引和插件地址可以是 http(s)://、file:// 或本地路径；download_url 为相对地址时相对索引位置解析
+
+目录结构（root 下）：
+    index.json / index.meta.json  缓存的索引及其验证信息
+    store/<sha256>/               解压后的插件
+    installed.json                {院校代码: {"plugin_version", "sha256", "path", "previous": [...]}}
+
+用法：
+    python developer_tools/pluginManager.py --root D:/plugins                # 按仓库中的索引安装全部院校
+    python developer_tools/pluginManager.py --index https://.../plugins_index.json --root D:/plugins 10546
+    python developer_tools/pluginManager.py --root D:/plugins --prune 1      # 只保留当前和上一个版本
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from urllib.request import url2pathname
+
+logger = logging.getLogger("pluginManager")
+
+# ===== 1. 常量定义 =====
+REPO_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX = REPO_DIR / "plugins_index.json"
+INDEX_FILE = "index.json"
+INDEX_META_FILE = "index.meta.json"
+INSTALLED_FILE = "installed.json"
+STORE_DIR = "store"
+# 索引检查后多少秒内直接使用缓存（不发送条件请求）
+DEFAULT_MAX_AGE = 300
+# 每个院校保留的旧版本数（prune 时）
+DEFAULT_KEEP = 1
+REQUEST_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+
+
+class PluginError(Exception):
+    """索引或插件包无效（下载失败、sha256 不匹配、压缩包内容不安全等）"""
+
+
+# ===== 2. 工具函数 =====
+def _to_url(location):
+    """本地路径 -> file:// 地址，其他原样返回"""
+    location = str(location)
+    if urlsplit(location).scheme in ("http", "https", "file"):
+        return location
+    return Path(location).resolve().as_uri()
+
+
+def _local_path(url):
+    """file:// 地址对应的本地路径，其他地址返回 None"""
+    parts = urlsplit(url)
+    if parts.scheme != "file":
+        return None
+    return Path(url2pathname(parts.path))
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, data):
+    """写入临时文件后原子替换，读取方不会读到写了一半的文件"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, path)
+
+
+def _check_index(index):
+    """索引应为含 plugins 列表的 JSON 对象，否则抛出 ValueError"""
+    if not isinstance(index, dict) or not isinstance(index.get("plugins", []), list):
+        raise ValueError("索引格式无效：应为含 plugins 列表的 JSON 对象")
+    return index
+
+
+def _open(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    return urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT)
+
+
+def _safe_extract(archive, target):
+    """解压 archive 到 target，拒绝解压到 target 之外的条目"""
+    target = Path(target).resolve()
+    with zipfile.ZipFile(archive) as zf:
+        for member in zf.infolist():
+            dest = (target / member.filename).resolve()
+            if dest != target and target not in dest.parents:
+                raise PluginError(f"压缩包条目路径不安全: {member.filename}")
+        zf.extractall(target)
+
+
+# ===== 3. 插件管理 =====
+class PluginManager:
+    """插件安装目录管理
+
+    Args:
+        root: 安装目录
+        index_url: 索引地址（http(s)://、file:// 或本地路径）
+        max_age: 索引检查后多少秒内直接使用缓存
+    """
+
+    def __init__(self, root, index_url=DEFAULT_INDEX, max_age=DEFAULT_MAX_AGE):
+        self.root = Path(root)
+        self.index_url = _to_url(index_url)
+        self.max_age = max_age
+        self.store_dir = self.root / STORE_DIR
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---------- 索引 ----------
+    def load_index(self, refresh=False):
+        """读取索引（必要时重新验证缓存），返回 {院校代码: 插件信息}
+
+        Args:
+            refresh: 忽略 max_age，总是检查索引是否变化
+        """
+        index_file = self.root / INDEX_FILE
+        meta_file = self.root / INDEX_META_FILE
+        meta = _read_json(meta_file, {})
+        cached = _read_json(index_file) if meta.get("source") == self.index_url else None
+        if cached is not None and not refresh and time.time() - meta.get("checked_at", 0) < self.max_age:
+            return self._plugins(cached)
+
+        local = _local_path(self.index_url)
+        if local is not None:
+            index, new_meta = self._load_local_index(local, cached, meta)
+        else:
+            index, new_meta = self._load_remote_index(cached, meta)
+
+        if index is not cached:
+            _write_json(index_file, index)
+        new_meta.update(source=self.index_url, checked_at=time.time())
+        _write_json(meta_file, new_meta)
+        return self._plugins(index)
+
+    def _load_local_index(self, path, cached, meta):
+        try:
+            stat = path.stat()
+            if cached is not None and meta.get("mtime") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+                logger.info("索引未变化，使用缓存")
+                return cached, meta
+            logger.info(f"读取索引: {path}")
+            with open(path, "r", encoding="utf-8") as f:
+                index = _check_index(json.load(f))
+        except (OSError, ValueError) as e:
+            if cached is not None:
+                logger.warning(f"读取索引失败: {e}，使用缓存")
+                return cached, meta
+            raise PluginError(f"读取索引失败: {e}") from e
+        return index, {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+    def _load_remote_index(self, cached, meta):
+        headers = {}
+        if cached is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            with _open(self.index_url, headers) as response:
+                index = _check_index(json.loads(response.read().decode("utf-8")))
+                new_meta = {"etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified")}
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached is not None:
+                logger.info("索引未变化（304），使用缓存")
+                return cached, meta
+            raise PluginError(f"获取索引失败: HTTP {e.code}") from e
+        except (OSError, ValueError) as e:
+            if cached is not None:
+                logger.warning(f"获取索引失败: {e}，使用缓存")
+                return cached, meta
+            raise PluginError(f"获取索引失败: {e}") from e
+        logger.info(f"已下载索引: {self.index_url}")
+        return index, new_meta
+
+    @staticmethod
+    def _plugins(index):
+        return {plugin["school_code"]: plugin for plugin in index.get("plugins", [])}
+
+    # ---------- 安装 ----------
+    def installed(self):
+        """{院校代码: 安装记录}"""
+        return _read_json(self.root / INSTALLED_FILE, {})
+
+    def plugin_path(self, school_code):
+        """院校插件当前版本的目录，未安装时返回 None"""
+        record = self.installed().get(school_code)
+        return Path(record["path"]) if record else None
+
+    def sync(self, school_codes=None, refresh=False):
+        """按索引安装或更新插件
+
+        Args:
+            school_codes: 院校代码列表，None 表示索引中的全部院校
+            refresh: 忽略 max_age，总是检查索引
+
+        Returns:
+            dict: {院校代码: "unchanged" / "switched" / "installed"}
+        """
+        plugins = self.load_index(refresh)
+        if school_codes is None:
+            school_codes = list(plugins)
+        result = {}
+        for code in school_codes:
+            plugin = plugins.get(code)
+            if plugin is None:
+                raise PluginError(f"索引中没有院校 {code}")
+            result[code] = self.install(plugin)
+        return result
+
+    def install(self, plugin):
+        """安装索引中的一个插件；sha256 和版本都未变化时什么也不做
+
+        Returns:
+            str: "unchanged"（无变化）、"switched"（已有解压内容，只切换版本）或 "installed"（已下载并解压）
+        """
+        code = plugin["school_code"]
+        sha256 = plugin["sha256"].lower()
+        current = self.installed().get(code)
+        target = self.store_dir / sha256
+        if current and current["sha256"] == sha256 and current["plugin_version"] == plugin["plugin_version"] \
+                and target.is_dir():
+            logger.info(f"{code} 已是最新版本 {plugin['plugin_version']}")
+            return "unchanged"
+
+        status = "switched"
+        if not target.is_dir():
+            self._download_and_extract(urljoin(self.index_url, plugin["download_url"]), sha256, target)
+            status = "installed"
+        self._set_current(code, plugin["plugin_version"], sha256, target)
+        logger.info(f"{code} 已切换到版本 {plugin['plugin_version']}（{sha256[:12]}）")
+        return status
+
+    def _download_and_extract(self, url, sha256, target):
+        """边下载边计算 sha256，校验通过后解压到临时目录再原子重命名为 target"""
+        fd, archive = tempfile.mkstemp(prefix="plugin.", suffix=".zip.part", dir=self.store_dir)
+        extract_dir = None
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, "wb") as out:
+                try:
+                    with _open(url) as response:
+                        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                            digest.update(chunk)
+                            out.write(chunk)
+                            size += len(chunk)
+                except (OSError, ValueError) as e:
+                    raise PluginError(f"下载插件失败: {url}: {e}") from e
+            actual = digest.hexdigest()
+            if actual != sha256:
+                raise PluginError(f"插件 sha256 不匹配: 期望 {sha256}，实际 {actual}（{url}）")
+            logger.info(f"已下载 {size} 字节并通过校验: {url}")
+
+            extract_dir = tempfile.mkdtemp(prefix=f"{sha256[:12]}.", suffix=".tmp", dir=self.store_dir)
+            try:
+                _safe_extract(archive, extract_dir)
+            except zipfile.BadZipFile as e:
+                raise PluginError(f"插件压缩包无效: {e}") from e
+            try:
+                os.replace(extract_dir, target)
+                extract_dir = None
+            except OSError:
+                # 其他进程已解压了相同内容
+                if not target.is_dir():
+                    raise
+        finally:
+            os.remove(archive)
+            if extract_dir is not None:
+                shutil.rmtree(extract_dir, ignore_errors=True)
+
+    def _set_current(self, code, version, sha256, target):
+        installed = self.installed()
+        current = installed.get(code)
+        previous = []
+        if current:
+            previous = [sha for sha in [current["sha256"]] + current.get("previous", []) if sha != sha256]
+        installed[code] = {"plugin_version": version, "sha256": sha256, "path": str(target),
+                           "installed_at": time.time(), "previous": previous}
+        _write_json(self.root / INSTALLED_FILE, installed)
+
+    # ---------- 清理 ----------
+    def prune(self, keep=DEFAULT_KEEP):
+        """删除不再使用的解压目录：每个院校保留当前版本和最近 keep 个旧版本
+
+        Returns:
+            list: 删除的 sha256
+        """
+        installed = self.installed()
+        referenced = set()
+        for code, record in installed.items():
+            referenced.add(record["sha256"])
+            referenced.update(record.get("previous", [])[:keep])
+            record["previous"] = record.get("previous", [])[:keep]
+        _write_json(self.root / INSTALLED_FILE, installed)
+
+        removed = []
+        for entry in self.store_dir.iterdir():
+            if entry.is_dir() and entry.name not in referenced and not entry.name.endswith(".tmp"):
+                shutil.rmtree(entry, ignore_errors=True)
+                removed.append(entry.name)
+        return removed
+
+
+# ===== 4. 主程序入口 =====
+def main():
+    parser = argparse.ArgumentParser(description="插件包管理工具")
+    parser.add_argument("schools", nargs="*", help="院校代码（默认索引中的全部院校）")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX), help="索引地址或本地路径")
+    parser.add_argument("--root", required=True, help="插件安装目录")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="索引缓存有效期（秒）")
+    parser.add_argument("--refresh", action="store_true", help="忽略缓存有效期，总是检查索引")
+    parser.add_argument("--prune", type=int, metavar="KEEP", help="安装后清理旧版本，每个院校保留 KEEP 个")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    manager = PluginManager(args.root, args.index, args.max_age)
+    try:
+        result = manager.sync(args.schools or None, args.refresh)
+    except PluginError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for code, status in result.items():
+        print(f"{code}: {status} -> {manager.plugin_path(code)}")
+    if args.prune is not None:
+        removed = manager.prune(args.prune)
+        print(f"已清理 {len(removed)} 个旧版本")
+
+
+if __name__ == "__main__":
+    main()
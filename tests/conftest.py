@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""测试公共配置：插件模块之间以顶层模块名互相导入，需要把插件目录加入 sys.path
+（benchmarks 提供合成页面与教务服务器替身，developer_tools 为开发工具）"""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT / "10546", ROOT / "benchmarks", ROOT / "developer_tools"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+USERNAME = "20230000"
+PASSWORD = "test"
+
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    """本地教务服务器替身；成绩、课表模块的请求地址与缓存目录在测试期间指向它与临时目录
+
+    需要宿主程序提供的 core 模块（日志与 AppData 路径），没有时跳过。
+    """
+    pytest.importorskip("core.log")
+    import cacheStore
+    import getCourseGrades
+    import getCourseSchedule
+    from standin_server import StandInServer
+
+    store = cacheStore.CacheStore(tmp_path / cacheStore.DEFAULT_FILENAME)
+    with StandInServer() as server:
+        for module in (getCourseGrades, getCourseSchedule):
+            monkeypatch.setattr(module, "RUN_MODE", "BUILD")
+            monkeypatch.setattr(module, "BASE_URL", server.base_url)
+            monkeypatch.setattr(module, "LOGIN_URL", server.base_url + "xk/LoginToXk")
+            monkeypatch.setattr(module, "APPDATA_DIR", tmp_path)
+            monkeypatch.setattr(module, "CACHE_STORE", store)
+            monkeypatch.setattr(module, "_parsed_cache", {})
+            monkeypatch.setattr(module.SESSION_MANAGER, "base_url", server.base_url)
+            monkeypatch.setattr(module.SESSION_MANAGER, "cache_dir", tmp_path)
+            monkeypatch.setattr(module.SESSION_MANAGER, "_sessions", {})
+        monkeypatch.setattr(getCourseGrades, "GRADE_URL", server.base_url + "kscj/cjcx_list")
+        monkeypatch.setattr(getCourseSchedule, "SCHEDULE_URL", server.base_url + "xskb/xskb_list.do")
+        monkeypatch.setattr(getCourseGrades.GRADE_DELTA_TRACKER, "store", store)
+        monkeypatch.setattr(getCourseSchedule.SCHEDULE_DELTA_TRACKER, "store", store)
+        yield server
+    store.close()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+from conftest import PASSWORD, USERNAME
+from pages import generate_grade_page, generate_schedule_page
+
+pytest.importorskip("aiohttp")
+
+
+def test_sessions_share_the_loop_connector(standin):
+    import asyncFetch
+    import getCourseGrades
+
+    standin.set_pages(grade_html=generate_grade_page(20), schedule_html=generate_schedule_page())
+
+    async def main():
+        connector = asyncFetch.get_connector()
+        session = asyncFetch.create_session_async()
+        assert session.connector is connector
+        await session.close()
+        # 关闭会话不关闭共用的连接池
+        assert not connector.closed and asyncFetch.get_connector() is connector
+
+        results = await asyncio.gather(
+            *(asyncFetch.fetch_grades_async(f"{USERNAME}{i}", PASSWORD, True) for i in range(3)),
+            asyncFetch.fetch_course_schedule_async(USERNAME, PASSWORD, True),
+        )
+        assert [len(rows) for rows in results[:3]] == [20] * 3 and results[3]
+        assert asyncFetch.get_connector() is connector
+
+        await asyncFetch.close_connector()
+        assert connector.closed and asyncFetch.get_connector() is not connector
+        await asyncFetch.close_connector()
+        return connector
+
+    first = asyncio.run(main())
+    assert len(getCourseGrades.get_grade_history().versions(f"{USERNAME}0")) == 1
+
+    # 每个事件循环使用各自的连接池
+    async def other_loop():
+        connector = asyncFetch.get_connector()
+        await asyncFetch.close_connector()
+        return connector
+
+    assert asyncio.run(other_loop()) is not first
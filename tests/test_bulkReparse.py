@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+
+import pytest
+
+import bulkReparse
+from pages import generate_grade_page, generate_schedule_page
+
+ACCOUNTS = 6
+GRADE_ROWS = 40
+
+
+@pytest.fixture
+def pages(tmp_path, monkeypatch):
+    # 主进程的日志不写入 AppData
+    monkeypatch.setattr(bulkReparse, "logger", logging.getLogger("test_bulkReparse"))
+    root = tmp_path / "pages"
+    for i in range(ACCOUNTS):
+        account = root / f"acct{i}"
+        account.mkdir(parents=True)
+        (account / "grade.html").write_text(generate_grade_page(GRADE_ROWS, seed=i), encoding="utf-8")
+        (account / "schedule.html").write_text(generate_schedule_page(seed=i), encoding="utf-8")
+    (root / "acct0" / "grade_bad.html").write_bytes(b"\xff\xfe\x00bad")
+    return root
+
+
+def _read(output):
+    with open(output, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_reparse_with_workers(pages, tmp_path):
+    output = tmp_path / "out.jsonl"
+    stats = bulkReparse.reparse(pages, output, workers=2, chunk_size=3)
+    assert stats["parsed"] == ACCOUNTS * 2 and stats["failed"] == 1 and stats["skipped"] == 0
+
+    records = {record["path"]: record for record in _read(output)}
+    assert len(records) == ACCOUNTS * 2 + 1
+    assert records["acct0/grade_bad.html"]["error"].startswith("UnicodeDecodeError")
+    for i in range(ACCOUNTS):
+        grade = records[f"acct{i}/grade.html"]
+        assert grade["count"] == GRADE_ROWS
+        html = (pages / f"acct{i}" / "grade.html").read_text(encoding="utf-8")
+        assert grade["rows"] == bulkReparse.parse_page(html, "grades")
+        schedule = records[f"acct{i}/schedule.html"]
+        assert schedule["kind"] == "schedule" and schedule["count"] == len(schedule["rows"]) > 0
+
+
+def test_resume_truncates_partial_line(pages, tmp_path):
+    output = tmp_path / "out.jsonl"
+    bulkReparse.reparse(pages, output, workers=2, chunk_size=3)
+    expected = {record["path"]: record for record in _read(output)}
+
+    # 模拟中断：保留前 4 行，第 5 行只写了一半
+    lines = output.read_bytes().splitlines(keepends=True)
+    output.write_bytes(b"".join(lines[:4]) + lines[4][:len(lines[4]) // 2])
+
+    stats = bulkReparse.reparse(pages, output, workers=2, chunk_size=3, resume=True)
+    assert stats["skipped"] == 4
+    assert stats["parsed"] + stats["failed"] == len(expected) - 4
+
+    records = _read(output)
+    assert len(records) == len(expected)
+    assert {record["path"]: record for record in records} == expected
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import cacheStore
+
+ROWS = [{"课程编号": "A001", "成绩": "90"}]
+CHANGED_ROWS = [{"课程编号": "A001", "成绩": "95"}]
+
+
+def _page(token, rows=ROWS):
+    """每次请求带不同标记（如 CSRF 令牌）的页面"""
+    return f'<input name="token" value="{token}">' + "".join(f"<td>{row['成绩']}</td>" for row in rows)
+
+
+def test_unchanged_count_follows_parsed_rows(tmp_path):
+    store = cacheStore.CacheStore(tmp_path / "cache.sqlite3")
+    store.put("grade", "u", _page(1), ROWS, fetched_at=100)
+    entry = store.get("grade", "u")
+    assert (entry.unchanged_count, entry.changed_at) == (0, 100)
+
+    # 页面标记不同但数据相同：视为未变化
+    store.put("grade", "u", _page(2), ROWS, fetched_at=200)
+    entry = store.get("grade", "u")
+    assert (entry.unchanged_count, entry.changed_at) == (1, 100)
+
+    # 不带解析结果写入：页面不同时等到保存解析结果再判断
+    content_hash = store.put("grade", "u", _page(3), fetched_at=300)
+    assert store.get("grade", "u").unchanged_count == 1
+    assert store.put_rows("grade", "u", content_hash, ROWS)
+    entry = store.get("grade", "u")
+    assert (entry.unchanged_count, entry.changed_at) == (2, 100)
+    # 再次保存同一页面的解析结果不计为一次获取
+    assert store.put_rows("grade", "u", content_hash, ROWS)
+    assert store.get("grade", "u").unchanged_count == 2
+
+    # 页面完全相同：不需要解析结果即可判断
+    store.put("grade", "u", _page(3), fetched_at=400)
+    assert store.get("grade", "u").unchanged_count == 3
+
+    # 数据变化
+    content_hash = store.put("grade", "u", _page(4, CHANGED_ROWS), fetched_at=500)
+    assert store.put_rows("grade", "u", content_hash, CHANGED_ROWS)
+    entry = store.get("grade", "u")
+    assert (entry.unchanged_count, entry.changed_at) == (0, 500)
+
+    store.put("grade", "u", _page(5), ROWS, fetched_at=600)
+    entry = store.get("grade", "u")
+    assert (entry.unchanged_count, entry.changed_at) == (0, 600)
+
+
+def test_rows_hash_ignores_key_order():
+    assert cacheStore.hash_rows([{"a": 1, "b": 2}]) == cacheStore.hash_rows([{"b": 2, "a": 1}])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+
+import cacheStore
+from deltaTracker import GRADE_KEY_FIELDS, DeltaTracker
+
+logger = logging.getLogger("test_deltaTracker")
+
+
+def _row(course, score):
+    return {"学期": "2023-2024-1", "课程编号": course, "成绩": score}
+
+
+def _page(*rows):
+    """测试用“页面”：解析函数直接取回构造时的条目"""
+    return json.dumps(rows, ensure_ascii=False)
+
+
+def _parse(html):
+    return json.loads(html)
+
+
+def test_accounts_are_tracked_separately(tmp_path):
+    store = cacheStore.CacheStore(tmp_path / "cache.sqlite3")
+    tracker = DeltaTracker(store, "grade_delta", GRADE_KEY_FIELDS, logger)
+
+    page_a = _page(_row("A001", "90"))
+    page_b = _page(_row("B001", "80"), _row("B002", "70"))
+
+    delta = tracker.update(page_a, _parse, "alice")
+    assert [row["课程编号"] for row in delta["added"]] == ["A001"]
+    # 另一个账号首次获取：全部视为新增，不与 alice 的状态比较
+    delta = tracker.update(page_b, _parse, "bob")
+    assert [row["课程编号"] for row in delta["added"]] == ["B001", "B002"]
+    assert delta["removed"] == []
+
+    # 各自页面未变化：不解析，没有差异
+    def fail(html):
+        raise AssertionError("页面未变化时不应解析")
+
+    for username, page in (("alice", page_a), ("bob", page_b)):
+        assert tracker.update(page, fail, username) == {"added": [], "changed": [], "removed": []}
+
+    # alice 的变化只与 alice 上次的结果比较
+    delta = tracker.update(_page(_row("A001", "95")), _parse, "alice")
+    assert delta["added"] == [] and delta["removed"] == []
+    assert delta["changed"] == [{"old": _row("A001", "90"), "new": _row("A001", "95")}]
+    assert tracker.update(page_b, fail, "bob")["changed"] == []
+
+
+def test_reset_clears_only_one_account(tmp_path):
+    store = cacheStore.CacheStore(tmp_path / "cache.sqlite3")
+    tracker = DeltaTracker(store, "grade_delta", GRADE_KEY_FIELDS, logger)
+    page = _page(_row("A001", "90"))
+    tracker.update(page, _parse, "alice")
+    tracker.update(page, _parse, "bob")
+
+    tracker.reset("alice")
+    assert len(tracker.update(page, _parse, "alice")["added"]) == 1
+    assert tracker.update(page, _parse, "bob")["added"] == []
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+
+import cacheStore
+import failureStore
+
+
+def _store(tmp_path, **kwargs):
+    return failureStore.FailureStore(cacheStore.CacheStore(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_same_page_is_stored_once(tmp_path):
+    store = _store(tmp_path)
+    first = store.record("<html>系统繁忙</html>", "page", "grades", "u", 500, 0.1, "http://x/")
+    assert store.record("<html>系统繁忙</html>", "login", "schedule") == first
+    store.record("<html>其他错误</html>", "page", "grades")
+    assert store.flush(5)
+
+    records = {record.content_hash: record for record in store.list_failures()}
+    assert len(records) == 2
+    record = records[first]
+    # 元数据保留首次出现时的记录
+    assert (record.count, record.stage, record.source, record.status_code) == (2, "page", "grades", 500)
+    assert record.last_seen >= record.first_seen
+    assert store.get_failure(first) == "<html>系统繁忙</html>"
+
+
+def test_oldest_samples_are_evicted(tmp_path):
+    # 随机内容几乎不可压缩，每份样本约 4KB
+    pages = [os.urandom(2048).hex() for _ in range(10)]
+    store = _store(tmp_path, max_bytes=20 * 1024)
+    for page in pages:
+        store.record(page, "page")
+        assert store.flush(5)
+
+    kept = {record.content_hash for record in store.list_failures()}
+    assert sum(record.size for record in store.list_failures()) <= store.max_bytes
+    assert store._total_bytes == sum(record.size for record in store.list_failures())
+    assert cacheStore.hash_html(pages[-1]) in kept
+    assert cacheStore.hash_html(pages[0]) not in kept
+    assert 0 < len(kept) < len(pages)
+
+    # 新实例从数据库读取累计大小后继续淘汰
+    store = failureStore.FailureStore(store.store, max_bytes=20 * 1024)
+    store.record(os.urandom(2048).hex(), "page")
+    assert store.flush(5)
+    assert sum(record.size for record in store.list_failures()) <= store.max_bytes
+
+
+def test_flush_waits_for_queue_and_full_queue_drops(tmp_path, monkeypatch):
+    monkeypatch.setattr(failureStore, "QUEUE_SIZE", 2)
+    store = _store(tmp_path)
+    # 后台线程未启动：队列中的样本尚未写入
+    monkeypatch.setattr(store, "_ensure_writer", lambda: None)
+    for i in range(4):
+        store.record(f"<html>{i}</html>", "page")
+    assert store.dropped == 2
+    assert not store.flush(0.05)
+
+    monkeypatch.undo()
+    store._ensure_writer()
+    assert store.flush(5)
+    assert len(store.list_failures()) == 2
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import pytest
+from conftest import PASSWORD, USERNAME
+from pages import generate_grade_page, generate_schedule_page
+
+
+@pytest.fixture
+def fetch_all_module(standin):
+    import fetchAll
+
+    standin.set_pages(grade_html=generate_grade_page(20), schedule_html=generate_schedule_page())
+    return fetchAll
+
+
+def _logins(server):
+    return sum(count for path, count in server.requests.items() if path.endswith("LoginToXk"))
+
+
+def test_dev_mode_reads_cache_even_when_forced(standin, fetch_all_module, monkeypatch):
+    for kind in fetch_all_module.PARTS:
+        monkeypatch.setattr(fetch_all_module.PARTS[kind][0], "RUN_MODE", "DEV")
+
+    result = fetch_all_module.fetch_all(USERNAME, PASSWORD, force_update=True)
+    assert result["grades"] is None and result["schedule"] is None
+    assert set(result["errors"]) == {"grades", "schedule"}
+    assert standin.requests == {}
+
+
+def test_parse_error_keeps_session(standin, fetch_all_module, monkeypatch):
+    def broken_parse(html):
+        raise ValueError("页面结构变化")
+
+    parts = list(fetch_all_module.PARTS["grades"])
+    parts[4] = broken_parse
+    monkeypatch.setitem(fetch_all_module.PARTS, "grades", tuple(parts))
+
+    for _ in range(2):
+        result = fetch_all_module.fetch_all(USERNAME, PASSWORD, force_update=True)
+        assert "解析失败" in result["errors"]["grades"]
+        assert result["schedule"]
+    assert _logins(standin) == 1
+
+
+def test_download_failure_discards_session(standin, fetch_all_module):
+    standin.set_pages(grade_html="<html><body>系统维护中</body></html>")
+    for _ in range(2):
+        result = fetch_all_module.fetch_all(USERNAME, PASSWORD, force_update=True)
+        assert result["errors"]["grades"] == "未获取到有效页面"
+        assert result["schedule"]
+    assert _logins(standin) == 2
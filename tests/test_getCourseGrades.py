@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+from conftest import PASSWORD, USERNAME
+from pages import generate_grade_page
+
+
+def test_each_fetch_path_records_a_version(standin):
+    import getCourseGrades
+
+    history = getCourseGrades.get_grade_history()
+    fetchers = (
+        lambda: getCourseGrades.fetch_grades(USERNAME, PASSWORD, True),
+        lambda: list(getCourseGrades.fetch_grades_stream(USERNAME, PASSWORD, True)),
+        lambda: getCourseGrades.fetch_grades_delta(USERNAME, PASSWORD, True),
+    )
+    for i, fetch in enumerate(fetchers):
+        standin.set_pages(grade_html=generate_grade_page(20 + i, seed=i))
+        fetch()
+        assert len(history.versions(USERNAME)) == i + 1
+        assert len(history.state_at(USERNAME)) == 20 + i
+
+
+def test_reparsed_cache_is_recorded_at_fetch_time(standin):
+    import getCourseGrades
+
+    getCourseGrades.CACHE_STORE.put(getCourseGrades.CACHE_KIND, USERNAME, generate_grade_page(10),
+                                    fetched_at=1000.0)
+    assert len(getCourseGrades.load_parsed_grades(USERNAME)) == 10
+    assert getCourseGrades.get_grade_history().versions(USERNAME) == [(1, 1000.0)]
+
+
+def test_delta_fetch_counts_unchanged_rows(standin):
+    import getCourseGrades
+
+    page = generate_grade_page(20)
+    for token in range(3):
+        # 页面带每次请求不同的标记，解析出的条目不变
+        standin.set_pages(grade_html=page + f"<!-- {token} -->")
+        getCourseGrades.fetch_grades_delta(USERNAME, PASSWORD, True)
+    entry = getCourseGrades.CACHE_STORE.get(getCourseGrades.CACHE_KIND, USERNAME)
+    assert entry.unchanged_count == 2
+
+
+def test_terms(standin):
+    from datetime import date, datetime
+
+    import getCourseGrades
+
+    assert getCourseGrades.term_of(date(2024, 9, 1)) == "2024-2025-1"
+    assert getCourseGrades.term_of(date(2025, 1, 31)) == "2024-2025-1"
+    assert getCourseGrades.term_of(date(2025, 2, 1)) == "2024-2025-2"
+    assert getCourseGrades.term_of(date(2025, 7, 31)) == "2024-2025-2"
+    assert getCourseGrades.previous_term("2024-2025-2") == "2024-2025-1"
+    assert getCourseGrades.previous_term("2024-2025-1") == "2023-2024-2"
+    assert getCourseGrades.open_terms(date(2025, 3, 1)) == ["2024-2025-2", "2024-2025-1"]
+    for term in ("2024-2025-1", "2024-2025-2"):
+        start = getCourseGrades._term_start(term)
+        assert getCourseGrades.term_of(datetime.fromtimestamp(start).date()) == term
+        assert getCourseGrades.term_of(datetime.fromtimestamp(start - 1).date()) == getCourseGrades.previous_term(term)
+
+
+def test_needs_full_fetch_after_a_term_ends(standin):
+    import getCourseGrades
+
+    terms = ["2024-2025-2", "2024-2025-1"]
+    start = getCourseGrades._term_start(terms[0])
+    assert getCourseGrades._needs_full_fetch(USERNAME, terms)
+    getCourseGrades.CACHE_STORE.put(getCourseGrades.TERM_INDEX_KIND, USERNAME, "<html></html>", fetched_at=start - 1)
+    assert getCourseGrades._needs_full_fetch(USERNAME, terms)
+    getCourseGrades.CACHE_STORE.put(getCourseGrades.TERM_INDEX_KIND, USERNAME, "<html></html>", fetched_at=start + 1)
+    assert not getCourseGrades._needs_full_fetch(USERNAME, terms)
+
+
+def test_fetch_by_term_requests_only_due_terms(standin, monkeypatch):
+    import json
+
+    import getCourseGrades
+    import pluginConfig
+
+    terms = ["2023-2024-2", "2023-2024-1"]
+    monkeypatch.setattr(getCourseGrades, "open_terms", lambda day=None, count=None: terms)
+    monkeypatch.setattr(getCourseGrades, "get_loop_config", lambda: pluginConfig.LoopConfig(True, 3600))
+    store = getCourseGrades.CACHE_STORE
+
+    def grade_requests():
+        return standin.requests.get("/jsxsd/kscj/cjcx_list", 0)
+
+    def expire(term):
+        entry = store.get(getCourseGrades.TERM_CACHE_PREFIX + term, USERNAME, with_rows=True)
+        store.put(getCourseGrades.TERM_CACHE_PREFIX + term, USERNAME,
+                  json.dumps(entry.rows, ensure_ascii=False), entry.rows, fetched_at=0)
+
+    old_page = generate_grade_page(40, seed=1)
+    standin.set_pages(grade_html=old_page)
+    grades = getCourseGrades.fetch_grades_by_term(USERNAME, PASSWORD)
+    # 全部学期页面拆分保存；合并结果按学期升序，学期内保持页面顺序
+    assert grades == sorted(getCourseGrades.parse_grades(old_page), key=lambda grade: grade["学期"])
+    assert grade_requests() == 1
+
+    # 没有学期达到更新间隔：不发起请求
+    assert getCourseGrades.fetch_grades_by_term(USERNAME, PASSWORD) == grades
+    assert grade_requests() == 1
+
+    # 成绩未变化时按学期请求得到的分区与拆分保存的内容哈希相同
+    kind = getCourseGrades.TERM_CACHE_PREFIX + terms[0]
+    split_hash = store.get(kind, USERNAME).content_hash
+    expire(terms[0])
+    unchanged_count = store.get(kind, USERNAME).unchanged_count
+    assert getCourseGrades.fetch_grades_by_term(USERNAME, PASSWORD) == grades
+    assert grade_requests() == 2
+    entry = store.get(kind, USERNAME)
+    assert (entry.content_hash, entry.unchanged_count) == (split_hash, unchanged_count + 1)
+
+    # 只请求达到更新间隔的学期，其余学期保留缓存
+    new_page = generate_grade_page(40, seed=2)
+    standin.set_pages(grade_html=new_page)
+    expire(terms[0])
+    grades = getCourseGrades.fetch_grades_by_term(USERNAME, PASSWORD)
+    assert grade_requests() == 3
+    by_term = getCourseGrades._split_by_term(grades)
+    assert by_term[terms[0]] == getCourseGrades._split_by_term(getCourseGrades.parse_grades(new_page))[terms[0]]
+    assert by_term[terms[1]] == getCourseGrades._split_by_term(getCourseGrades.parse_grades(old_page))[terms[1]]
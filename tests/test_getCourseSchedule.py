@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from conftest import PASSWORD, USERNAME
+from pages import generate_schedule_page
+
+
+def test_delta_fetch_counts_unchanged_rows(standin):
+    import getCourseSchedule
+
+    page = generate_schedule_page()
+    for token in range(3):
+        # 页面带每次请求不同的标记，解析出的条目不变
+        standin.set_pages(schedule_html=page + f"<!-- {token} -->")
+        getCourseSchedule.fetch_course_schedule_delta(USERNAME, PASSWORD, True)
+    entry = getCourseSchedule.CACHE_STORE.get(getCourseSchedule.CACHE_KIND, USERNAME)
+    assert entry.unchanged_count == 2
+
+    standin.set_pages(schedule_html=generate_schedule_page(seed=1))
+    delta = getCourseSchedule.fetch_course_schedule_delta(USERNAME, PASSWORD, True)
+    assert delta["added"] or delta["changed"] or delta["removed"]
+    entry = getCourseSchedule.CACHE_STORE.get(getCourseSchedule.CACHE_KIND, USERNAME)
+    assert entry.unchanged_count == 0
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import cacheStore
+import gradeHistory
+
+
+def _row(course, score, term="2023-2024-1"):
+    return {"学期": term, "课程编号": course, "成绩": score}
+
+
+def test_versions_store_only_changes(tmp_path):
+    history = gradeHistory.GradeHistory(cacheStore.CacheStore(tmp_path / "cache.sqlite3"))
+    v1 = [_row("A001", "90"), _row("A002", "80")]
+    v2 = [_row("A001", "95"), _row("A002", "80"), _row("A003", "70")]
+    v3 = [_row("A001", "95"), _row("A003", "70")]
+
+    assert history.record("u", v1, recorded_at=100) == 1
+    assert history.record("u", list(reversed(v1)), recorded_at=150) is None
+    assert history.record("u", v2, recorded_at=200) == 2
+    assert history.record("u", v3, recorded_at=300) == 3
+    assert history.versions("u") == [(1, 100), (2, 200), (3, 300)]
+
+    assert history.state_at("u", 50) is None
+    assert history.state_at("u", 150) == v1
+    assert sorted(history.state_at("u", 250), key=str) == sorted(v2, key=str)
+    assert sorted(history.state_at("u"), key=str) == sorted(v3, key=str)
+
+    changes = history.changes("u", since=100)
+    assert [c["version"] for c in changes] == [2, 3]
+    assert changes[0]["added"] == [_row("A003", "70")]
+    assert changes[0]["changed"] == [{"old": _row("A001", "90"), "new": _row("A001", "95")}]
+    assert changes[1]["removed"] == [_row("A002", "80")]
+
+    assert history.timeline("u", ("2023-2024-1", "A002")) == [(100, _row("A002", "80")), (300, None)]
+
+
+def test_checkpoints_reconstruct_every_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(gradeHistory, "CHECKPOINT_INTERVAL", 3)
+    store = cacheStore.CacheStore(tmp_path / "cache.sqlite3")
+    history = gradeHistory.GradeHistory(store)
+    states = []
+    for i in range(10):
+        # 每个版本成绩都变化并新增一门课程，每两个版本删除最早的一门课程
+        rows = [_row(f"A{n:03d}", str(60 + i)) for n in range(i // 2, 5 + i)]
+        states.append(rows)
+        assert history.record("u", rows, recorded_at=100 * (i + 1)) == i + 1
+
+    (snapshots,) = store.connect().execute(
+        "SELECT COUNT(*) FROM grade_history WHERE snapshot IS NOT NULL").fetchone()
+    assert snapshots == 3
+
+    # 新实例没有内存中的最新状态，只能从快照和差异还原
+    fresh = gradeHistory.GradeHistory(store)
+    for i, rows in enumerate(states):
+        assert sorted(fresh.state_at("u", 100 * (i + 1) + 50), key=str) == sorted(rows, key=str)
+    assert fresh.record("u", states[-1], recorded_at=2000) is None
+    assert fresh.record("u", states[0], recorded_at=2000) == 11
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import parserBackend
+from pages import GRADE_SIZES, SCHEDULE_SIZES, generate_grade_page, generate_schedule_page
+
+pytest.importorskip("lxml")
+
+GRADE_PAGES = [generate_grade_page(GRADE_SIZES[name], seed=seed) for name in ("grades_10", "grades_60", "grades_1k")
+               for seed in range(3)]
+SCHEDULE_PAGES = [generate_schedule_page(blocks, fill=fill, seed=seed) for blocks in SCHEDULE_SIZES.values()
+                  for fill in (0.3, 1.0) for seed in range(2)]
+NO_TABLE_PAGE = "<html><body><table id='other'><tr><td>1</td></tr></table></body></html>"
+
+
+@pytest.mark.parametrize("page", GRADE_PAGES + [NO_TABLE_PAGE])
+def test_grade_rows_match_across_backends(page):
+    expected = parserBackend.extract_grade_rows(page, parserBackend.BACKEND_BS4)
+    assert parserBackend.extract_grade_rows(page, parserBackend.BACKEND_LXML) == expected
+
+
+@pytest.mark.parametrize("page", SCHEDULE_PAGES + [NO_TABLE_PAGE])
+def test_schedule_rows_match_across_backends(page):
+    expected = parserBackend.extract_schedule_rows(page, parserBackend.BACKEND_BS4)
+    assert parserBackend.extract_schedule_rows(page, parserBackend.BACKEND_LXML) == expected
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        parserBackend.resolve_backend("html5lib")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import zipfile
+
+import pytest
+
+import pluginManager
+from pluginManager import PluginError, PluginManager
+
+
+def _make_plugin(tmp_path, content="print('v1')", version="1"):
+    archive = tmp_path / f"plugin_{version}.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("getCourseGrades.py", content)
+    return archive, hashlib.sha256(archive.read_bytes()).hexdigest()
+
+
+def _write_index(tmp_path, archive, sha256, version="1"):
+    index = tmp_path / "plugins_index.json"
+    index.write_text(json.dumps({"plugins": [{
+        "school_code": "10546", "plugin_version": version, "sha256": sha256, "download_url": archive.name,
+    }]}), encoding="utf-8")
+    return index
+
+
+def test_install_then_skip_when_unchanged(tmp_path):
+    archive, sha256 = _make_plugin(tmp_path)
+    manager = PluginManager(tmp_path / "root", _write_index(tmp_path, archive, sha256))
+
+    assert manager.sync() == {"10546": "installed"}
+    path = manager.plugin_path("10546")
+    assert path == manager.store_dir / sha256
+    assert (path / "getCourseGrades.py").read_text() == "print('v1')"
+
+    # sha256 与版本都未变化：不再下载（压缩包已不存在也不影响）
+    archive.unlink()
+    assert manager.sync(refresh=True) == {"10546": "unchanged"}
+
+
+def test_sha256_mismatch_is_rejected(tmp_path):
+    archive, _ = _make_plugin(tmp_path)
+    manager = PluginManager(tmp_path / "root", _write_index(tmp_path, archive, "0" * 64))
+
+    with pytest.raises(PluginError, match="sha256"):
+        manager.sync()
+    assert manager.installed() == {}
+    assert list(manager.store_dir.iterdir()) == []
+
+
+def test_unreadable_local_index(tmp_path):
+    archive, sha256 = _make_plugin(tmp_path)
+    index = _write_index(tmp_path, archive, sha256)
+
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text("{", encoding="utf-8")
+    with pytest.raises(PluginError):
+        PluginManager(tmp_path / "invalid_root", invalid).load_index()
+    with pytest.raises(PluginError):
+        PluginManager(tmp_path / "missing_root", tmp_path / "missing.json").load_index()
+
+    # 已有缓存时使用缓存的索引
+    manager = PluginManager(tmp_path / "root", index)
+    plugins = manager.load_index()
+    index.unlink()
+    assert manager.load_index(refresh=True) == plugins
+    index.write_text("[]", encoding="utf-8")
+    assert manager.load_index(refresh=True) == plugins
+    assert json.loads((manager.root / pluginManager.INDEX_FILE).read_text(encoding="utf-8"))["plugins"]
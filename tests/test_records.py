@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import json
+import pickle
+
+import pytest
+
+import parserBackend
+import records
+from pages import GRADE_SIZES, SCHEDULE_SIZES, generate_grade_page, generate_schedule_page
+
+GRADE_PAGES = [generate_grade_page(GRADE_SIZES[name], seed=seed) for name in ("grades_10", "grades_1k")
+               for seed in range(2)]
+SCHEDULE_PAGES = [generate_schedule_page(blocks, seed=seed) for blocks in SCHEDULE_SIZES.values()
+                  for seed in range(2)]
+
+
+def _assert_equivalent(compact, dicts):
+    assert compact == dicts
+    assert records.to_dicts(compact) == dicts
+    # 紧凑记录转换后的 JSON 与原格式完全一致（字段顺序相同）
+    assert json.dumps(records.to_dicts(compact), ensure_ascii=False) == json.dumps(dicts, ensure_ascii=False)
+    assert pickle.loads(pickle.dumps(compact)) == compact
+
+
+@pytest.mark.parametrize("page", GRADE_PAGES)
+def test_compact_grades_match_dicts(page):
+    rows = parserBackend.extract_grade_rows(page)
+    dicts = records.grades_from_rows(rows)
+    compact = records.grades_from_rows(rows, compact=True)
+    _assert_equivalent(compact, dicts)
+    assert records.grades_from_dicts(dicts) == compact
+
+
+@pytest.mark.parametrize("page", SCHEDULE_PAGES)
+def test_compact_courses_match_dicts(page):
+    rows = parserBackend.extract_schedule_rows(page)
+    dicts = records.courses_from_rows(rows)
+    compact = records.courses_from_rows(rows, compact=True)
+    _assert_equivalent(compact, dicts)
+    assert records.courses_from_dicts(dicts) == compact
+    for record, item in zip(compact, dicts):
+        assert [week for week in range(1, 30) if record.has_week(week)] == \
+            [week for week in item["周次列表"] if 1 <= week < 30]
+
+
+def test_week_mask_round_trip():
+    for weeks in ([], [1], [1, 3, 5], list(range(1, 21)), [2, 64, 65]):
+        mask = records.weeks_to_mask(weeks)
+        assert records.mask_to_weeks(mask) == weeks
+        assert all(records.has_week(mask, week) == (week in weeks) for week in range(70))
+    assert records.weeks_to_mask([records.FULL_TERM]) == records.FULL_TERM_MASK
+    assert records.mask_to_weeks(records.FULL_TERM_MASK) == [records.FULL_TERM]
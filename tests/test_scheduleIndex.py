@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import parserBackend
+import records
+import scheduleIndex
+from pages import SCHEDULE_SIZES, generate_schedule_page
+from scheduleIndex import DEFAULT_PERIOD_TIMES, ScheduleIndex
+
+TERM_START = date(2024, 2, 28)  # 星期三：第一周从 2 月 26 日星期一开始
+MONDAY = date(2024, 2, 26)
+
+
+def _schedule(blocks, seed, compact):
+    rows = parserBackend.extract_schedule_rows(generate_schedule_page(blocks, seed=seed))
+    schedule = records.courses_from_rows(rows, compact=compact)
+    # 没有周次的课程按"全学期"处理
+    full_term = {"星期": 6, "开始小节": 3, "结束小节": 4, "课程名称": "全学期课程", "教师": "", "教室": "",
+                 "周次列表": [records.FULL_TERM]}
+    schedule.append(records.CourseRecord.from_dict(full_term) if compact else full_term)
+    return schedule
+
+
+def _weeks(item, term_weeks):
+    mask = scheduleIndex.get_week_mask(item)
+    return [week for week in range(1, term_weeks + 1) if records.has_week(mask, week)]
+
+
+def _brute_now(schedule, weeks, moment):
+    """逐条扫描课表：moment 正在上的课程（weeks[i] 为第 i 条课程的上课周次）"""
+    week = (moment.date() - MONDAY).days // 7 + 1
+    result = []
+    for item, item_weeks in zip(schedule, weeks):
+        for period in range(item["开始小节"], item["结束小节"] + 1):
+            begin, end = DEFAULT_PERIOD_TIMES[period]
+            if item["星期"] == moment.isoweekday() and week in item_weeks and begin <= moment.time() < end:
+                result.append(item)
+                break
+    return result
+
+
+def _brute_starts(schedule, term_weeks):
+    """全部上课时间 -> 该时间开始的课程"""
+    starts = {}
+    for item in schedule:
+        for week in _weeks(item, term_weeks):
+            day = MONDAY + timedelta(days=(week - 1) * 7 + item["星期"] - 1)
+            moment = datetime.combine(day, DEFAULT_PERIOD_TIMES[item["开始小节"]][0])
+            starts.setdefault(moment, []).append(item)
+    return sorted(starts.items())
+
+
+def _moments(term_weeks):
+    rnd = random.Random(0)
+    begin = datetime.combine(MONDAY - timedelta(days=3), datetime.min.time())
+    span = (term_weeks * 7 + 6) * 24 * 3600
+    moments = [begin + timedelta(seconds=rnd.randrange(span)) for _ in range(1000)]
+    # 上下课时刻前后
+    for week in (1, 2, term_weeks):
+        for weekday in range(7):
+            day = MONDAY + timedelta(days=(week - 1) * 7 + weekday)
+            for begin_time, end_time in DEFAULT_PERIOD_TIMES.values():
+                for t in (begin_time, end_time):
+                    moment = datetime.combine(day, t)
+                    moments += [moment - timedelta(seconds=1), moment, moment + timedelta(seconds=1)]
+    return moments
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("blocks", list(SCHEDULE_SIZES.values()))
+def test_index_matches_brute_force(blocks, compact):
+    schedule = _schedule(blocks, seed=blocks, compact=compact)
+    index = ScheduleIndex(schedule, term_start=TERM_START)
+    starts = _brute_starts(schedule, index.term_weeks)
+    weeks = [set(_weeks(item, index.term_weeks)) for item in schedule]
+
+    busy = 0
+    for moment in _moments(index.term_weeks):
+        current = index.now(moment)
+        assert current == _brute_now(schedule, weeks, moment)
+        busy += bool(current)
+        expected = next(((start, items) for start, items in starts if start > moment), None)
+        assert index.next_class(moment) == expected
+    assert busy
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import stat
+
+import pytest
+
+from sessionManager import SessionManager
+
+logger = logging.getLogger("test_sessionManager")
+
+
+class _Response:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+
+class _Cookie:
+    def __init__(self, name, value):
+        self.name, self.value = name, value
+        self.domain, self.path, self.expires, self.secure = "", "/", None, False
+
+
+class _Cookies(list):
+    def set(self, name, value, **kwargs):
+        self.append(_Cookie(name, value))
+
+
+class _Session:
+    """记录请求的会话；valid 为 False 时探测返回登录页"""
+
+    def __init__(self, requests, valid=True):
+        self.requests = requests
+        self.valid = valid
+        self.cookies = _Cookies([_Cookie("JSESSIONID", "abc")])
+
+    def get(self, url, **kwargs):
+        self.requests.append(("GET", url))
+        return _Response(200, "ok" if self.valid else '<input name="encoded">')
+
+
+def _manager(tmp_path, requests, saved_valid):
+    def login(username, password):
+        requests.append(("POST", "login"))
+        return _Session(requests)
+
+    def factory():
+        return _Session(requests, valid=saved_valid)
+
+    return SessionManager(login, factory, tmp_path, "http://jw/", logger, probe_interval=0)
+
+
+def test_throttle_runs_before_every_request(tmp_path):
+    requests = []
+    tokens = []
+    manager = _manager(tmp_path, requests, saved_valid=False)
+    throttle = lambda: tokens.append(len(requests))  # noqa: E731
+
+    # 没有保存的会话：只有一次登录请求
+    assert manager.get_session("u", "p", throttle=throttle) is not None
+    assert requests == [("POST", "login")]
+    assert tokens == [0]
+
+    # 内存会话需要探测：探测一次
+    assert manager.get_session("u", "p", throttle=throttle) is not None
+    assert len(requests) == 2 and tokens == [0, 1]
+
+    # 内存会话丢失，保存的 Cookie 已过期：探测失败后重新登录，两次请求两个令牌
+    manager._sessions.clear()
+    assert manager.get_session("u", "p", throttle=throttle) is not None
+    assert [method for method, _ in requests[2:]] == ["GET", "POST"]
+    assert tokens == [0, 1, 2, 3]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="文件权限位只在 POSIX 系统上有意义")
+def test_cookie_file_is_private(tmp_path):
+    manager = _manager(tmp_path, [], saved_valid=True)
+    cookie_file = manager.get_cookie_file("u")
+    # 残留的临时文件权限更宽
+    cookie_file.with_suffix(".tmp").write_text("{}")
+    os.chmod(cookie_file.with_suffix(".tmp"), 0o644)
+
+    cookies = [{"name": "JSESSIONID", "value": "abc", "domain": "", "path": "/", "expires": None, "secure": False}]
+    manager.save_cookies("u", cookies)
+    assert stat.S_IMODE(os.stat(cookie_file).st_mode) == 0o600
+    assert manager.load_cookies("u") == cookies
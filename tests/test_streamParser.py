@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import parserBackend
+import records
+import streamParser
+from pages import GRADE_SIZES, SCHEDULE_SIZES, generate_grade_page, generate_schedule_page
+
+# 7 字节的分块会把多字节汉字和标签从中间切开
+CHUNK_SIZES = (7, 100, streamParser.DEFAULT_CHUNK_SIZE)
+GRADE_PAGES = {name: generate_grade_page(GRADE_SIZES[name], seed=1) for name in ("grades_10", "grades_1k")}
+SCHEDULE_PAGES = {name: generate_schedule_page(blocks, seed=1) for name, blocks in SCHEDULE_SIZES.items()}
+TRAILER = "<div>表格之后的内容</div>" * 100
+
+
+class FakeResponse:
+    """只提供 StreamDownload 用到的接口的响应"""
+
+    encoding = "utf-8"
+
+    def __init__(self, page, chunk_size):
+        self.data = page.encode("utf-8")
+        self.chunk_size = chunk_size
+        self.served = 0
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        assert chunk_size == self.chunk_size
+        for start in range(0, len(self.data), chunk_size):
+            chunk = self.data[start:start + chunk_size]
+            self.served += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def _stream(parser, page, chunk_size, tmp_file=None, markers=()):
+    response = FakeResponse(page, chunk_size)
+    download = streamParser.StreamDownload(response, parser, tmp_file, markers, chunk_size)
+    return list(download), download, response
+
+
+def _grades(rows):
+    return [grade for grade in map(records.build_grade, rows) if grade]
+
+
+def _courses(items):
+    schedule = []
+    for row_idx, cells in items:
+        if cells is not None:
+            schedule.extend(records.build_course_items(row_idx, cells))
+    return schedule
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("page", list(GRADE_PAGES.values()), ids=list(GRADE_PAGES))
+def test_grade_stream_matches_reference_parser(page, chunk_size, tmp_path):
+    tmp_file = tmp_path / "grade.part"
+    full_page = page + TRAILER
+    rows, download, response = _stream(streamParser.GradeStreamParser(), full_page, chunk_size, tmp_file)
+    assert rows == parserBackend.extract_grade_rows(page, parserBackend.BACKEND_BS4)
+    # 表格闭合所在的分块读完后即停止下载，已下载的内容写入临时文件
+    table_end = len(full_page[:full_page.index("</table>") + len("</table>")].encode("utf-8"))
+    assert download.completed and response.closed
+    assert table_end <= response.served < table_end + chunk_size
+    saved = tmp_file.read_text(encoding="utf-8")
+    assert full_page.startswith(saved) and "</table>" in saved
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("page", list(SCHEDULE_PAGES.values()), ids=list(SCHEDULE_PAGES))
+def test_schedule_stream_matches_reference_parser(page, chunk_size):
+    items, download, response = _stream(streamParser.ScheduleStreamParser(), page + TRAILER, chunk_size)
+    assert [cells for _, cells in items] == parserBackend.extract_schedule_rows(page, parserBackend.BACKEND_BS4)
+    assert [row_idx for row_idx, _ in items] == list(range(len(items)))
+    assert download.completed and response.closed
+
+
+def test_page_without_table_is_read_to_the_end():
+    page = "<html><body><p>系统维护中</p></body></html>"
+    rows, download, response = _stream(streamParser.GradeStreamParser(), page, 7, markers=("维护",))
+    assert rows == []
+    assert not download.completed and download.has_marker("维护")
+    assert response.served == len(response.data)
+
+
+def test_stream_matches_parse_functions():
+    pytest.importorskip("core.log")
+    import getCourseGrades
+    import getCourseSchedule
+
+    for page in GRADE_PAGES.values():
+        rows, _, _ = _stream(streamParser.GradeStreamParser(), page, 100)
+        assert _grades(rows) == getCourseGrades.parse_grades(page)
+    for page in SCHEDULE_PAGES.values():
+        items, _, _ = _stream(streamParser.ScheduleStreamParser(), page, 100)
+        assert _courses(items) == getCourseSchedule.parse_schedule(page)